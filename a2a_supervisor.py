@@ -0,0 +1,49 @@
+"""
+以多行程執行 A2A 服務
+
+# 每個 agent 各一個行程
+python3 a2a_supervisor.py
+# product_recommendation_agent 兩個 worker（多 worker 需共用的 task store），較冷門的 agent 合併為一個行程
+A2A_TASK_STORE=sqlite python3 a2a_supervisor.py --group product_recommendation_agent:2 --group order_query_agent \\
+    --group technical_support_agent,policy_information_agent,payment_shipping_agent,human_escalation_agent,inventory_management_agent
+
+也可用環境變數 A2A_SUPERVISOR_GROUPS（以 ; 分隔群組）設定；kill -HUP <pid> 滾動重啟所有 worker（需 A2A_TASK_STORE=sqlite，memory task store 會略過）
+"""
+import argparse
+
+import logfire
+
+from cores.settings import SETTINGS
+from cores.supervisor import Supervisor, parse_groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="A2A 服務 supervisor")
+    parser.add_argument("--group", action="append", default=[],
+                        help="agent 群組，格式 agent_a,agent_b[:workers]，可重複指定")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--graceful-timeout", type=int, default=30, help="停止 worker 時等待 in-flight 請求的秒數")
+    parser.add_argument("--health-interval", type=float, default=10)
+    parser.add_argument("--max-health-failures", type=int, default=3, help="連續幾次健康檢查失敗後替換 worker")
+    parser.add_argument("--report-interval", type=float, default=30, help="回報 CPU / 記憶體的間隔秒數")
+    args = parser.parse_args()
+
+    logfire.configure(
+        send_to_logfire=False,
+        service_name='a2a_supervisor-dev',
+        inspect_arguments=True,
+        scrubbing=False,
+    )
+    groups = parse_groups(args.group or SETTINGS.A2A_SUPERVISOR_GROUPS.split(";"))
+    Supervisor(
+        groups,
+        host=args.host,
+        graceful_timeout=args.graceful_timeout,
+        health_interval=args.health_interval,
+        max_health_failures=args.max_health_failures,
+        report_interval=args.report_interval,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
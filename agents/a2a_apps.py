@@ -2,65 +2,119 @@
 將 agent 轉換為 A2A 應用程式
 任務細分化
 個別處理任務
+
+各 app 在第一次存取時才建立（`from agents.a2a_apps import order_query_app`），
+由 supervisor 啟動的行程只會載入自己負責的 agent
 """
-from agents.order_query_agent import order_query_agent
-from agents.human_escalation_agent import human_escalation_agent
-from agents.inventory_management_agent import inventory_management_agent
-from agents.payment_shipping_agent import payment_shipping_agent
-from agents.policy_information_agent import policy_information_agent
-from agents.product_recommendation_agent import product_recommendation_agent
-from agents.technical_support_agent import technical_support_agent
+import asyncio
+import contextlib
+import functools
+import importlib
+import threading
+from typing import Dict, NamedTuple, Tuple
+
+import logfire
+from fasta2a import FastA2A
+
 from cores import constants
+from cores.agent_pool import AgentPool
+from cores.rpc_logging import RpcLoggingMiddleware
 from cores.settings import SETTINGS
 from cores.storages import initialize_milvus
+from cores.task_store import build_task_storage
+from cores.warmup import Warmup, warm_agent, warm_collection, warm_embedding_model, warm_llm_connection
+
+
+class A2AAppSpec(NamedTuple):
+    """agent 模組、A2A 服務名稱、說明與工具查詢的 Milvus 集合（預熱用）"""
+    module: str
+    name: str
+    description: str
+    collections: Tuple[str, ...] = ("faqs", "classification")
+
+
+A2A_APP_SPECS: Dict[str, A2AAppSpec] = {
+    "order_query_agent": A2AAppSpec("agents.order_query_agent", "order_query_service", "訂單資訊服務"),
+    "product_recommendation_agent": A2AAppSpec(
+        "agents.product_recommendation_agent", "product_recommendation_service", "商品建議服務", ("products",)),
+    "technical_support_agent": A2AAppSpec("agents.technical_support_agent", "technical_support_service", "技術支援服務"),
+    "policy_information_agent": A2AAppSpec(
+        "agents.policy_information_agent", "policy_information_service", "政策訊息服務"),
+    "payment_shipping_agent": A2AAppSpec("agents.payment_shipping_agent", "payment_shipping_service", "付款及配送服務"),
+    "human_escalation_agent": A2AAppSpec("agents.human_escalation_agent", "human_escalation_service", "真人客服"),
+    "inventory_management_agent": A2AAppSpec(
+        "agents.inventory_management_agent", "inventory_management_service", "庫存管理服務"),
+}
+
+_apps: Dict[str, FastA2A] = {}
+_milvus_initialized = False
+_milvus_lock = threading.Lock()
+
+
+def ensure_milvus():
+    """行程內只初始化一次 Milvus 客戶端與嵌入模型（多個 app 的 lifespan 會同時呼叫）"""
+    global _milvus_initialized
+    with _milvus_lock:
+        if not _milvus_initialized:
+            initialize_milvus()
+            _milvus_initialized = True
+
+
+def build_warmup(agent_name: str, agent) -> Warmup:
+    """嵌入模型、agent 使用的集合、LLM 連線與 agent 本身的預熱步驟"""
+    steps = []
+    if SETTINGS.WARMUP_ENABLED:
+        steps.append(("embedding", warm_embedding_model))
+        steps.extend((f"milvus:{name}", functools.partial(warm_collection, name))
+                     for name in A2A_APP_SPECS[agent_name].collections)
+        steps.append(("llm_connection", functools.partial(warm_llm_connection, agent.model)))
+        steps.append(("agent", functools.partial(warm_agent, agent)))
+    return Warmup(agent_name, steps)
+
+
+def build_a2a_app(agent_name: str) -> FastA2A:
+    """建立（或取得已建立的）agent A2A 應用程式；Milvus 與嵌入模型在 app 的 lifespan 才初始化"""
+    if agent_name in _apps:
+        return _apps[agent_name]
+
+    spec = A2A_APP_SPECS[agent_name]
+    agent = getattr(importlib.import_module(spec.module), agent_name)
+    storage = build_task_storage(agent_name)
+    pool = AgentPool(agent_name, agent, storage)
+    warmup = build_warmup(agent_name, agent)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        await asyncio.to_thread(ensure_milvus)
+        async with pool.lifespan(app):
+            warmup.start()
+            yield
+            await warmup.stop()
+
+    _apps[agent_name] = agent.to_a2a(
+        storage=storage,
+        broker=pool.broker,
+        lifespan=lifespan,
+        routes=pool.routes + warmup.routes,
+        name=spec.name,
+        url=constants.A2A_SERVICES[agent_name]["url"],
+        description=spec.description,
+        version="1.0.0"
+    )
+    _apps[agent_name].state.warmup = warmup
+    return _apps[agent_name]
+
+
+def instrument_a2a_app(app: FastA2A, agent_name: str) -> FastA2A:
+    """加上 logfire FastAPI instrumentation 與取樣的 RPC 請求記錄"""
+    logfire.instrument_fastapi(app)
+    app.add_middleware(RpcLoggingMiddleware, service_name=agent_name)
+    return app
+
 
-initialize_milvus()
-
-order_query_app = order_query_agent.to_a2a(
-    name="order_query_service",
-    url=constants.A2A_SERVICES['order_query_agent'],
-    description="訂單資訊服務",
-    version="1.0.0"
-)
-
-product_recommendation_app = product_recommendation_agent.to_a2a(
-    name="product_recommendation_service",
-    url=constants.A2A_SERVICES['product_recommendation_agent'],
-    description="商品建議服務",
-    version="1.0.0"
-)
-
-technical_support_app = technical_support_agent.to_a2a(
-    name="technical_support_service",
-    url=constants.A2A_SERVICES['technical_support_agent'],
-    description="技術支援服務",
-    version="1.0.0"
-)
-
-policy_information_app = policy_information_agent.to_a2a(
-    name="policy_information_service",
-    url=constants.A2A_SERVICES['policy_information_agent'],
-    description="政策訊息服務",
-    version="1.0.0"
-)
-
-payment_shipping_app = payment_shipping_agent.to_a2a(
-    name="payment_shipping_service",
-    url=constants.A2A_SERVICES['payment_shipping_agent'],
-    description="付款及配送服務",
-    version="1.0.0"
-)
-
-human_escalation_app = human_escalation_agent.to_a2a(
-    name="human_escalation_service",
-    url=constants.A2A_SERVICES['human_escalation_agent'],
-    description="真人客服",
-    version="1.0.0"
-)
-
-inventory_management_app = inventory_management_agent.to_a2a(
-    name="inventory_management_service",
-    url=constants.A2A_SERVICES['inventory_management_agent'],
-    description="庫存管理服務",
-    version="1.0.0"
-)
+def __getattr__(name: str) -> FastA2A:
+    """`order_query_app` 等模組屬性延遲建立"""
+    agent_name = name.removesuffix("_app") + "_agent"
+    if name.endswith("_app") and agent_name in A2A_APP_SPECS:
+        return build_a2a_app(agent_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
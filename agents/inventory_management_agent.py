@@ -1,25 +1,25 @@
 from pydantic_ai import Agent
 from pydantic_ai.tools import Tool
-from pydantic_ai.models.openai import OpenAIChatModel
 
-from cores.storages import generate_embedding, get_client
+from cores.llm import get_model
+from cores.storages import generate_embedding, get_client, search_two_phase
+from cores.tool_cache import cached_tool
 
-model = OpenAIChatModel("gpt-4.1", provider='openai')
+model = get_model("gpt-4.1")
 
 def get_related_faq(query_vector, faq_ids: list):
-    """根據查詢向量和FAQ ID列表搜尋相關FAQ"""
+    """根據查詢向量和FAQ ID列表搜尋相關FAQ（兩階段：先取 id 與分數，再只為命中的 FAQ 取回內容）"""
     if not faq_ids:
         return []
 
-    client = get_client()
-    results = client.search(
+    hits = search_two_phase(
         collection_name="faqs",
-        data=[query_vector],
-        filter=f"doc_id in {faq_ids}",
-        output_fields=["id", "doc_id", "doc_type", "title", "content", "metadata"],
+        query_vectors=[query_vector],
+        output_fields=["doc_id", "doc_type", "title", "content", "metadata"],
+        filter_expr=f"doc_id in {faq_ids}",
         limit=3
     )
-    return results
+    return [hits]
 
 
 def get_faq_by_ids():
@@ -36,6 +36,7 @@ def get_faq_by_ids():
     return faq_ids
 
 
+@cached_tool('inventory_management_agent', collections=['faqs', 'classification'])
 def process_data(data: str) -> str:
     """處理資料並返回相關FAQ信息"""
     try:
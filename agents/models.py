@@ -80,3 +80,13 @@ class OrderQueryInput(pydantic.BaseModel):
     user_id: Optional[str] = Field(None, description="用戶ID，格式如: u_123456")
     order_id: Optional[str] = Field(None, description="訂單ID，格式如: JTCG-202508-10001")
     original_message: str = Field(..., description="用戶的原始訊息")
+    cursor: Optional[str] = Field(None, description="分頁游標，查詢更早的訂單時帶入上次回傳的 next_cursor")
+
+
+class CompatibilityQuery(pydantic.BaseModel):
+    """商品相容性查詢輸入"""
+    sku: Optional[str] = Field(None, description="要確認的商品 SKU，如: JTCG-ARM-DUAL-PRO-32；未指定時列出所有相容商品")
+    screen_inch: Optional[float] = Field(None, description="螢幕尺寸（吋）")
+    vesa: Optional[str] = Field(None, description="螢幕 VESA 孔距，如: 100x100")
+    weight_kg: Optional[float] = Field(None, description="單一螢幕重量（公斤）")
+    desk_thickness_mm: Optional[float] = Field(None, description="桌板厚度（毫米）")
@@ -1,31 +1,32 @@
-import json
-import pathlib
 import re
 
 import logfire
 from pydantic_ai import Agent
 from pydantic_ai.tools import Tool
-from pydantic_ai.models.openai import OpenAIChatModel, OpenAIChatModelSettings
 
-from agents.models import Order, OrderQueryInput
-from cores.storages import get_client, generate_embedding
+from agents.models import OrderQueryInput
+from cores.llm import get_model
+from cores.order_repository import get_order_repository
+from cores.settings import SETTINGS
+from cores.storages import get_client, generate_embedding, search_two_phase
+from cores.tool_cache import cached_tool
+from utils.order_render import render_orders
 
-model = OpenAIChatModel("gpt-4.1", provider='openai')
+model = get_model("gpt-4.1")
 
 def get_related_faq(query_vector, faq_ids: list):
-    """根據查詢向量和FAQ ID列表搜尋相關FAQ"""
+    """根據查詢向量和FAQ ID列表搜尋相關FAQ（兩階段：先取 id 與分數，再只為命中的 FAQ 取回內容）"""
     if not faq_ids:
         return []
 
-    client = get_client()
-    results = client.search(
+    hits = search_two_phase(
         collection_name="faqs",
-        data=[query_vector],
-        filter=f"doc_id in {faq_ids}",
-        output_fields=["id", "doc_id", "doc_type", "title", "content", "metadata"],
+        query_vectors=[query_vector],
+        output_fields=["doc_id", "doc_type", "title", "content", "metadata"],
+        filter_expr=f"doc_id in {faq_ids}",
         limit=3
     )
-    return results
+    return [hits]
 
 
 def get_faq_by_ids():
@@ -42,6 +43,7 @@ def get_faq_by_ids():
     faq_ids = [result["faq_id"] for result in results if "faq_id" in result]
     return faq_ids
 
+@cached_tool('order_query_agent', collections=['faqs', 'classification'])
 @logfire.instrument('process_data')
 def process_data(data: str) -> str:
     """處理資料並返回相關FAQ信息"""
@@ -71,35 +73,23 @@ def process_data(data: str) -> str:
         raise
 
 
-def query_order_data():
-    '''TODO: it will be get information from DB
+async def query_order_data(user_id: str, order_id: str = None, question: str = "", cursor: str = None):
+    '''依 ORDER_BACKEND 自 orders.json 索引或 SQLite 查詢該用戶的訂單，輸出依問題精簡過的 JSON
     '''
-    order_path = pathlib.Path('dummy_data/orders.json')
-    orders = []
-
-    for user_id, user_data in json.load(order_path.open())['orders_db'].items():
-        for order_info in user_data["orders"]:
-            order = Order(
-                order_id=order_info["order_id"],
-                status=order_info["status"],
-                carrier=order_info.get("carrier"),
-                tracking=order_info.get("tracking"),
-                eta=order_info.get("eta"),
-                shipping_address=order_info["shipping_address"],
-                contact_phone=order_info["contact_phone"],
-                order_url=order_info["order_url"],
-                placed_at=order_info["placed_at"],
-                user_id=user_id,
-                items=order_info.get("items", [])
-            )
-            orders.append(order)
-
-    return json.dumps(
-        [order.model_dump() for order in orders],
-        default=str,
-        ensure_ascii=False,
-        indent=2
-    )
+    repository = get_order_repository()
+    offset = int(cursor) if cursor and cursor.isdigit() else 0
+    has_more = False
+    if order_id:
+        order = await repository.get_order(order_id, user_id=user_id)
+        orders = [order] if order else []
+    else:
+        # 多取一筆判斷是否還有下一頁
+        orders = await repository.list_user_orders(user_id, limit=SETTINGS.ORDER_PAGE_SIZE + 1, offset=offset)
+        has_more = len(orders) > SETTINGS.ORDER_PAGE_SIZE
+        orders = orders[:SETTINGS.ORDER_PAGE_SIZE]
+
+    return render_orders(orders, question, offset=offset, has_more=has_more,
+                         token_budget=SETTINGS.ORDER_TOOL_TOKEN_BUDGET)
 
 order_checker_agent = Agent(
     model,
@@ -109,7 +99,7 @@ order_checker_agent = Agent(
 
 
 @logfire.instrument('order-data')
-def order_data(data: OrderQueryInput) -> str:
+async def order_data(data: OrderQueryInput) -> str:
     # result = order_checker_agent.run_sync(data)
     # result = result.output
     logfire.info(f"agent data: {data}")
@@ -122,7 +112,7 @@ def order_data(data: OrderQueryInput) -> str:
     #     content += "- order_id 格式應為 e.g. JTCG-202508-12345\n"
     #     is_complete = False
     if is_complete:
-        return query_order_data()
+        return await query_order_data(data.user_id, data.order_id, data.original_message, data.cursor)
     return content + "提供以上資訊才可以為用戶查詢相關資料"
 
 
@@ -134,7 +124,9 @@ order_query_agent = Agent(
 **重要流程**:
 1. 收到任何訂單查詢時,**第一步務必**呼叫 order_data 工具來驗證用戶身份與取得訂單資料
 2. 如果 order_data 回傳驗證失敗訊息(包含「用戶必須提供」),直接將該訊息回覆給用戶
-3. 如果 order_data 回傳 JSON 格式的訂單資料,請解析並提供完整說明
+3. 如果 order_data 回傳 JSON 格式的訂單資料,請解析並提供完整說明；資料只含最近幾筆訂單，
+   若有 next_cursor 且用戶詢問更早的訂單,帶入 cursor 再次呼叫 order_data；
+   若有 truncated,表示訂單內容過長已截短(items_omitted 為未列出的品項數),請告知用戶完整內容可至 order_url 查看
 4. 如果用戶詢問 FAQ 相關問題,使用 process_data 工具搜尋相關資訊
 
 **嚴格遵守**:
@@ -1,11 +1,15 @@
 import logfire
 from pydantic_ai import Agent
 from pydantic_ai.tools import Tool
-from pydantic_ai.models.openai import OpenAIChatModel
 
-from cores.storages import get_client, generate_embedding
+from agents.models import CompatibilityQuery
+from cores.llm import get_model
+from cores.storages import get_client, generate_embedding, search_two_phase
+from cores.tool_cache import cached_tool
+from utils.compatibility import get_compatibility_table
+from utils.specs import build_spec_filter, extract_constraints
 
-model = OpenAIChatModel("gpt-4.1", provider='openai')
+model = get_model("gpt-4.1")
 
 # def get_related_faq(query_vector, faq_ids: list):
 #     """根據查詢向量和FAQ ID列表搜尋相關FAQ"""
@@ -38,39 +42,77 @@ model = OpenAIChatModel("gpt-4.1", provider='openai')
 #     return faq_ids
 
 
-def get_related_products(query_vector):
-    """根據查詢向量列表搜尋相關的 products 資訊"""
-    client = get_client()
-    results = client.search(
+def get_related_products(query_vector, filter_expr: str = ""):
+    """根據查詢向量列表搜尋相關的 products 資訊
+
+    先只取 id 與分數，再為命中的商品取回 payload，避免傳輸被捨棄的 specs 與相容性說明；
+    filter_expr 為規格預過濾條件，向量搜尋只在相容的 SKU 中進行
+    """
+    hits = search_two_phase(
         collection_name="products",
-        data=[query_vector],
-        output_fields=["id", "doc_id", "doc_type", "title", "content", "metadata"],
+        query_vectors=[query_vector],
+        output_fields=["doc_id", "doc_type", "title", "content", "metadata"],
+        filter_expr=filter_expr,
         limit=3
     )
-    return results
+    return [hits]
 
 
+@cached_tool('product_recommendation_agent', collections=['products'])
 @logfire.instrument('process_data')
 def process_data(data: str) -> str:
-    """處理資料並返回相關 Products 資訊"""
-    try:
-        query_vector = generate_embedding(data)
-        related_products = get_related_products(query_vector)
-        if not related_products:
-            return f"未找到與查詢相關的 Product 資訊。原始查詢：{data}"
-        hits = related_products[0] if related_products and len(related_products) > 0 else []
-        if not hits:
-            return f"未找到與查詢相關的 Product 資訊。原始查詢：{data}"
-        # 格式化返回結果
-        result_text = f"根據查詢「{data}」找到以下相關FAQ：\n\n"
-        for i, faq in enumerate(hits, 1):
-            title = faq.get("title", "未知標題")
-            content = faq.get("content", "無內容")
-            ref_url = faq.get("metadata", {}).get("url", "無參考連結")
-            result_text += f"{i}. {title}\n說明: {content}\n參考連結: {ref_url}\n"
-        return result_text
-    except Exception as e:
-        raise
+    """處理資料並返回相關 Products 資訊；規格過濾後沒有結果時退回不過濾的搜尋"""
+    query_vector = generate_embedding(data)
+    constraints = extract_constraints(data)
+    filter_expr = build_spec_filter(constraints)
+    if constraints:
+        logfire.info("商品規格預過濾", constraints=constraints)
+    hits = get_related_products(query_vector, filter_expr)[0]
+    if not hits and filter_expr:
+        # 規格欄位可為空，缺少該規格的商品會被過濾掉；退回一次不帶過濾條件的搜尋
+        logfire.warning("商品規格預過濾無結果，改用不過濾的搜尋", constraints=constraints)
+        hits = get_related_products(query_vector)[0]
+    if not hits:
+        return f"未找到與查詢相關的 Product 資訊。原始查詢：{data}"
+    # 格式化返回結果
+    result_text = f"根據查詢「{data}」找到以下相關FAQ：\n\n"
+    for i, faq in enumerate(hits, 1):
+        title = faq.get("title", "未知標題")
+        content = faq.get("content", "無內容")
+        ref_url = faq.get("metadata", {}).get("url", "無參考連結")
+        result_text += f"{i}. {title}\n說明: {content}\n參考連結: {ref_url}\n"
+    return result_text
+
+DIMENSION_LABELS = {"inch": "螢幕尺寸", "vesa": "VESA 孔距", "kg": "單臂承重", "desk_mm": "桌板厚度"}
+
+
+@logfire.instrument('check_compatibility')
+def check_compatibility(query: CompatibilityQuery) -> str:
+    """查詢相容性對照表，回答螢幕 / 桌板是否適用指定商品，或列出所有相容商品"""
+    table = get_compatibility_table()
+    if table is None:
+        return "相容性對照表尚未建立，請改用 process_data 查詢商品資訊"
+
+    requirements = dict(inch=query.screen_inch, vesa=query.vesa, kg=query.weight_kg, desk_mm=query.desk_thickness_mm)
+    if all(value is None for value in requirements.values()):
+        return "請提供螢幕尺寸、VESA 孔距、螢幕重量或桌板厚度其中至少一項"
+
+    if not query.sku:
+        skus = table.compatible_skus(**requirements)
+        if not skus:
+            return "未找到相容的產品"
+        return "相容的產品 SKU：" + "、".join(skus)
+
+    result = table.check(query.sku, **requirements)
+    if result is None:
+        return f"查無商品 {query.sku}"
+    lines = []
+    for dimension, fits in result.items():
+        status = "無此規格限制" if fits is None else ("相容" if fits else "不相容")
+        lines.append(f"- {DIMENSION_LABELS[dimension]}：{status}")
+    verdict = "不相容" if False in result.values() else "相容"
+    return f"{query.sku} 與您的需求{verdict}：\n" + "\n".join(lines)
+
 
 # 創建 pydantic-ai Agent
 product_recommendation_agent = Agent(
@@ -80,9 +122,12 @@ product_recommendation_agent = Agent(
 **嚴格只**依據 process_data 工具返回的內容。如果工具沒有找到相關或沒有匹配的資料，請**務必只回復「未找到相關產品」**，
 **禁止**自行推薦、推論或引入任何資料庫外的產品品牌、資訊或建議。只可以將 process_data 返回文本原樣呈現。
 
+用戶詢問螢幕尺寸 / VESA / 重量 / 桌板厚度是否適用某產品時，使用 check_compatibility 工具查詢，依結果回答。
+
 基於工具返回的資料提供準確、完整的政策說明，不要編造或臆測任何資訊。
 如果工具沒有返回相關資料，請告知用戶無法找到相關政策資訊。
 ''',
-    tools=[Tool(process_data, name='process_data')],
+    tools=[Tool(process_data, name='process_data'),
+           Tool(check_compatibility, name='check_compatibility')],
     instrument=True,
 )
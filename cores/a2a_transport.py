@@ -0,0 +1,166 @@
+"""
+A2A 傳輸層
+orchestrator 呼叫 agent 時的 send_message → get_task 輪詢流程與傳輸方式分離：
+- HttpA2ATransport：JSON-RPC over HTTP，呼叫遠端（或另一個行程）的 A2A 服務
+- InProcessA2ATransport：同一行程內直接呼叫 agent app 的 TaskManager，省去序列化與 localhost 往返
+兩者的 message / task 結構相同，各服務使用哪一種由 cores.constants.A2A_SERVICES 的 transport 決定
+"""
+import abc
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import httpx
+import logfire
+
+from cores import constants
+from cores.settings import SETTINGS
+
+TERMINAL_STATES = ("completed", "failed", "canceled", "rejected")
+
+_call_histogram = logfire.metric_histogram(
+    "a2a.call_duration", unit="s", description="A2A 呼叫（送出到任務結束）耗時，依 service 與 transport 區分")
+
+
+def build_message(service: str, text: str) -> Dict[str, Any]:
+    """建立送往 agent 的使用者訊息（fasta2a.schema.Message）"""
+    return {
+        "role": "user",
+        "kind": "message",
+        "message_id": f"msg_{service}_{uuid.uuid4().hex[:8]}",
+        "parts": [{"kind": "text", "text": text}],
+    }
+
+
+class A2ATransport(abc.ABC):
+    """A2A 傳輸基底類別；子類別實作 send_message / get_task，回傳 JSON-RPC response"""
+    name = ""
+
+    def __init__(self, service: str, poll_interval: float):
+        self.service = service
+        self.poll_interval = poll_interval
+
+    @abc.abstractmethod
+    async def send_message(self, message: Dict[str, Any], configuration: Dict[str, Any]) -> Dict[str, Any]:
+        """送出 message/send，回傳 JSON-RPC response"""
+
+    @abc.abstractmethod
+    async def get_task(self, task_id: str) -> Dict[str, Any]:
+        """送出 tasks/get，回傳 JSON-RPC response"""
+
+    async def close(self):
+        """釋放資源"""
+
+    async def run(self, text: str, timeout: float = 60 * 5) -> Dict[str, Any]:
+        """送出訊息並輪詢到任務結束；逾時則回傳最後一次取得的任務狀態"""
+        started_at = time.perf_counter()
+        configuration = {"accepted_output_modes": ["text/plain", "application/json"], "blocking": False}
+        task_status = await self.send_message(build_message(self.service, text), configuration)
+        try:
+            async with asyncio.timeout(timeout):
+                if task_id := task_status["result"]["id"]:
+                    while task_status["result"]["status"]["state"] not in TERMINAL_STATES:
+                        await asyncio.sleep(self.poll_interval)
+                        task_status = await self.get_task(task_id)
+                        logfire.debug("A2A get task route", task_status=task_status, transport=self.name)
+        except asyncio.TimeoutError:
+            logfire.error("A2A get task timeout", service=self.service, transport=self.name)
+        _call_histogram.record(time.perf_counter() - started_at, {"service": self.service, "transport": self.name})
+        return task_status
+
+
+class HttpA2ATransport(A2ATransport):
+    """透過 HTTP 呼叫 A2A 服務，同一服務重複使用連線"""
+    name = "http"
+
+    def __init__(self, service: str, url: str, poll_interval: float = None, timeout: httpx.Timeout = None):
+        from fasta2a.client import A2AClient
+
+        super().__init__(service, SETTINGS.A2A_POLL_INTERVAL if poll_interval is None else poll_interval)
+        self.http_client = httpx.AsyncClient(timeout=timeout or httpx.Timeout(connect=10, read=60 * 2, write=10, pool=10))
+        self.client = A2AClient(base_url=url, http_client=self.http_client)
+
+    async def send_message(self, message: Dict[str, Any], configuration: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.client.send_message(message=message, configuration=configuration)
+
+    async def get_task(self, task_id: str) -> Dict[str, Any]:
+        return await self.client.get_task(task_id)
+
+    async def close(self):
+        await self.http_client.aclose()
+
+
+class InProcessA2ATransport(A2ATransport):
+    """在同一行程內呼叫 agent 的 A2A app（TaskManager / broker / worker），不經過 HTTP"""
+    name = "inprocess"
+
+    def __init__(self, service: str, app=None, poll_interval: float = 0.01):
+        super().__init__(service, poll_interval)
+        self.app = app
+        self._ready: Optional[asyncio.Event] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._lifespan_task: Optional[asyncio.Task] = None
+
+    async def _run_lifespan(self):
+        # lifespan 內含 anyio task group，進入與離開必須在同一個 task
+        async with self.app.router.lifespan_context(self.app):
+            self._ready.set()
+            await self._stop.wait()
+
+    async def start(self):
+        """建立 agent app 並執行其 lifespan（broker、worker）"""
+        if self._lifespan_task is None:
+            if self.app is None:
+                from agents.a2a_apps import build_a2a_app
+                self.app = build_a2a_app(self.service)
+            self._ready, self._stop = asyncio.Event(), asyncio.Event()
+            self._lifespan_task = asyncio.create_task(self._run_lifespan())
+        ready = asyncio.create_task(self._ready.wait())
+        await asyncio.wait([ready, self._lifespan_task], return_when=asyncio.FIRST_COMPLETED)
+        if not ready.done():
+            ready.cancel()
+            task, self._lifespan_task = self._lifespan_task, None
+            task.result()
+
+    async def send_message(self, message: Dict[str, Any], configuration: Dict[str, Any]) -> Dict[str, Any]:
+        await self.start()
+        return await self.app.task_manager.send_message({
+            "jsonrpc": "2.0",
+            "id": str(uuid.uuid4()),
+            "method": "message/send",
+            "params": {"message": message, "configuration": configuration},
+        })
+
+    async def get_task(self, task_id: str) -> Dict[str, Any]:
+        return await self.app.task_manager.get_task({
+            "jsonrpc": "2.0", "id": None, "method": "tasks/get", "params": {"id": task_id}
+        })
+
+    async def close(self):
+        if self._lifespan_task is not None:
+            self._stop.set()
+            await self._lifespan_task
+            self._lifespan_task = None
+
+
+_transports: Dict[str, A2ATransport] = {}
+
+
+def get_transport(service: str) -> A2ATransport:
+    """依 A2A_SERVICES 設定取得（並快取）服務的傳輸方式"""
+    if service not in _transports:
+        config = constants.A2A_SERVICES[service]
+        if config["transport"] == "inprocess":
+            _transports[service] = InProcessA2ATransport(service)
+        else:
+            _transports[service] = HttpA2ATransport(service, config["url"])
+        logfire.info(f"A2A 服務 {service} 使用 {_transports[service].name} 傳輸")
+    return _transports[service]
+
+
+async def close_transports():
+    """關閉所有傳輸（HTTP 連線、in-process agent 的 worker）"""
+    while _transports:
+        _, transport = _transports.popitem()
+        await transport.close()
@@ -0,0 +1,156 @@
+"""
+agent 任務併發控制
+fasta2a 預設的 InMemoryBroker 沒有佇列上限，突發流量會讓呼叫端一直等下去。
+AgentPool 讓每個 agent 有固定數量的 worker 與有界的任務佇列：
+- 佇列已滿時任務直接標為 rejected，呼叫端立刻得到結果，可以改走其他路徑或請使用者稍後再試
+- 回報佇列深度、等待時間、執行中任務數與拒絕次數；GET /load 提供目前負載
+BoundedBroker / PooledAgentWorker 沿用 fasta2a 與 pydantic_ai._a2a 的私有實作（_RunTask、_loop、_handle_task_operation），
+pyproject.toml 限制了這兩個套件的版本上限，tests/test_agent_pool.py::TestPrivateInternals 在實作改變時會失敗
+"""
+import contextlib
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, NamedTuple
+
+import anyio
+import logfire
+from fasta2a.broker import InMemoryBroker, _RunTask
+from fasta2a.storage import Storage
+from opentelemetry.trace import get_current_span
+from pydantic_ai._a2a import AgentWorker
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from cores.settings import SETTINGS
+
+_queue_gauge = logfire.metric_gauge("a2a.queue.depth", unit="1", description="agent 任務佇列中等待的任務數")
+_running_gauge = logfire.metric_gauge("a2a.queue.running", unit="1", description="agent 執行中的任務數")
+_wait_histogram = logfire.metric_histogram("a2a.queue.wait", unit="s", description="任務在佇列中等待 worker 的時間")
+_rejected_counter = logfire.metric_counter("a2a.queue.rejected", unit="1", description="佇列已滿而拒絕的任務數")
+
+
+class AgentLimits(NamedTuple):
+    """agent 的 worker 數與佇列長度"""
+    concurrency: int
+    queue_size: int
+
+
+def parse_agent_limits(spec: str) -> Dict[str, AgentLimits]:
+    """"product_recommendation_agent:8:64,order_query_agent:2" → 各 agent 的 AgentLimits；未指定佇列長度時用預設值"""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        agent_name, _, rest = item.strip().partition(":")
+        concurrency, _, queue_size = rest.partition(":")
+        if not concurrency:
+            raise ValueError(f"無效的 agent 併發設定: {item!r}")
+        limits[agent_name] = AgentLimits(int(concurrency), int(queue_size) if queue_size else SETTINGS.A2A_TASK_QUEUE_SIZE)
+    return limits
+
+
+def get_agent_limits(agent_name: str) -> AgentLimits:
+    """A2A_AGENT_LIMITS 中的設定，未設定的 agent 使用 A2A_WORKER_CONCURRENCY / A2A_TASK_QUEUE_SIZE"""
+    default = AgentLimits(SETTINGS.A2A_WORKER_CONCURRENCY, SETTINGS.A2A_TASK_QUEUE_SIZE)
+    return parse_agent_limits(SETTINGS.A2A_AGENT_LIMITS).get(agent_name, default)
+
+
+class BoundedBroker(InMemoryBroker):
+    """有界佇列的 broker；佇列已滿時不等待，直接把任務標為 rejected"""
+
+    def __init__(self, agent: str, storage: Storage, queue_size: int):
+        self.agent = agent
+        self.storage = storage
+        self.queue_size = queue_size
+        self._enqueued_at: Dict[str, float] = {}
+
+    async def __aenter__(self):
+        self.aexit_stack = contextlib.AsyncExitStack()
+        await self.aexit_stack.__aenter__()
+        self._write_stream, self._read_stream = anyio.create_memory_object_stream(max_buffer_size=self.queue_size)
+        await self.aexit_stack.enter_async_context(self._read_stream)
+        await self.aexit_stack.enter_async_context(self._write_stream)
+        return self
+
+    @property
+    def depth(self) -> int:
+        if not hasattr(self, "_write_stream"):
+            return 0
+        return self._write_stream.statistics().current_buffer_used
+
+    async def run_task(self, params) -> None:
+        self._enqueued_at[params["id"]] = time.monotonic()
+        try:
+            self._write_stream.send_nowait(_RunTask(operation="run", params=params, _current_span=get_current_span()))
+        except anyio.WouldBlock:
+            del self._enqueued_at[params["id"]]
+            await self.storage.update_task(params["id"], state="rejected")
+            _rejected_counter.add(1, {"agent": self.agent})
+            logfire.warning(f"{self.agent} 任務佇列已滿，拒絕任務", task_id=params["id"], queue_size=self.queue_size)
+            return
+        _queue_gauge.set(self.depth, {"agent": self.agent})
+
+    async def receive_task_operations(self) -> AsyncIterator[Any]:
+        async for task_operation in self._read_stream:
+            if task_operation["operation"] == "run":
+                enqueued_at = self._enqueued_at.pop(task_operation["params"]["id"], None)
+                if enqueued_at is not None:
+                    _wait_histogram.record(time.monotonic() - enqueued_at, {"agent": self.agent})
+                _queue_gauge.set(self.depth, {"agent": self.agent})
+            yield task_operation
+
+
+@dataclass
+class PooledAgentWorker(AgentWorker):
+    """同時從 broker 取 concurrency 個任務執行的 AgentWorker"""
+    concurrency: int = 1
+    running: int = 0
+
+    @contextlib.asynccontextmanager
+    async def run(self) -> AsyncIterator[None]:
+        async with anyio.create_task_group() as tg:
+            for _ in range(self.concurrency):
+                tg.start_soon(self._loop)
+            yield
+            tg.cancel_scope.cancel()
+
+    async def _handle_task_operation(self, task_operation) -> None:
+        agent_name = self.broker.agent
+        self.running += 1
+        _running_gauge.set(self.running, {"agent": agent_name})
+        try:
+            await super()._handle_task_operation(task_operation)
+        finally:
+            self.running -= 1
+            _running_gauge.set(self.running, {"agent": agent_name})
+
+
+class AgentPool:
+    """agent A2A app 的 broker、worker 與 lifespan"""
+
+    def __init__(self, agent_name: str, agent, storage: Storage, limits: AgentLimits = None):
+        self.agent_name = agent_name
+        self.agent = agent
+        self.limits = limits or get_agent_limits(agent_name)
+        self.broker = BoundedBroker(agent_name, storage, self.limits.queue_size)
+        self.worker = PooledAgentWorker(agent=agent, broker=self.broker, storage=storage,
+                                        concurrency=self.limits.concurrency)
+        self.routes = [Route("/load", self.load_endpoint, methods=["GET"])]
+
+    @contextlib.asynccontextmanager
+    async def lifespan(self, app) -> AsyncIterator[None]:
+        async with app.task_manager, self.agent:
+            async with self.worker.run():
+                yield
+
+    def load(self) -> Dict[str, int]:
+        return {
+            "running": self.worker.running,
+            "concurrency": self.limits.concurrency,
+            "queue_depth": self.broker.depth,
+            "queue_size": self.limits.queue_size,
+        }
+
+    async def load_endpoint(self, request: Request) -> JSONResponse:
+        return JSONResponse(self.load())
@@ -1,11 +1,22 @@
 from cores.settings import SETTINGS
 
+A2A_SERVICE_PORTS = {
+    "order_query_agent": 8001,
+    "product_recommendation_agent": 8002,
+    "technical_support_agent": 8003,
+    "policy_information_agent": 8004,
+    "payment_shipping_agent": 8005,
+    "human_escalation_agent": 8006,
+    "inventory_management_agent": 8007,
+}
+
+# A2A_INPROCESS_SERVICES：逗號分隔的 agent 名稱，或 "all"；其餘服務走 HTTP
+_INPROCESS_SERVICES = {name.strip() for name in SETTINGS.A2A_INPROCESS_SERVICES.split(",") if name.strip()}
+
 A2A_SERVICES = {
-    "order_query_agent": f"{SETTINGS.AGENT_URL}:8001",
-    "product_recommendation_agent": f"{SETTINGS.AGENT_URL}:8002",
-    "technical_support_agent": f"{SETTINGS.AGENT_URL}:8003",
-    "policy_information_agent": f"{SETTINGS.AGENT_URL}:8004",
-    "payment_shipping_agent": f"{SETTINGS.AGENT_URL}:8005",
-    "human_escalation_agent": f"{SETTINGS.AGENT_URL}:8006",
-    "inventory_management_agent": f"{SETTINGS.AGENT_URL}:8007",
+    agent_name: {
+        "url": f"{SETTINGS.AGENT_URL}:{port}",
+        "transport": "inprocess" if {"all", agent_name} & _INPROCESS_SERVICES else "http",
+    }
+    for agent_name, port in A2A_SERVICE_PORTS.items()
 }
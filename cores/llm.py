@@ -0,0 +1,203 @@
+"""
+LLM model 工廠
+agent 模組在匯入時只取得 LazyModel，實際的 provider（HTTP client、API key 檢查）在第一次請求時才建立，
+匯入 agent、orchestrator 或執行單元測試不再建立連線。
+同一行程內所有 model 共用一個 keep-alive 的 httpx.AsyncClient（連線池大小、HTTP/2 由 LLM_* 設定），
+並記錄連線重用與請求延遲。每個 model 都包在 ScheduledModel 裡，由行程內共用的排程器控管額度與重試；
+LLM_CACHE_MODE 開啟時外層再包一層 CachedModel
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+import logfire
+from pydantic_ai.models import Model
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.profiles import ModelProfile
+
+from cores.settings import SETTINGS
+
+DEFAULT_MODEL = "gpt-4.1"
+
+_request_histogram = logfire.metric_histogram(
+    "llm.http.request_duration", unit="s", description="LLM provider 請求到收到回應標頭的時間，依 status 與是否重用連線區分")
+
+
+class LazyModel(WrapperModel):
+    """第一次使用時才以 factory 建立被包裝的 model"""
+
+    def __init__(self, factory: Callable[[], Model], model_name: str, system: str = "openai",
+                 profile: Optional[ModelProfile] = None):
+        self._wrapped: Optional[Model] = None
+        self._factory = factory
+        self._model_name = model_name
+        self._system = system
+        self._profile_hint = profile
+        self._lock = threading.Lock()
+        Model.__init__(self)
+
+    @property
+    def wrapped(self) -> Model:
+        if self._wrapped is None:
+            with self._lock:
+                if self._wrapped is None:
+                    self._wrapped = self._factory()
+        return self._wrapped
+
+    def reset(self):
+        """丟棄已建立的 model，下次使用時重新建立（例如共用的 HTTP client 已關閉）"""
+        with self._lock:
+            self._wrapped = None
+
+    @property
+    def profile(self) -> ModelProfile:
+        # 部分 pydantic_ai 版本在 Agent() 建構時就讀取 profile；尚未建立時用預先給定的 profile，不觸發 factory
+        if self._wrapped is None and self._profile_hint is not None:
+            return self._profile_hint
+        return self.wrapped.profile
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    @property
+    def system(self) -> str:
+        return self._system
+
+    def __repr__(self) -> str:
+        return f"LazyModel({self._system}:{self._model_name}, built={self._wrapped is not None})"
+
+
+class HttpClientStats:
+    """共用 HTTP client 的連線重用與請求延遲統計"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float, new_connection: bool):
+        self.requests += 1
+        self.new_connections += new_connection
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        reused = self.requests - self.new_connections
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / self.requests, 4) if self.requests else None,
+            "mean_ms": round(self.total_seconds / self.requests * 1000, 2) if self.requests else None,
+            "max_ms": round(self.max_seconds * 1000, 2),
+        }
+
+
+http_stats = HttpClientStats()
+
+
+async def _on_request(request: httpx.Request):
+    """以 httpcore 的 trace 擴充判斷這次請求是否建立了新連線"""
+    state = {"started_at": time.perf_counter(), "new_connection": False}
+
+    async def trace(event_name: str, info: Dict[str, Any]):
+        if event_name.startswith(("connection.connect_tcp.", "connection.connect_unix_socket.")):
+            state["new_connection"] = True
+
+    request.extensions["trace"] = trace
+    request.extensions["llm_stats"] = state
+
+
+async def _on_response(response: httpx.Response):
+    state = response.request.extensions.get("llm_stats")
+    if state is None:
+        return
+    seconds = time.perf_counter() - state["started_at"]
+    http_stats.record(seconds, state["new_connection"])
+    _request_histogram.record(seconds, {"status": response.status_code, "reused": not state["new_connection"]})
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logfire.warning("LLM_HTTP2 已開啟但未安裝 h2（pip install 'httpx[http2]'），改用 HTTP/1.1")
+        return False
+    return True
+
+
+def build_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """依 LLM_* 設定建立 keep-alive 的 httpx.AsyncClient，並掛上統計用的 event hooks"""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(SETTINGS.LLM_TIMEOUT, connect=SETTINGS.LLM_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=SETTINGS.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=SETTINGS.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=SETTINGS.LLM_KEEPALIVE_EXPIRY,
+        ),
+        http2=bool(SETTINGS.LLM_HTTP2) and transport is None and _http2_available(),
+        transport=transport,
+        event_hooks={"request": [_on_request], "response": [_on_response]},
+    )
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """取得行程內共用的 LLM HTTP client；關閉後再取用會重新建立"""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = build_http_client()
+        return _http_client
+
+
+async def close_http_client():
+    """關閉共用的 HTTP client（服務關閉時呼叫）；已建立的 model 下次使用時會改用新的 client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    for model in _models.values():
+        model.reset()
+
+
+def _openai_chat_model(model_name: str) -> Model:
+    from openai import AsyncOpenAI
+    from pydantic_ai.models.openai import OpenAIChatModel
+    from pydantic_ai.providers.openai import OpenAIProvider
+
+    from cores.llm_cache import CachedModel, get_llm_cache
+    from cores.llm_scheduler import ScheduledModel
+
+    cache = get_llm_cache()
+    api_key = SETTINGS.OPENAI_API_KEY or None
+    if api_key is None and cache is not None and cache.mode == "replay":
+        # replay 模式完全離線，不需要真的 API key
+        api_key = "replay-offline"
+    # 重試交給排程器（才能配合 RPM/TPM 額度與全域的 429 暫停），openai SDK 本身不重試
+    client = AsyncOpenAI(api_key=api_key, http_client=get_http_client(), max_retries=0)
+    model = ScheduledModel(OpenAIChatModel(model_name, provider=OpenAIProvider(openai_client=client)))
+    # 快取在排程器外層：命中時不佔用 RPM/TPM 額度
+    return model if cache is None else CachedModel(model, cache)
+
+
+_models: Dict[str, LazyModel] = {}
+
+
+def get_model(model_name: str = DEFAULT_MODEL) -> LazyModel:
+    """取得（並快取）OpenAI chat model；同名 model 共用同一個實例"""
+    if model_name not in _models:
+        from pydantic_ai.profiles.openai import openai_model_profile
+
+        _models[model_name] = LazyModel(lambda: _openai_chat_model(model_name), model_name,
+                                        profile=openai_model_profile(model_name))
+    return _models[model_name]
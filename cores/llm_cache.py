@@ -0,0 +1,227 @@
+"""
+LLM 回應快取
+以 (model, 完整訊息列表, 工具定義, model settings) 的雜湊為鍵，把 ModelResponse 存在 SQLite（多個行程可共用同一檔案）。
+LLM_CACHE_MODE：
+- off：不快取（預設）
+- on：先查快取，未命中才呼叫 LLM 並寫入，超過 LLM_CACHE_TTL 的項目視為未命中
+- record：一律呼叫 LLM 並覆寫快取，用來錄製評測或回歸測試的回應
+- replay：只讀快取且忽略 TTL，未命中直接拋出 LlmCacheMiss，可完全離線、結果固定地重跑
+訊息中的時間戳、run id、usage 等每次執行都不同的欄位不列入鍵
+"""
+import asyncio
+import contextlib
+import dataclasses
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import logfire
+from pydantic import TypeAdapter
+from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter, ModelResponse, ModelResponseStreamEvent
+from pydantic_ai.models import ModelRequestParameters, StreamedResponse
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.usage import RequestUsage
+
+from cores.settings import SETTINGS
+
+CACHE_MODES = ("off", "on", "record", "replay")
+
+_VOLATILE_KEYS = frozenset({"timestamp", "run_id", "conversation_id", "provider_response_id", "provider_details",
+                            "usage", "metadata"})
+
+_cache_counter = logfire.metric_counter(
+    "llm_cache.requests", unit="1", description="LLM 回應快取查詢次數，依 model 與 result（hit / miss）區分")
+_parameters_adapter = TypeAdapter(ModelRequestParameters)
+
+
+class LlmCacheMiss(LookupError):
+    """replay 模式下找不到錄製的回應"""
+
+
+def _strip_volatile(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in item.items() if key not in _VOLATILE_KEYS}
+
+
+def cache_key(model_name: str, messages: List[ModelMessage], model_settings,
+              model_request_parameters: ModelRequestParameters) -> str:
+    """model + 訊息 + 工具 + settings 的 sha256；只去除訊息與 part 層級的易變欄位，工具參數內容保持原樣"""
+    normalized_messages = [
+        {**_strip_volatile(message), "parts": [_strip_volatile(part) for part in message.get("parts", [])]}
+        for message in ModelMessagesTypeAdapter.dump_python(messages, mode="json")
+    ]
+    payload = {
+        "model": model_name,
+        "messages": normalized_messages,
+        "parameters": _parameters_adapter.dump_python(model_request_parameters, mode="json"),
+        "settings": model_settings or {},
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class LlmResponseCache:
+    """SQLite 回應快取與命中率統計"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS llm_cache (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        response TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path: str = None, ttl: float = None, mode: str = None):
+        self.path = path or SETTINGS.LLM_CACHE_PATH
+        self.ttl = ttl if ttl is not None else SETTINGS.LLM_CACHE_TTL
+        self.mode = mode or SETTINGS.LLM_CACHE_MODE
+        if self.mode not in CACHE_MODES:
+            raise ValueError(f"LLM_CACHE_MODE 必須是 {', '.join(CACHE_MODES)} 之一: {self.mode}")
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(self.SCHEMA)
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def _run(self, fn, *args):
+        def call():
+            with self._lock, self._connection:
+                return fn(self._connection, *args)
+        return await asyncio.to_thread(call)
+
+    def _record(self, model: str, result: str):
+        stats = self._stats.setdefault(model, {"hits": 0, "misses": 0})
+        stats["hits" if result == "hit" else "misses"] += 1
+        _cache_counter.add(1, {"model": model, "result": result})
+
+    async def get(self, model: str, key: str) -> Optional[ModelResponse]:
+        """依模式查詢快取；record 模式一律視為未命中，replay 模式忽略 TTL"""
+        if self.mode == "record":
+            self._record(model, "miss")
+            return None
+
+        def fetch(connection: sqlite3.Connection):
+            return connection.execute("SELECT created_at, response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+
+        row = await self._run(fetch)
+        fresh = row is not None and (self.mode == "replay" or not self.ttl or row[0] + self.ttl > time.time())
+        self._record(model, "hit" if fresh else "miss")
+        if not fresh:
+            if self.mode == "replay":
+                raise LlmCacheMiss(f"replay 模式下沒有 {model} 的錄製回應（key={key[:12]}），請先以 record 模式執行")
+            return None
+        return ModelMessagesTypeAdapter.validate_json(row[1])[0]
+
+    async def set(self, model: str, key: str, response: ModelResponse):
+        def write(connection: sqlite3.Connection):
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, created_at, response) VALUES (?, ?, ?, ?)",
+                (key, model, time.time(), ModelMessagesTypeAdapter.dump_json([response]).decode()),
+            )
+
+        await self._run(write)
+
+    def purge(self) -> int:
+        """刪除超過 TTL 的項目，回傳刪除筆數"""
+        if not self.ttl:
+            return 0
+        with self._lock, self._connection:
+            cursor = self._connection.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """每個 model 的命中次數與命中率"""
+        return {
+            model: {**counts, "hit_rate": round(counts["hits"] / (counts["hits"] + counts["misses"]), 4)}
+            for model, counts in self._stats.items()
+        }
+
+    def report(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "path": self.path, "models": self.stats()}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_cache: Optional[LlmResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LlmResponseCache]:
+    """取得行程內共用的回應快取；LLM_CACHE_MODE=off 時回傳 None"""
+    global _cache
+    if SETTINGS.LLM_CACHE_MODE == "off":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LlmResponseCache()
+        return _cache
+
+
+@dataclass
+class CachedStreamedResponse(StreamedResponse):
+    """以快取的完整回應充當串流：不送出任何事件，get() 直接回傳快取內容（各版本 pydantic_ai 都支援）"""
+    response: ModelResponse = None
+
+    async def _get_event_iterator(self) -> AsyncIterator[ModelResponseStreamEvent]:
+        return
+        yield
+
+    def get(self) -> ModelResponse:
+        return self.response
+
+    @property
+    def model_name(self) -> str:
+        return self.response.model_name or ""
+
+    @property
+    def provider_name(self) -> Optional[str]:
+        return self.response.provider_name
+
+    @property
+    def provider_url(self) -> Optional[str]:
+        return getattr(self.response, "provider_url", None)
+
+    @property
+    def timestamp(self) -> datetime:
+        return self.response.timestamp
+
+
+class CachedModel(WrapperModel):
+    """先查回應快取，未命中才呼叫被包裝的 model；命中時 usage 為 0，不計入實際用量"""
+
+    def __init__(self, wrapped, cache: LlmResponseCache):
+        super().__init__(wrapped)
+        self.cache = cache
+
+    def _key(self, messages, model_settings, model_request_parameters) -> str:
+        return cache_key(f"{self.system}:{self.model_name}", messages, model_settings, model_request_parameters)
+
+    async def request(self, messages, model_settings, model_request_parameters):
+        key = self._key(messages, model_settings, model_request_parameters)
+        cached = await self.cache.get(self.model_name, key)
+        if cached is not None:
+            return dataclasses.replace(cached, usage=RequestUsage())
+        response = await self.wrapped.request(messages, model_settings, model_request_parameters)
+        await self.cache.set(self.model_name, key, response)
+        return response
+
+    @contextlib.asynccontextmanager
+    async def request_stream(self, messages, model_settings, model_request_parameters, run_context=None):
+        key = self._key(messages, model_settings, model_request_parameters)
+        cached = await self.cache.get(self.model_name, key)
+        if cached is not None:
+            yield CachedStreamedResponse(model_request_parameters, dataclasses.replace(cached, usage=RequestUsage()))
+            return
+        async with self.wrapped.request_stream(
+                messages, model_settings, model_request_parameters, run_context) as response_stream:
+            yield response_stream
+        # 串流完整讀完後才寫入快取
+        await self.cache.set(self.model_name, key, response_stream.get())
@@ -0,0 +1,294 @@
+"""
+LLM 請求排程
+行程內所有 model 呼叫都經過同一個 LlmScheduler：依每分鐘請求數（LLM_RPM）與 token 數（LLM_TPM）放行，
+額度不足時依優先權排隊；遇到 408 / 409 / 429 / 5xx、連線錯誤或逾時（與 openai SDK 預設會重試的情況相同）
+以 jitter 的指數退避重試，有 Retry-After 時依它等待，
+429 期間整個排程器暫停放行，避免排隊中的請求繼續撞上限。排隊時間記錄在 llm.scheduler.queue_wait
+"""
+import asyncio
+import contextlib
+import heapq
+import itertools
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import logfire
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelMessagesTypeAdapter, ModelResponse
+from pydantic_ai.models.wrapper import WrapperModel
+
+from cores.settings import SETTINGS
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# 另外所有 5xx 都會重試
+RETRY_STATUSES = frozenset({408, 409, 429})
+
+_queue_wait_histogram = logfire.metric_histogram(
+    "llm.scheduler.queue_wait", unit="s", description="LLM 請求在排程器中等待額度的時間，依 priority 區分")
+_retry_counter = logfire.metric_counter(
+    "llm.scheduler.retries", unit="1", description="LLM 請求重試次數，依 status（HTTP 狀態碼、connection 或 timeout）區分")
+
+_priority: ContextVar[int] = ContextVar("llm_priority", default=PRIORITY_NORMAL)
+
+
+@contextlib.contextmanager
+def llm_priority(priority: int):
+    """在此區塊內發出的 model 呼叫使用指定的優先權（數字越小越優先）"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class LlmBusyError(Exception):
+    """重試用盡後仍被 provider 限流"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"LLM provider 限流中，{retry_after:.1f} 秒後再試")
+
+
+class TokenBucket:
+    """以每分鐘額度連續補充的 token bucket；額度為 0 表示不限制"""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated_at = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def delay(self, amount: float) -> float:
+        """還要等多久才有 amount 的額度；超過容量的請求只需等到 bucket 補滿"""
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return max(missing, 0.0) / self.rate
+
+    def consume(self, amount: float):
+        """扣除額度；實際用量高於預估時允許暫時為負，之後的請求會等待補回"""
+        if self.capacity:
+            self._refill()
+            self.tokens -= amount
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    event: asyncio.Event = field(compare=False, default_factory=asyncio.Event)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """從 openai 例外（ModelHTTPError 的 __cause__）的回應標頭讀出 retry-after-ms / retry-after"""
+    response = getattr(error.__cause__, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def retry_reason(error: BaseException) -> Optional[str]:
+    """可重試時回傳原因（HTTP 狀態碼、"timeout" 或 "connection"），否則回傳 None
+
+    openai SDK 的 max_retries=0，連線錯誤與逾時也要在這裡重試；依 pydantic_ai 版本不同，
+    它們可能直接拋出，或包成 ModelAPIError（原本的例外在 __cause__）
+    """
+    if isinstance(error, ModelHTTPError):
+        status = error.status_code
+        return str(status) if status in RETRY_STATUSES or status >= 500 else None
+    from openai import APIConnectionError, APITimeoutError
+
+    for candidate in (error, error.__cause__):
+        if isinstance(candidate, (APITimeoutError, httpx.TimeoutException)):
+            return "timeout"
+        if isinstance(candidate, (APIConnectionError, httpx.TransportError)):
+            return "connection"
+    return None
+
+
+def estimate_tokens(messages, model_settings) -> int:
+    """以序列化後的訊息長度粗估輸入 token（約 4 字元一個），加上輸出上限"""
+    prompt_tokens = len(ModelMessagesTypeAdapter.dump_json(messages)) // 4
+    return prompt_tokens + int((model_settings or {}).get("max_tokens") or 0)
+
+
+class LlmScheduler:
+    """行程內共用的 LLM 請求排程器"""
+
+    def __init__(
+            self,
+            rpm: float = 0,
+            tpm: float = 0,
+            max_retries: int = 4,
+            base_delay: float = 0.5,
+            max_delay: float = 30.0,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        self.requests = TokenBucket(rpm, clock)
+        self.tokens = TokenBucket(tpm, clock)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._sleep = sleep
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._blocked_until = 0.0
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "queue_wait_seconds": 0.0}
+
+    @classmethod
+    def from_settings(cls) -> "LlmScheduler":
+        return cls(
+            rpm=SETTINGS.LLM_RPM,
+            tpm=SETTINGS.LLM_TPM,
+            max_retries=SETTINGS.LLM_MAX_RETRIES,
+            base_delay=SETTINGS.LLM_RETRY_BASE_DELAY,
+            max_delay=SETTINGS.LLM_RETRY_MAX_DELAY,
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _delay(self, tokens: int) -> float:
+        return max(self._blocked_until - self._clock(), self.requests.delay(1), self.tokens.delay(tokens))
+
+    def _wake_head(self):
+        if self._waiters:
+            self._waiters[0].event.set()
+
+    async def acquire(self, tokens: int, priority: int = PRIORITY_NORMAL, seq: Optional[int] = None) -> float:
+        """排隊直到輪到自己且額度足夠，回傳等待秒數"""
+        waiter = _Waiter(priority, next(self._seq) if seq is None else seq, tokens)
+        heapq.heappush(self._waiters, waiter)
+        started_at = self._clock()
+        try:
+            while True:
+                delay = None
+                if self._waiters[0] is waiter:
+                    delay = self._delay(tokens)
+                    if delay <= 0:
+                        heapq.heappop(self._waiters)
+                        self.requests.consume(1)
+                        self.tokens.consume(tokens)
+                        break
+                waiter.event.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(waiter.event.wait(), delay)
+        except BaseException:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            raise
+        finally:
+            self._wake_head()
+        return self._clock() - started_at
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """有 Retry-After 時依它等待（加少量 jitter），否則為 full jitter 的指數退避"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def run(
+            self,
+            call: Callable[[], Awaitable[ModelResponse]],
+            tokens: int,
+            priority: int = PRIORITY_NORMAL,
+    ) -> ModelResponse:
+        """取得額度後執行 call，可重試的錯誤依退避策略重新排隊（保留原本的排隊順序）"""
+        seq = next(self._seq)
+        for attempt in itertools.count():
+            waited = await self.acquire(tokens, priority, seq)
+            self.stats["requests"] += 1
+            self.stats["queue_wait_seconds"] += waited
+            _queue_wait_histogram.record(waited, {"priority": priority})
+            try:
+                response = await call()
+            except Exception as e:
+                reason = retry_reason(e)
+                if reason is None:
+                    raise
+                retry_after = retry_after_seconds(e)
+                delay = self.backoff(attempt, retry_after)
+                if reason == "429":
+                    self.stats["rate_limited"] += 1
+                    self._blocked_until = max(self._blocked_until, self._clock() + delay)
+                if attempt >= self.max_retries:
+                    if reason == "429":
+                        raise LlmBusyError(retry_after or delay) from e
+                    raise
+                self.stats["retries"] += 1
+                _retry_counter.add(1, {"status": reason})
+                logfire.warning(f"LLM 請求失敗（{reason}），{delay:.2f} 秒後第 {attempt + 1} 次重試")
+                await self._sleep(delay)
+                continue
+
+            # 以實際用量修正預估，差額由後續請求的 TPM 額度吸收
+            usage = response.usage
+            actual = (usage.input_tokens or 0) + (usage.output_tokens or 0)
+            if actual:
+                self.tokens.consume(actual - tokens)
+            return response
+
+    def report(self) -> Dict[str, Any]:
+        return {**self.stats, "queue_depth": self.queue_depth, "blocked_for": max(self._blocked_until - self._clock(), 0.0)}
+
+
+_scheduler: Optional[LlmScheduler] = None
+
+
+def get_scheduler() -> LlmScheduler:
+    """取得行程內共用的排程器"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LlmScheduler.from_settings()
+    return _scheduler
+
+
+class ScheduledModel(WrapperModel):
+    """所有請求都經過排程器的 model"""
+
+    def __init__(self, wrapped, scheduler: Optional[LlmScheduler] = None):
+        super().__init__(wrapped)
+        self.scheduler = scheduler
+
+    async def request(self, messages, model_settings, model_request_parameters):
+        scheduler = self.scheduler or get_scheduler()
+        return await scheduler.run(
+            lambda: self.wrapped.request(messages, model_settings, model_request_parameters),
+            estimate_tokens(messages, model_settings),
+            _priority.get(),
+        )
+
+    @contextlib.asynccontextmanager
+    async def request_stream(self, messages, model_settings, model_request_parameters, run_context=None):
+        # 串流回應開始後無法安全重試，只排隊取得額度
+        scheduler = self.scheduler or get_scheduler()
+        waited = await scheduler.acquire(estimate_tokens(messages, model_settings), _priority.get())
+        _queue_wait_histogram.record(waited, {"priority": _priority.get()})
+        async with self.wrapped.request_stream(
+                messages, model_settings, model_request_parameters, run_context) as response_stream:
+            yield response_stream
@@ -0,0 +1,224 @@
+"""
+訂單資料存取層
+OrderRepository 定義非同步查詢介面；JsonOrderRepository 使用 orders.json 行程內索引，
+SqliteOrderRepository 使用 SQLite（WAL、連線池、user_id / order_id / status 索引），
+查詢在執行緒中執行，不阻塞 event loop
+"""
+import abc
+import asyncio
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+import logfire
+
+from agents.models import Order
+from cores.order_store import OrderStore, get_order_store
+from cores.settings import SETTINGS
+
+T = TypeVar("T")
+
+ORDER_COLUMNS = (
+    "order_id", "user_id", "status", "carrier", "tracking", "eta",
+    "shipping_address", "contact_phone", "order_url", "placed_at", "items",
+)
+
+
+def _to_column(column: str, value: Any) -> Any:
+    """欄位值轉為 SQLite 格式：items 存 JSON，日期存 ISO 8601 字串"""
+    if column == "items":
+        return json.dumps(value or [], ensure_ascii=False, default=str)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+class OrderRepository(abc.ABC):
+    """訂單查詢介面"""
+
+    @abc.abstractmethod
+    async def get_order(self, order_id: str, user_id: str = None) -> Optional[Order]:
+        """依訂單編號取得訂單；指定 user_id 時只回傳屬於該用戶的訂單"""
+
+    @abc.abstractmethod
+    async def list_user_orders(self, user_id: str, status: str = None,
+                               limit: int = 20, offset: int = 0) -> List[Order]:
+        """依下單時間新到舊分頁列出用戶訂單，可依狀態過濾"""
+
+    @abc.abstractmethod
+    async def count_user_orders(self, user_id: str, status: str = None) -> int:
+        """用戶訂單數"""
+
+    async def close(self):
+        """釋放資源"""
+
+
+class JsonOrderRepository(OrderRepository):
+    """以 orders.json 行程內索引實作的訂單查詢"""
+
+    def __init__(self, store: OrderStore = None):
+        self.store = store or get_order_store()
+
+    async def get_order(self, order_id: str, user_id: str = None) -> Optional[Order]:
+        return self.store.get_order(order_id, user_id=user_id)
+
+    def _filtered(self, user_id: str, status: str = None) -> List[Order]:
+        orders = self.store.get_user_orders(user_id)
+        if status:
+            orders = [order for order in orders if order.status == status]
+        return sorted(orders, key=lambda order: order.placed_at, reverse=True)
+
+    async def list_user_orders(self, user_id: str, status: str = None,
+                               limit: int = 20, offset: int = 0) -> List[Order]:
+        return self._filtered(user_id, status)[offset:offset + limit]
+
+    async def count_user_orders(self, user_id: str, status: str = None) -> int:
+        return len(self._filtered(user_id, status))
+
+
+class SqliteOrderRepository(OrderRepository):
+    """SQLite 訂單查詢：WAL 模式讓讀取不被寫入阻塞，固定大小連線池供執行緒共用"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS orders (
+        order_id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        status TEXT NOT NULL,
+        carrier TEXT,
+        tracking TEXT,
+        eta TEXT,
+        shipping_address TEXT NOT NULL,
+        contact_phone TEXT NOT NULL,
+        order_url TEXT NOT NULL,
+        placed_at TEXT NOT NULL,
+        items TEXT NOT NULL DEFAULT '[]'
+    );
+    CREATE INDEX IF NOT EXISTS idx_orders_user_placed ON orders (user_id, placed_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_orders_user_status ON orders (user_id, status, placed_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status);
+    """
+
+    def __init__(self, path: str = None, pool_size: int = None):
+        self.path = path or SETTINGS.ORDER_DB_PATH
+        self.pool_size = pool_size or SETTINGS.ORDER_DB_POOL_SIZE
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=self.pool_size)
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+        with self._lock:
+            for _ in range(self.pool_size):
+                connection = self._connect()
+                self._connections.append(connection)
+                self._pool.put(connection)
+        with self.connection() as connection:
+            connection.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA temp_store=MEMORY")
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """自連線池借出連線，用完歸還"""
+        connection = self._pool.get()
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+    async def _run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        def call():
+            with self.connection() as connection:
+                return fn(connection)
+        return await asyncio.to_thread(call)
+
+    @staticmethod
+    def _to_order(row: sqlite3.Row) -> Order:
+        values = dict(row)
+        values["items"] = json.loads(values["items"])
+        return Order(**values)
+
+    @staticmethod
+    def _where(user_id: str, status: str = None):
+        if status:
+            return "user_id = ? AND status = ?", (user_id, status)
+        return "user_id = ?", (user_id,)
+
+    async def get_order(self, order_id: str, user_id: str = None) -> Optional[Order]:
+        def fetch(connection: sqlite3.Connection):
+            return connection.execute("SELECT * FROM orders WHERE order_id = ?", (order_id,)).fetchone()
+
+        row = await self._run(fetch)
+        if row is None or (user_id is not None and row["user_id"] != user_id):
+            return None
+        return self._to_order(row)
+
+    async def list_user_orders(self, user_id: str, status: str = None,
+                               limit: int = 20, offset: int = 0) -> List[Order]:
+        where, params = self._where(user_id, status)
+
+        def fetch(connection: sqlite3.Connection):
+            return connection.execute(
+                f"SELECT * FROM orders WHERE {where} ORDER BY placed_at DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+
+        return [self._to_order(row) for row in await self._run(fetch)]
+
+    async def count_user_orders(self, user_id: str, status: str = None) -> int:
+        where, params = self._where(user_id, status)
+
+        def fetch(connection: sqlite3.Connection):
+            return connection.execute(f"SELECT COUNT(*) FROM orders WHERE {where}", params).fetchone()[0]
+
+        return await self._run(fetch)
+
+    def upsert_orders(self, orders: Iterable[Dict[str, Any]], batch_size: int = 5000) -> int:
+        """批次寫入訂單（Order.model_dump() 格式），回傳寫入筆數"""
+        sql = (f"INSERT OR REPLACE INTO orders ({', '.join(ORDER_COLUMNS)}) "
+               f"VALUES ({', '.join('?' * len(ORDER_COLUMNS))})")
+        total = 0
+        batch = []
+        with self.connection() as connection:
+            for order in orders:
+                batch.append(tuple(_to_column(column, order.get(column)) for column in ORDER_COLUMNS))
+                if len(batch) >= batch_size:
+                    with connection:
+                        connection.executemany(sql, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                with connection:
+                    connection.executemany(sql, batch)
+                total += len(batch)
+        logfire.info(f"訂單寫入 SQLite 完成: {self.path}", orders=total)
+        return total
+
+    async def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+
+
+_repository: Optional[OrderRepository] = None
+
+
+def get_order_repository() -> OrderRepository:
+    """依 ORDER_BACKEND（json / sqlite）取得共用的訂單查詢實作"""
+    global _repository
+    if _repository is None:
+        if SETTINGS.ORDER_BACKEND == "sqlite":
+            _repository = SqliteOrderRepository()
+        elif SETTINGS.ORDER_BACKEND == "json":
+            _repository = JsonOrderRepository()
+        else:
+            raise ValueError(f"未知的 ORDER_BACKEND: {SETTINGS.ORDER_BACKEND}")
+    return _repository
@@ -0,0 +1,88 @@
+"""
+訂單資料的行程內索引
+orders.json 只在第一次查詢或檔案修改時間變更時載入，並建立 user_id / order_id 雜湊索引；
+查詢時只為該用戶的訂單建立 Order 模型
+"""
+import json
+import os
+import pathlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import logfire
+
+from agents.models import Order
+from cores.settings import SETTINGS
+
+
+def to_order(user_id: str, order_info: Dict[str, Any]) -> Order:
+    """原始訂單資料轉換為 Order 模型"""
+    return Order(
+        order_id=order_info["order_id"],
+        status=order_info["status"],
+        carrier=order_info.get("carrier"),
+        tracking=order_info.get("tracking"),
+        eta=order_info.get("eta"),
+        shipping_address=order_info["shipping_address"],
+        contact_phone=order_info["contact_phone"],
+        order_url=order_info["order_url"],
+        placed_at=order_info["placed_at"],
+        user_id=user_id,
+        items=order_info.get("items", [])
+    )
+
+
+class OrderStore:
+    """以 user_id / order_id 索引的訂單資料，依檔案 mtime 自動重新載入"""
+
+    def __init__(self, path: str = None):
+        self.path = pathlib.Path(path or SETTINGS.ORDER_DATA_PATH)
+        self._mtime_ns: Optional[int] = None
+        self._by_user: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_order: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        if mtime_ns == self._mtime_ns:
+            return
+        with self._lock:
+            if mtime_ns == self._mtime_ns:
+                return
+            with self.path.open(encoding="utf-8") as f:
+                orders_db = json.load(f)["orders_db"]
+
+            by_user: Dict[str, List[Dict[str, Any]]] = {}
+            by_order: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+            for user_id, user_data in orders_db.items():
+                by_user[user_id] = user_data.get("orders", [])
+                for order_info in by_user[user_id]:
+                    by_order[order_info["order_id"]] = (user_id, order_info)
+
+            self._by_user, self._by_order = by_user, by_order
+            self._mtime_ns = mtime_ns
+            logfire.info(f"訂單資料已載入: {self.path}", users=len(by_user), orders=len(by_order))
+
+    def get_user_orders(self, user_id: str) -> List[Order]:
+        """取得用戶所有訂單"""
+        self._ensure_loaded()
+        return [to_order(user_id, order_info) for order_info in self._by_user.get(user_id, [])]
+
+    def get_order(self, order_id: str, user_id: str = None) -> Optional[Order]:
+        """依訂單編號取得訂單；指定 user_id 時只回傳屬於該用戶的訂單"""
+        self._ensure_loaded()
+        entry = self._by_order.get(order_id)
+        if entry is None or (user_id is not None and entry[0] != user_id):
+            return None
+        return to_order(*entry)
+
+
+_store: Optional[OrderStore] = None
+
+
+def get_order_store() -> OrderStore:
+    """取得共用的訂單索引"""
+    global _store
+    if _store is None:
+        _store = OrderStore()
+    return _store
@@ -0,0 +1,127 @@
+"""
+A2A JSON-RPC 請求記錄
+ASGI middleware：依取樣率決定是否記錄，未取樣的請求不包裝 receive、零額外成本；
+取樣的請求在下游讀取 body 時順便保留前 max_body_bytes（不重複緩衝整個 body），
+回應後依 method 白名單過濾，遮蔽敏感欄位，並遮蔽所有字串值（包括 message parts 的 text）中的電話與 email 再送 logfire
+"""
+import json
+import random
+import re
+from typing import Any, FrozenSet, NamedTuple
+
+import logfire
+
+from cores.settings import SETTINGS
+
+_METHOD_PATTERN = re.compile(rb'"method"\s*:\s*"([^"]+)"')
+REDACTED = "[REDACTED]"
+# 台灣手機、市話（可含 +886、空白或 -）與 email；前後不可緊接英數字或 -，避免誤遮訂單編號、追蹤碼。
+# ASCII 模式下中文字不算 \w；截斷的原始 body 中中文可能是 \uXXXX 跳脫，緊接其後也視為邊界
+_BOUNDARY = r"(?:(?<![\w-])|(?<=\\u[0-9a-fA-F]{4}))"
+PII_PATTERNS = (
+    re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+", re.ASCII),
+    re.compile(_BOUNDARY + r"(?:\+886[\s-]?|0)9\d{2}[\s-]?\d{3}[\s-]?\d{3}(?![\w-])", re.ASCII),
+    re.compile(_BOUNDARY + r"(?:\+886[\s-]?|0)[2-8]\d?[\s-]?\d{3,4}[\s-]?\d{4}(?![\w-])", re.ASCII),
+)
+
+
+def _split(value: str) -> FrozenSet[str]:
+    return frozenset(item.strip() for item in value.split(",") if item.strip())
+
+
+class RpcLogPolicy(NamedTuple):
+    """RPC 記錄策略；methods 為空時記錄所有 method"""
+    sample_rate: float = 1.0
+    methods: FrozenSet[str] = frozenset()
+    max_body_bytes: int = 2048
+    redact_keys: FrozenSet[str] = frozenset()
+    mask_pii: bool = True
+
+    @classmethod
+    def from_settings(cls) -> "RpcLogPolicy":
+        return cls(
+            sample_rate=SETTINGS.A2A_RPC_LOG_SAMPLE_RATE,
+            methods=_split(SETTINGS.A2A_RPC_LOG_METHODS),
+            max_body_bytes=SETTINGS.A2A_RPC_LOG_MAX_BODY_BYTES,
+            redact_keys=_split(SETTINGS.A2A_RPC_LOG_REDACT_KEYS),
+            mask_pii=SETTINGS.A2A_RPC_LOG_MASK_PII,
+        )
+
+
+def mask_pii(text: str) -> str:
+    """遮蔽字串中的電話與 email"""
+    for pattern in PII_PATTERNS:
+        text = pattern.sub(REDACTED, text)
+    return text
+
+
+def redact(value: Any, keys: FrozenSet[str], mask: bool = True) -> Any:
+    """遞迴遮蔽 dict 中指定鍵的值；mask 時一併遮蔽所有字串值中的電話與 email（使用者訊息多半是自由文字）"""
+    if isinstance(value, dict):
+        return {key: REDACTED if key in keys else redact(item, keys, mask) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item, keys, mask) for item in value]
+    if mask and isinstance(value, str):
+        return mask_pii(value)
+    return value
+
+
+def redact_text(text: str, keys: FrozenSet[str], mask: bool = True) -> str:
+    """截斷、無法解析的 JSON 以字串比對遮蔽 "key": "value"，mask 時再遮蔽電話與 email"""
+    for key in keys:
+        text = re.sub(rf'("{re.escape(key)}"\s*:\s*)"[^"]*"?', rf'\1"{REDACTED}"', text)
+    return mask_pii(text) if mask else text
+
+
+class RpcLoggingMiddleware:
+    """依 RpcLogPolicy 取樣記錄 A2A 服務收到的 JSON-RPC 請求"""
+
+    def __init__(self, app, service_name: str, policy: RpcLogPolicy = None):
+        self.app = app
+        self.service_name = service_name
+        self.policy = policy or RpcLogPolicy.from_settings()
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] != "POST"
+                or not self.policy.sample_rate or random.random() >= self.policy.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        captured = bytearray()
+        truncated = False
+
+        async def capture_receive():
+            nonlocal truncated
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                room = self.policy.max_body_bytes - len(captured)
+                captured.extend(body[:max(room, 0)])
+                truncated = truncated or len(body) > room
+            return message
+
+        try:
+            await self.app(scope, capture_receive, send)
+        finally:
+            self.log(bytes(captured), truncated, scope)
+
+    def log(self, body: bytes, truncated: bool, scope):
+        match = _METHOD_PATTERN.search(body)
+        method = match.group(1).decode() if match else None
+        if self.policy.methods and method not in self.policy.methods:
+            return
+
+        keys, mask = self.policy.redact_keys, self.policy.mask_pii
+        if truncated:
+            logged_body = redact_text(body.decode(errors="replace"), keys, mask)
+        else:
+            try:
+                logged_body = redact(json.loads(body), keys, mask) if body else None
+            except ValueError:
+                logged_body = redact_text(body.decode(errors="replace"), keys, mask)
+        logfire.info(f"{self.service_name} RPC Request",
+                     rpc_method=method,
+                     path=scope.get("path"),
+                     body=logged_body,
+                     truncated=truncated,
+                     service=self.service_name)
@@ -0,0 +1,145 @@
+"""
+Milvus 集合的宣告式 schema
+每個集合明確定義欄位型別、VARCHAR 長度、過濾欄位的純量索引，以及向量索引的建置 / 搜尋參數
+"""
+from typing import Any, Dict, List, Literal, Optional
+
+import pydantic
+from pydantic import Field
+
+EMBEDDING_DIMENSION = 384
+
+
+class FieldSpec(pydantic.BaseModel):
+    """單一欄位定義"""
+    name: str
+    dtype: Literal["BOOL", "INT32", "INT64", "FLOAT", "DOUBLE", "VARCHAR", "JSON", "ARRAY", "FLOAT_VECTOR"]
+    is_primary: bool = False
+    max_length: Optional[int] = Field(None, description="VARCHAR 最大長度（位元組）")
+    dim: Optional[int] = Field(None, description="向量維度")
+    element_type: Optional[str] = Field(None, description="ARRAY 元素型別")
+    max_capacity: Optional[int] = Field(None, description="ARRAY 最大元素數")
+    nullable: bool = False
+    default_value: Optional[Any] = None
+
+
+class ScalarIndexSpec(pydantic.BaseModel):
+    """純量欄位索引，用於 filter 表達式"""
+    field: str
+    index_type: str = "INVERTED"
+
+
+class VectorIndexSpec(pydantic.BaseModel):
+    """向量索引與搜尋參數"""
+    field: str = "vector"
+    index_type: str = "HNSW"
+    metric_type: str = "COSINE"
+    build_params: Dict[str, Any] = Field(default_factory=lambda: {"M": 16, "efConstruction": 200})
+    search_params: Dict[str, Any] = Field(default_factory=lambda: {"ef": 64})
+
+
+class CollectionSpec(pydantic.BaseModel):
+    """集合定義"""
+    fields: List[FieldSpec]
+    vector_index: VectorIndexSpec = Field(default_factory=VectorIndexSpec)
+    scalar_indexes: List[ScalarIndexSpec] = []
+    enable_dynamic_field: bool = False
+    description: str = ""
+
+    @property
+    def field_names(self) -> List[str]:
+        return [field.name for field in self.fields]
+
+    def with_vector_index(self, **overrides) -> "CollectionSpec":
+        """回傳替換向量索引設定後的副本（供索引調校使用）"""
+        vector_index = self.vector_index.model_copy(update=overrides)
+        return self.model_copy(update={"vector_index": vector_index})
+
+
+def _primary_key() -> FieldSpec:
+    return FieldSpec(name="id", dtype="INT64", is_primary=True)
+
+
+def _vector(dim: int = EMBEDDING_DIMENSION) -> FieldSpec:
+    return FieldSpec(name="vector", dtype="FLOAT_VECTOR", dim=dim)
+
+
+def _hash_fields() -> List[FieldSpec]:
+    """增量匯入用：整份文件雜湊與嵌入文字雜湊"""
+    return [
+        FieldSpec(name="content_hash", dtype="VARCHAR", max_length=64),
+        FieldSpec(name="embed_hash", dtype="VARCHAR", max_length=64),
+    ]
+
+
+FAQ_SPEC = CollectionSpec(
+    description="FAQ 知識庫",
+    fields=[
+        _primary_key(),
+        FieldSpec(name="doc_id", dtype="VARCHAR", max_length=64),
+        FieldSpec(name="doc_type", dtype="VARCHAR", max_length=32),
+        FieldSpec(name="title", dtype="VARCHAR", max_length=1024),
+        FieldSpec(name="content", dtype="VARCHAR", max_length=65535),
+        _vector(),
+        FieldSpec(name="metadata", dtype="JSON"),
+        *_hash_fields(),
+    ],
+    scalar_indexes=[
+        ScalarIndexSpec(field="doc_id"),
+        ScalarIndexSpec(field="doc_type"),
+    ],
+)
+
+def _spec_range_fields() -> List[FieldSpec]:
+    """商品規格的數值範圍欄位（由 utils.specs 於匯入時解析），不適用的規格為 null"""
+    names = ["size_max_inch", "weight_min_kg", "weight_max_kg", "desk_min_mm", "desk_max_mm",
+             "tray_min_inch", "tray_max_inch"]
+    return [FieldSpec(name=name, dtype="FLOAT", nullable=True) for name in names]
+
+
+PRODUCT_SPEC = CollectionSpec(
+    description="商品資料",
+    fields=[
+        _primary_key(),
+        FieldSpec(name="doc_id", dtype="VARCHAR", max_length=64),
+        FieldSpec(name="doc_type", dtype="VARCHAR", max_length=32),
+        FieldSpec(name="title", dtype="VARCHAR", max_length=1024),
+        FieldSpec(name="content", dtype="VARCHAR", max_length=65535),
+        _vector(),
+        FieldSpec(name="metadata", dtype="JSON"),
+        *_spec_range_fields(),
+        FieldSpec(name="vesa", dtype="ARRAY", element_type="VARCHAR", max_capacity=8, max_length=16),
+        *_hash_fields(),
+    ],
+    scalar_indexes=[
+        ScalarIndexSpec(field="doc_id"),
+        ScalarIndexSpec(field="doc_type"),
+        *(ScalarIndexSpec(field=field.name) for field in _spec_range_fields()),
+    ],
+)
+
+CLASSIFICATION_SPEC = CollectionSpec(
+    description="FAQ 與 agent 的對應關係",
+    fields=[
+        _primary_key(),
+        FieldSpec(name="faq_id", dtype="VARCHAR", max_length=64),
+        FieldSpec(name="agent_type", dtype="VARCHAR", max_length=64),
+        _vector(),
+        *_hash_fields(),
+    ],
+    scalar_indexes=[
+        ScalarIndexSpec(field="faq_id"),
+        ScalarIndexSpec(field="agent_type"),
+    ],
+)
+
+COLLECTION_SPECS: Dict[str, CollectionSpec] = {
+    "faqs": FAQ_SPEC,
+    "products": PRODUCT_SPEC,
+    "classification": CLASSIFICATION_SPEC,
+}
+
+
+def get_collection_spec(collection_name: str) -> Optional[CollectionSpec]:
+    """取得集合的預設 schema，未定義時回傳 None"""
+    return COLLECTION_SPECS.get(collection_name)
@@ -9,13 +9,59 @@ class Settings(BaseSettings):
     # Existing settings
     DEBUG: str = os.getenv("DEBUG", "")
     # POSTGRES_URI: str = os.getenv('POSTGRES_URI')
-    OPENAI_API_KEY: str = os.getenv('OPENAI_API_KEY').strip()
+    OPENAI_API_KEY: str = os.getenv('OPENAI_API_KEY', '').strip()
 
     OTEL_EXPORTER_OTLP_ENDPOINT: str = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
     OTEL_SERVICE_NAME: str = os.getenv("OTEL_SERVICE_NAME", "")
+    A2A_WORKER_CONCURRENCY: int = int(os.getenv("A2A_WORKER_CONCURRENCY", 4))
     AGENT_URL: str = os.getenv("AGENT_URL", "")
+    A2A_AGENT_LIMITS: str = os.getenv("A2A_AGENT_LIMITS", "")
+    A2A_INPROCESS_SERVICES: str = os.getenv("A2A_INPROCESS_SERVICES", "")
+    A2A_POLL_INTERVAL: float = float(os.getenv("A2A_POLL_INTERVAL", 1))
+    A2A_RPC_LOG_SAMPLE_RATE: float = float(os.getenv("A2A_RPC_LOG_SAMPLE_RATE", 1))
+    A2A_RPC_LOG_METHODS: str = os.getenv("A2A_RPC_LOG_METHODS", "message/send")
+    A2A_RPC_LOG_MAX_BODY_BYTES: int = int(os.getenv("A2A_RPC_LOG_MAX_BODY_BYTES", 2048))
+    A2A_RPC_LOG_REDACT_KEYS: str = os.getenv(
+        "A2A_RPC_LOG_REDACT_KEYS", "contact_phone,phone,email,shipping_address,address,api_key,token")
+    A2A_RPC_LOG_MASK_PII: bool = os.getenv("A2A_RPC_LOG_MASK_PII", True)
+    A2A_SUPERVISOR_GROUPS: str = os.getenv("A2A_SUPERVISOR_GROUPS", "")
+    A2A_TASK_QUEUE_SIZE: int = int(os.getenv("A2A_TASK_QUEUE_SIZE", 32))
+    A2A_TASK_STORE: str = os.getenv("A2A_TASK_STORE", "memory")
+    A2A_TASK_DB_PATH: str = os.getenv("A2A_TASK_DB_PATH", "a2a_tasks.db")
+    A2A_TASK_TTL: float = float(os.getenv("A2A_TASK_TTL", 600))
+    A2A_TASK_MAX_ENTRIES: int = int(os.getenv("A2A_TASK_MAX_ENTRIES", 10000))
+    LLM_CACHE_MODE: str = os.getenv("LLM_CACHE_MODE", "off")
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+    LLM_CACHE_TTL: float = float(os.getenv("LLM_CACHE_TTL", 86400))
+    LLM_CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", 5))
+    LLM_HTTP2: bool = os.getenv("LLM_HTTP2", False)
+    LLM_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_KEEPALIVE_EXPIRY", 60))
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", 100))
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 20))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", 4))
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", 0.5))
+    LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", 30))
+    LLM_RPM: float = float(os.getenv("LLM_RPM", 0))
+    LLM_TPM: float = float(os.getenv("LLM_TPM", 0))
+    LLM_TIMEOUT: float = float(os.getenv("LLM_TIMEOUT", 600))
     MILVUS_URI: str = os.getenv("MILVUS_URI", "")
     TOKENIZERS_PARALLELISM: bool = os.getenv("TOKENIZERS_PARALLELISM", False)
+    COLLECTION_VERSIONS_PATH: str = os.getenv("COLLECTION_VERSIONS_PATH", "collection_versions.json")
+    COMPATIBILITY_TABLE_PATH: str = os.getenv("COMPATIBILITY_TABLE_PATH", "compatibility_table.json")
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", 128))
+    EMBEDDING_WORKERS: int = int(os.getenv("EMBEDDING_WORKERS", 1))
+    EMBEDDING_TORCH_THREADS: int = int(os.getenv("EMBEDDING_TORCH_THREADS", 1))
+    ORDER_BACKEND: str = os.getenv("ORDER_BACKEND", "json")
+    ORDER_DATA_PATH: str = os.getenv("ORDER_DATA_PATH", "dummy_data/orders.json")
+    ORDER_DB_PATH: str = os.getenv("ORDER_DB_PATH", "orders.db")
+    ORDER_DB_POOL_SIZE: int = int(os.getenv("ORDER_DB_POOL_SIZE", 4))
+    ORDER_FAST_PATH: bool = os.getenv("ORDER_FAST_PATH", True)
+    ORDER_PAGE_SIZE: int = int(os.getenv("ORDER_PAGE_SIZE", 5))
+    ORDER_TOOL_TOKEN_BUDGET: int = int(os.getenv("ORDER_TOOL_TOKEN_BUDGET", 800))
+    PAYLOAD_CACHE_SIZE: int = int(os.getenv("PAYLOAD_CACHE_SIZE", 2048))
+    TOOL_CACHE_SIZE: int = int(os.getenv("TOOL_CACHE_SIZE", 1024))
+    TOOL_CACHE_TTL: float = float(os.getenv("TOOL_CACHE_TTL", 300))
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", True)
 
     model_config = ConfigDict(
         env_file=".env"
@@ -1,18 +1,44 @@
+import json
+from collections import OrderedDict
+
 import logfire
 
 from cores.settings import  SETTINGS
-from pymilvus import MilvusClient
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any, Optional, Union
+from cores.schemas import CollectionSpec, get_collection_spec
+from cores.tool_cache import get_collection_versions
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Union
 
-# 全域變數
-_client: Optional[MilvusClient] = None
-_model: Optional[SentenceTransformer] = None
+# pymilvus / sentence_transformers 匯入需數秒，實際使用時才載入
+if TYPE_CHECKING:
+    from pymilvus import MilvusClient
+    from sentence_transformers import SentenceTransformer
 
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 
-def initialize_milvus(uri: str = "", model_name: str = "all-MiniLM-L6-v2"):
+# 全域變數
+_client: Optional["MilvusClient"] = None
+_model: Optional["SentenceTransformer"] = None
+
+# 兩階段檢索：payload 快取與傳輸量統計
+# 快取鍵含集合版本：id 由內容決定（重新匯入同一 SKU 的 id 不變），資料更新後靠版本讓舊 payload 失效
+_payload_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_transfer_stats: Dict[str, int] = {
+    "full_search_bytes": 0,
+    "id_search_bytes": 0,
+    "payload_fetch_bytes": 0,
+    "payload_cache_hits": 0,
+    "payload_cache_misses": 0,
+}
+_bytes_counter = logfire.metric_counter("milvus.bytes_transferred", unit="By",
+                                        description="Milvus 回傳資料量（估算）")
+
+
+def initialize_milvus(uri: str = "", model_name: str = DEFAULT_EMBEDDING_MODEL):
     """初始化 Milvus 客戶端和嵌入模型"""
     global _client, _model
+    from pymilvus import MilvusClient
+    from sentence_transformers import SentenceTransformer
+
     if uri == "":
         uri = SETTINGS.MILVUS_URI
     try:
@@ -25,14 +51,14 @@ def initialize_milvus(uri: str = "", model_name: str = "all-MiniLM-L6-v2"):
         raise
 
 
-def get_client() -> MilvusClient:
+def get_client() -> "MilvusClient":
     """取得 Milvus 客戶端實例"""
     if _client is None:
         raise RuntimeError("Milvus 客戶端未初始化，請先呼叫 initialize_milvus()")
     return _client
 
 
-def get_model() -> SentenceTransformer:
+def get_model() -> "SentenceTransformer":
     """取得嵌入模型實例"""
     if _model is None:
         raise RuntimeError("嵌入模型未初始化，請先呼叫 initialize_milvus()")
@@ -49,9 +75,76 @@ def generate_embedding(text: str) -> List[float]:
         raise
 
 
+def generate_embeddings(texts: List[str], batch_size: int = 64) -> List[List[float]]:
+    """批次生成文字嵌入向量"""
+    if not texts:
+        return []
+    try:
+        model = get_model()
+        return model.encode(texts, batch_size=batch_size).tolist()
+    except Exception as e:
+        logfire.error(f"批次生成嵌入向量失敗: {e}")
+        raise
+
+
+def build_schema(spec: CollectionSpec):
+    """將宣告式 schema 轉換為 Milvus schema"""
+    from pymilvus import DataType, MilvusClient
+
+    schema = MilvusClient.create_schema(
+        auto_id=False,
+        enable_dynamic_field=spec.enable_dynamic_field,
+        description=spec.description,
+    )
+    for field in spec.fields:
+        kwargs = {"is_primary": field.is_primary}
+        if field.max_length is not None:
+            kwargs["max_length"] = field.max_length
+        if field.dim is not None:
+            kwargs["dim"] = field.dim
+        if field.element_type is not None:
+            kwargs["element_type"] = DataType[field.element_type]
+        if field.max_capacity is not None:
+            kwargs["max_capacity"] = field.max_capacity
+        if field.nullable:
+            kwargs["nullable"] = True
+        if field.default_value is not None:
+            kwargs["default_value"] = field.default_value
+        schema.add_field(field_name=field.name, datatype=DataType[field.dtype], **kwargs)
+    return schema
+
+
+def build_index_params(spec: CollectionSpec):
+    """建立向量索引與純量索引參數"""
+    from pymilvus import MilvusClient
+
+    index_params = MilvusClient.prepare_index_params()
+    index_params.add_index(
+        field_name=spec.vector_index.field,
+        index_type=spec.vector_index.index_type,
+        metric_type=spec.vector_index.metric_type,
+        params=spec.vector_index.build_params,
+    )
+    for scalar_index in spec.scalar_indexes:
+        index_params.add_index(field_name=scalar_index.field, index_type=scalar_index.index_type)
+    return index_params
+
+
+def get_search_params(collection_name: str) -> Optional[Dict[str, Any]]:
+    """取得集合的向量搜尋參數，未定義 schema 時交由 Milvus 預設"""
+    spec = get_collection_spec(collection_name)
+    if spec is None:
+        return None
+    return {
+        "metric_type": spec.vector_index.metric_type,
+        "params": spec.vector_index.search_params,
+    }
+
+
 def create_collection(collection_name: str, dimension: int = 384,
                       metric_type: str = "COSINE", consistency_level: str = "Strong",
-                      recreate: bool = False) -> bool:
+                      recreate: bool = False, schema: Optional[CollectionSpec] = None) -> bool:
+    """建立集合，優先使用宣告式 schema，未定義時退回 quick setup"""
     try:
         client = get_client()
 
@@ -59,18 +152,29 @@ def create_collection(collection_name: str, dimension: int = 384,
             client.drop_collection(collection_name)
             logfire.info(f"已刪除現有集合: {collection_name}")
 
-        if not client.has_collection(collection_name):
+        if client.has_collection(collection_name):
+            logfire.info(f"集合已存在: {collection_name}")
+            return True
+
+        if schema is None:
+            schema = get_collection_spec(collection_name)
+
+        if schema is None:
             client.create_collection(
                 collection_name=collection_name,
                 dimension=dimension,
                 metric_type=metric_type,
                 consistency_level=consistency_level
             )
-            logfire.info(f"集合建立成功: {collection_name}")
-            return True
         else:
-            logfire.info(f"集合已存在: {collection_name}")
-            return True
+            client.create_collection(
+                collection_name=collection_name,
+                schema=build_schema(schema),
+                index_params=build_index_params(schema),
+                consistency_level=consistency_level
+            )
+        logfire.info(f"集合建立成功: {collection_name}")
+        return True
 
     except Exception as e:
         logfire.error(f"建立集合失敗: {e}")
@@ -93,14 +197,55 @@ def insert_data(collection_name: str, data: List[Dict[str, Any]]) -> Dict[str, A
         raise
 
 
-def search_data(collection_name: str, query: str, limit: int = 5,
-                output_fields: List[str] = None, filter_expr: str = None) -> List[Dict[str, Any]]:
-    """搜尋相似資料"""
+def upsert_data(collection_name: str, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """新增或覆寫資料（依主鍵）"""
+    try:
+        client = get_client()
+        result = client.upsert(collection_name=collection_name, data=data)
+        logfire.info(f"成功 upsert {len(data)} 筆資料到 {collection_name}")
+        return {
+            "success": True,
+            "upserted_count": result.get("upsert_count", len(data)),
+            "message": f"成功 upsert {len(data)} 筆資料"
+        }
+    except Exception as e:
+        logfire.error(f"upsert 資料失敗: {e}")
+        raise
+
+
+def query_all(collection_name: str, output_fields: List[str],
+              filter_expr: str = "", batch_size: int = 1000) -> List[Dict[str, Any]]:
+    """以 iterator 分批讀出集合內所有符合條件的資料"""
+    try:
+        client = get_client()
+        iterator = client.query_iterator(
+            collection_name=collection_name,
+            batch_size=batch_size,
+            filter=filter_expr,
+            output_fields=output_fields
+        )
+        results = []
+        try:
+            while batch := iterator.next():
+                results.extend(batch)
+        finally:
+            iterator.close()
+        return results
+    except Exception as e:
+        logfire.error(f"讀取集合資料失敗: {e}")
+        raise
+
+
+def search_many(collection_name: str, queries: List[str], limit: int = 5,
+                output_fields: List[str] = None, filter_expr: str = None) -> List[List[Dict[str, Any]]]:
+    """批次搜尋相似資料，一次編碼所有查詢並送出單次多向量搜尋，結果依查詢順序回傳"""
+    if not queries:
+        return []
     try:
         client = get_client()
 
-        # 生成查詢向量
-        query_embedding = generate_embedding(query)
+        # 一次生成所有查詢向量
+        query_embeddings = generate_embeddings(queries)
 
         # 設定輸出欄位
         if output_fields is None:
@@ -109,29 +254,164 @@ def search_data(collection_name: str, query: str, limit: int = 5,
         # 執行搜尋
         search_results = client.search(
             collection_name=collection_name,
-            data=[query_embedding],
+            data=query_embeddings,
             limit=limit,
             output_fields=output_fields,
-            filter=filter_expr
+            filter=filter_expr,
+            search_params=get_search_params(collection_name)
         )
 
+        _record_transfer("full_search_bytes", search_results)
+
         results = []
-        for hit in search_results[0]:
-            result_item = {
-                "id": hit["id"],
-                "score": hit["distance"],
-                "doc_id": hit["entity"]["doc_id"],
-                "doc_type": hit["entity"]["doc_type"],
-                "title": hit["entity"]["title"],
-                "content": hit["entity"]["content"],
-                "metadata": hit["entity"]["metadata"]
-            }
-            results.append(result_item)
+        for hits in search_results:
+            query_results = []
+            for hit in hits:
+                result_item = {
+                    "id": hit["id"],
+                    "score": hit["distance"],
+                }
+                for field in output_fields:
+                    result_item[field] = hit["entity"].get(field)
+                query_results.append(result_item)
+            results.append(query_results)
+
+        return results
+
+    except Exception as e:
+        logfire.error(f"批次搜尋失敗: {e}")
+        return [[] for _ in queries]
 
+
+def search_data(collection_name: str, query: str, limit: int = 5,
+                output_fields: List[str] = None, filter_expr: str = None) -> List[Dict[str, Any]]:
+    """搜尋相似資料"""
+    return search_many(collection_name, [query], limit=limit,
+                       output_fields=output_fields, filter_expr=filter_expr)[0]
+
+
+def _estimate_bytes(payload: Any) -> int:
+    """估算回傳資料的傳輸量"""
+    return len(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _record_transfer(stat_key: str, payload: Any):
+    size = _estimate_bytes(payload)
+    _transfer_stats[stat_key] += size
+    _bytes_counter.add(size, {"phase": stat_key})
+
+
+def get_transfer_stats() -> Dict[str, int]:
+    """取得檢索傳輸量統計"""
+    return dict(_transfer_stats)
+
+
+def reset_transfer_stats():
+    for key in _transfer_stats:
+        _transfer_stats[key] = 0
+
+
+def clear_payload_cache(collection_name: str = None):
+    """清除 payload 快取，未指定集合時全部清除"""
+    if collection_name is None:
+        _payload_cache.clear()
+        return
+    for key in [key for key in _payload_cache if key[0] == collection_name]:
+        del _payload_cache[key]
+
+
+def _higher_is_better(collection_name: str) -> bool:
+    spec = get_collection_spec(collection_name)
+    metric_type = spec.vector_index.metric_type if spec else "COSINE"
+    return metric_type in ("COSINE", "IP")
+
+
+def search_ids(collection_name: str, query_vectors: List[List[float]], limit: int = 5,
+               filter_expr: str = None, score_threshold: float = None) -> List[Dict[str, Any]]:
+    """第一階段：只取回 id 與分數，套用分數門檻並依 id 去重（多向量時保留最佳分數）"""
+    client = get_client()
+    search_results = client.search(
+        collection_name=collection_name,
+        data=query_vectors,
+        limit=limit,
+        output_fields=[],
+        filter=filter_expr,
+        search_params=get_search_params(collection_name)
+    )
+    _record_transfer("id_search_bytes", [[(hit["id"], hit["distance"]) for hit in hits]
+                                         for hits in search_results])
+
+    higher_is_better = _higher_is_better(collection_name)
+    best: Dict[Union[int, str], float] = {}
+    for hits in search_results:
+        for hit in hits:
+            score = hit["distance"]
+            if score_threshold is not None:
+                if higher_is_better and score < score_threshold:
+                    continue
+                if not higher_is_better and score > score_threshold:
+                    continue
+            current = best.get(hit["id"])
+            if current is None or (score > current if higher_is_better else score < current):
+                best[hit["id"]] = score
+
+    ranked = sorted(best.items(), key=lambda item: item[1], reverse=higher_is_better)
+    return [{"id": _id, "score": score} for _id, score in ranked[:limit]]
+
+
+def fetch_payloads(collection_name: str, ids: List[Union[int, str]],
+                   output_fields: List[str] = None) -> Dict[Union[int, str], Dict[str, Any]]:
+    """第二階段：只為存活的 id 取得 payload，優先使用行程內快取（集合版本變更後不再命中）"""
+    if output_fields is None:
+        output_fields = ["doc_id", "doc_type", "title", "content", "metadata"]
+
+    version = get_collection_versions().get(collection_name, 0)
+    payloads = {}
+    missing = []
+    for _id in ids:
+        key = (collection_name, version, _id, tuple(output_fields))
+        if key in _payload_cache:
+            _payload_cache.move_to_end(key)
+            payloads[_id] = _payload_cache[key]
+            _transfer_stats["payload_cache_hits"] += 1
+        else:
+            missing.append(_id)
+            _transfer_stats["payload_cache_misses"] += 1
+
+    if missing:
+        fetched = get_by_ids(collection_name, missing, output_fields=output_fields)
+        _record_transfer("payload_fetch_bytes", fetched)
+        for row in fetched:
+            payload = {field: row.get(field) for field in output_fields}
+            payloads[row["id"]] = payload
+            _payload_cache[(collection_name, version, row["id"], tuple(output_fields))] = payload
+        while len(_payload_cache) > SETTINGS.PAYLOAD_CACHE_SIZE:
+            _payload_cache.popitem(last=False)
+
+    return payloads
+
+
+def search_two_phase(collection_name: str, query_vectors: List[List[float]], limit: int = 5,
+                     output_fields: List[str] = None, filter_expr: str = None,
+                     score_threshold: float = None) -> List[Dict[str, Any]]:
+    """兩階段檢索：先以 id/分數搜尋並篩選，再只取回存活結果的 payload"""
+    try:
+        hits = search_ids(collection_name, query_vectors, limit=limit,
+                          filter_expr=filter_expr, score_threshold=score_threshold)
+        if not hits:
+            return []
+
+        payloads = fetch_payloads(collection_name, [hit["id"] for hit in hits], output_fields)
+        results = []
+        for hit in hits:
+            payload = payloads.get(hit["id"])
+            if payload is None:
+                continue
+            results.append({**hit, **payload})
         return results
 
     except Exception as e:
-        logfire.error(f"搜尋失敗: {e}")
+        logfire.error(f"兩階段搜尋失敗: {e}")
         return []
 
 
@@ -0,0 +1,430 @@
+"""
+A2A 服務 supervisor
+每個 agent（或設定的 agent 群組）在獨立行程中執行，每組可開 N 個 worker 行程，
+同一 port 以 SO_REUSEPORT 由核心分流；worker 意外結束時自動重啟（指數退避），
+SIGHUP 逐一滾動重啟（新 worker 的 /ready 回 200 後才停止舊 worker），連續健康檢查失敗的 worker 也以同樣方式替換，
+並定期回報各行程 CPU / 記憶體。
+替換在主迴圈中逐步推進（啟動 → 就緒 → 停止舊 worker），等待單一 worker 時不會卡住其他群組的監控；
+memory task store 的任務只存在 worker 記憶體中，替換會讓 tasks/get 找不到任務，因此只在 A2A_TASK_STORE=sqlite 時替換
+"""
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import httpx
+import logfire
+import uvicorn
+
+from cores import constants
+from cores.settings import SETTINGS
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil 為選用套件，未安裝時讀取 /proc
+    psutil = None
+
+_PROCESS_ERRORS = (OSError, IndexError, ValueError) + ((psutil.Error,) if psutil is not None else ())
+
+_cpu_gauge = logfire.metric_gauge("a2a.process.cpu_percent", unit="%", description="A2A worker 行程 CPU 使用率")
+_rss_gauge = logfire.metric_gauge("a2a.process.rss_bytes", unit="By", description="A2A worker 行程常駐記憶體")
+_restart_counter = logfire.metric_counter("a2a.process.restarts", unit="1", description="A2A worker 行程重啟次數")
+
+
+class AgentGroup(NamedTuple):
+    """同一行程內執行的 agent 與 worker 行程數"""
+    agents: Tuple[str, ...]
+    workers: int = 1
+
+    @property
+    def name(self) -> str:
+        return "+".join(self.agents)
+
+
+def parse_group_spec(spec: str) -> AgentGroup:
+    """"order_query_agent,policy_information_agent:2" → AgentGroup(("order_query_agent", "policy_information_agent"), 2)"""
+    agents, _, workers = spec.strip().partition(":")
+    names = tuple(name.strip() for name in agents.split(",") if name.strip())
+    unknown = [name for name in names if name not in constants.A2A_SERVICE_PORTS]
+    if not names or unknown:
+        raise ValueError(f"無效的 agent 群組設定: {spec!r}（未知 agent: {unknown}）")
+    return AgentGroup(names, int(workers) if workers else 1)
+
+
+def parse_groups(specs: Sequence[str]) -> List[AgentGroup]:
+    """解析群組設定；未指定時每個 agent 各自一個行程；同一 agent 不可出現在多個群組"""
+    groups = [parse_group_spec(spec) for spec in specs if spec.strip()]
+    if not groups:
+        return [AgentGroup((agent_name,)) for agent_name in constants.A2A_SERVICE_PORTS]
+    seen = set()
+    for group in groups:
+        duplicated = seen.intersection(group.agents)
+        if duplicated:
+            raise ValueError(f"agent 重複出現在多個群組: {sorted(duplicated)}")
+        seen.update(group.agents)
+    return groups
+
+
+def read_process_stats(pid: int) -> Optional[Dict[str, float]]:
+    """累計 CPU 秒數與 RSS；行程不存在時回傳 None"""
+    try:
+        if psutil is not None:
+            process = psutil.Process(pid)
+            cpu = process.cpu_times()
+            return {"cpu_seconds": cpu.user + cpu.system, "rss_bytes": process.memory_info().rss}
+        with open(f"/proc/{pid}/stat") as f:
+            # comm 可能含空白，從最後一個 ')' 之後切欄位；utime / stime 為第 14、15 欄
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+    except _PROCESS_ERRORS:
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / ticks,
+        "rss_bytes": rss_pages * os.sysconf("SC_PAGE_SIZE"),
+    }
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    """同一 port 允許多個 worker 綁定，由核心分配連線"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, "SO_REUSEPORT"):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+class _GroupServer(uvicorn.Server):
+    """同一行程多個 uvicorn server，訊號由 worker 統一處理"""
+
+    @contextlib.contextmanager
+    def capture_signals(self):
+        yield
+
+
+async def probe_ready(client: httpx.AsyncClient, timeout: float = 2) -> bool:
+    """對 worker 自己的 app 送出 GET /ready；同一 port 由多個 worker 共用，從外部無法指定 worker"""
+    try:
+        response = await asyncio.wait_for(client.get("/ready"), timeout)
+    except (httpx.HTTPError, asyncio.TimeoutError):
+        return False
+    return response.status_code == 200
+
+
+async def _monitor_group(servers, clients: Sequence[httpx.AsyncClient], ready, heartbeat, interval: float):
+    """server 啟動且所有 app 的 /ready 回 200 後通知 supervisor，之後定期檢查並更新心跳時間"""
+    while not all(server.started for server in servers):
+        await asyncio.sleep(0.05)
+    while True:
+        results = await asyncio.gather(*(probe_ready(client) for client in clients))
+        if all(results):
+            heartbeat.value = time.time()
+            ready.set()
+        await asyncio.sleep(0.2 if not ready.is_set() else interval)
+
+
+async def _serve_group(agents: Sequence[str], host: str, ready, heartbeat, graceful_timeout: int,
+                       health_interval: float):
+    from agents.a2a_apps import build_a2a_app, instrument_a2a_app
+
+    servers, sockets, clients = [], [], []
+    for agent_name in agents:
+        app = instrument_a2a_app(build_a2a_app(agent_name), agent_name)
+        config = uvicorn.Config(app, timeout_graceful_shutdown=graceful_timeout, log_level="warning")
+        servers.append(_GroupServer(config))
+        sockets.append(_bind_socket(host, constants.A2A_SERVICE_PORTS[agent_name]))
+        clients.append(httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://worker"))
+
+    def shutdown():
+        for server in servers:
+            server.should_exit = True
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, shutdown)
+
+    # 心跳間隔取健康檢查間隔的一半，supervisor 檢查時最近一次心跳不會因時間差而過期
+    monitor = asyncio.create_task(_monitor_group(servers, clients, ready, heartbeat, health_interval / 2))
+    try:
+        await asyncio.gather(*(server.serve(sockets=[sock]) for server, sock in zip(servers, sockets)))
+    finally:
+        monitor.cancel()
+        await asyncio.gather(monitor, return_exceptions=True)
+        for client in clients:
+            await client.aclose()
+
+
+def run_worker(agents: Sequence[str], host: str, ready, heartbeat, graceful_timeout: int = 30,
+               health_interval: float = 10):
+    """worker 行程進入點：在同一 event loop 服務群組內所有 agent"""
+    logfire.configure(
+        send_to_logfire=False,
+        service_name=f"a2a-{'+'.join(agents)}",
+        inspect_arguments=True,
+        scrubbing=False,
+    )
+    asyncio.run(_serve_group(agents, host, ready, heartbeat, graceful_timeout, health_interval))
+
+
+class WorkerHandle:
+    """單一 worker 行程的狀態"""
+
+    def __init__(self, group: AgentGroup, index: int, process: multiprocessing.Process, ready, heartbeat):
+        self.group = group
+        self.index = index
+        self.process = process
+        self.ready = ready
+        # worker 最近一次 /ready 成功的時間（time.time()）
+        self.heartbeat = heartbeat
+        self.started_at = time.monotonic()
+        self.health_failures = 0
+        self.last_cpu: Optional[Tuple[float, float]] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.group.name}#{self.index}"
+
+
+class Supervisor:
+    """啟動、監控、重啟 A2A worker 行程"""
+
+    def __init__(self, groups: Sequence[AgentGroup], host: str = "0.0.0.0", ready_timeout: float = 120,
+                 graceful_timeout: int = 30, health_interval: float = 10, report_interval: float = 30,
+                 task_store: str = None, max_health_failures: int = 3):
+        task_store = task_store or SETTINGS.A2A_TASK_STORE
+        multi_worker = [group.name for group in groups if group.workers > 1]
+        if multi_worker and task_store != "sqlite":
+            # 每個 worker 的 memory task store 各自獨立，tasks/get 落在其他 worker 時會找不到任務
+            raise ValueError(f"{multi_worker} 使用多個 worker，需設定共用的 task store（A2A_TASK_STORE=sqlite），"
+                             f"目前為 {task_store}")
+        self.groups = list(groups)
+        self.task_store = task_store
+        self.host = host
+        self.ready_timeout = ready_timeout
+        self.graceful_timeout = graceful_timeout
+        self.health_interval = health_interval
+        self.report_interval = report_interval
+        self.max_health_failures = max_health_failures
+        self.context = multiprocessing.get_context("spawn")
+        self.workers: List[WorkerHandle] = []
+        self._failures: Dict[Tuple[str, int], int] = {}
+        # 替換中的 worker：position → (新 worker, 就緒期限)
+        self._replacing: Dict[int, Tuple[WorkerHandle, float]] = {}
+        # 等待滾動重啟的 position
+        self._rolling: List[int] = []
+        self._rolling_started = False
+        # 已送出 SIGTERM、等待結束的 worker 與強制終止期限
+        self._retiring: List[Tuple[WorkerHandle, float]] = []
+        self._stopping = False
+        self._restart_requested = False
+
+    def _spawn(self, group: AgentGroup, index: int) -> WorkerHandle:
+        ready = self.context.Event()
+        heartbeat = self.context.Value("d", 0.0)
+        process = self.context.Process(
+            target=run_worker,
+            args=(group.agents, self.host, ready, heartbeat, self.graceful_timeout, self.health_interval),
+            name=f"a2a-{group.name}-{index}",
+        )
+        process.start()
+        logfire.info(f"啟動 worker {group.name}#{index}", pid=process.pid)
+        return WorkerHandle(group, index, process, ready, heartbeat)
+
+    def _terminate(self, handle: WorkerHandle):
+        """SIGTERM 後等待 in-flight 請求完成，逾時強制結束"""
+        if handle.process.is_alive():
+            handle.process.terminate()
+            handle.process.join(self.graceful_timeout + 5)
+        if handle.process.is_alive():
+            logfire.warning(f"worker {handle.label} 未在時限內結束，強制終止", pid=handle.process.pid)
+            handle.process.kill()
+            handle.process.join()
+
+    def _retire(self, handle: WorkerHandle):
+        """送出 SIGTERM 讓 in-flight 請求完成，不等待結束；由 reap_retired 逾時強制終止"""
+        if handle.process.is_alive():
+            handle.process.terminate()
+            self._retiring.append((handle, time.monotonic() + self.graceful_timeout + 5))
+
+    def reap_retired(self):
+        """回收已結束的舊 worker，超過期限仍未結束則強制終止"""
+        retiring = []
+        for handle, deadline in self._retiring:
+            if not handle.process.is_alive():
+                handle.process.join(0)
+            elif time.monotonic() > deadline:
+                logfire.warning(f"worker {handle.label} 未在時限內結束，強制終止", pid=handle.process.pid)
+                handle.process.kill()
+            else:
+                retiring.append((handle, deadline))
+        self._retiring = retiring
+
+    def _replacement_allowed(self, action: str) -> bool:
+        if self.task_store == "sqlite":
+            return True
+        logfire.warning(f"A2A_TASK_STORE={self.task_store} 的任務只存在 worker 記憶體中，略過{action}；"
+                        f"需要替換 worker 時請改用 A2A_TASK_STORE=sqlite")
+        return False
+
+    def start(self):
+        for group in self.groups:
+            for index in range(group.workers):
+                self.workers.append(self._spawn(group, index))
+
+    def wait_ready(self, handles: Sequence[WorkerHandle] = None) -> bool:
+        """等待 worker 全部就緒"""
+        deadline = time.monotonic() + self.ready_timeout
+        for handle in handles or self.workers:
+            while not handle.ready.wait(0.2):
+                if not handle.process.is_alive() or time.monotonic() > deadline:
+                    logfire.error(f"worker {handle.label} 未就緒", exitcode=handle.process.exitcode)
+                    return False
+        return True
+
+    def restart_dead_workers(self):
+        """意外結束的 worker 以指數退避重啟"""
+        for position, handle in enumerate(self.workers):
+            if handle.process.is_alive() or position in self._replacing:
+                # 替換中的 position 由 advance_replacements 處理
+                continue
+            key = (handle.group.name, handle.index)
+            # 啟動後穩定運行超過一分鐘才重置失敗次數
+            if time.monotonic() - handle.started_at > 60:
+                self._failures[key] = 0
+            failures = self._failures.get(key, 0)
+            delay = min(2 ** failures, 60)
+            if time.monotonic() - handle.started_at < delay:
+                continue
+            logfire.error(f"worker {handle.label} 已結束，重新啟動", exitcode=handle.process.exitcode,
+                          failures=failures)
+            self._failures[key] = failures + 1
+            _restart_counter.add(1, {"group": handle.group.name})
+            self.workers[position] = self._spawn(handle.group, handle.index)
+
+    def replace_worker(self, position: int) -> bool:
+        """啟動替代的 worker，由 advance_replacements 在新 worker 就緒後停止舊 worker；回傳是否開始替換"""
+        if position in self._replacing or not self._replacement_allowed(f"替換 worker {self.workers[position].label}"):
+            return False
+        old = self.workers[position]
+        self._replacing[position] = (self._spawn(old.group, old.index), time.monotonic() + self.ready_timeout)
+        return True
+
+    def advance_replacements(self):
+        """推進替換中的 worker：新 worker 就緒後才停止舊 worker（SIGTERM 讓 in-flight 請求完成），逾時或結束則保留舊 worker"""
+        for position, (new, deadline) in list(self._replacing.items()):
+            old = self.workers[position]
+            if new.ready.is_set():
+                del self._replacing[position]
+                self.workers[position] = new
+                self._retire(old)
+                _restart_counter.add(1, {"group": old.group.name})
+                logfire.info(f"worker {old.label} 已替換", pid=new.process.pid)
+            elif not new.process.is_alive() or time.monotonic() > deadline:
+                del self._replacing[position]
+                logfire.error(f"替換 worker {old.label} 失敗，保留舊 worker", exitcode=new.process.exitcode)
+                self._retire(new)
+        # 滾動重啟一次只替換一個 worker
+        while self._rolling and not self._replacing:
+            self.replace_worker(self._rolling.pop(0))
+        if self._rolling_started and not self._rolling and not self._replacing:
+            self._rolling_started = False
+            logfire.info("滾動重啟完成")
+
+    def rolling_restart(self):
+        """逐一替換 worker：新 worker 就緒後才停止舊 worker，服務不中斷"""
+        if not self._replacement_allowed("滾動重啟"):
+            return
+        self._rolling = list(range(len(self.workers)))
+        self._rolling_started = True
+        logfire.info("開始滾動重啟", workers=[handle.label for handle in self.workers])
+        self.advance_replacements()
+
+    def check_health(self) -> Dict[str, bool]:
+        """依各 worker 自行檢查 /ready 的心跳判斷健康；連續 max_health_failures 次失敗的 worker 會被替換"""
+        results = {}
+        now = time.time()
+        for position, handle in enumerate(list(self.workers)):
+            if not handle.process.is_alive() or not handle.ready.is_set() or position in self._replacing:
+                # 已結束的由 restart_dead_workers 處理，尚未就緒的還在預熱，替換中的等待新 worker 就緒
+                continue
+            healthy = now - handle.heartbeat.value <= self.health_interval
+            results[handle.label] = healthy
+            if healthy:
+                handle.health_failures = 0
+                continue
+            handle.health_failures += 1
+            logfire.warning(f"worker {handle.label} 健康檢查失敗", failures=handle.health_failures,
+                            last_ready_seconds_ago=round(now - handle.heartbeat.value, 1))
+            if handle.health_failures >= self.max_health_failures:
+                logfire.error(f"worker {handle.label} 連續 {handle.health_failures} 次健康檢查失敗，替換 worker")
+                handle.health_failures = 0
+                self.replace_worker(position)
+        return results
+
+    def report(self) -> List[Dict[str, object]]:
+        """各 worker 行程的 CPU 使用率與記憶體"""
+        rows = []
+        now = time.monotonic()
+        for handle in self.workers:
+            stats = read_process_stats(handle.process.pid) if handle.process.is_alive() else None
+            if stats is None:
+                continue
+            cpu_percent = 0.0
+            if handle.last_cpu is not None:
+                last_at, last_seconds = handle.last_cpu
+                cpu_percent = 100 * (stats["cpu_seconds"] - last_seconds) / max(now - last_at, 1e-6)
+            handle.last_cpu = (now, stats["cpu_seconds"])
+            attributes = {"group": handle.group.name, "worker": handle.index}
+            _cpu_gauge.set(cpu_percent, attributes)
+            _rss_gauge.set(stats["rss_bytes"], attributes)
+            rows.append({"worker": handle.label, "pid": handle.process.pid, "ready": handle.ready.is_set(),
+                         "cpu_percent": round(cpu_percent, 1), "rss_mb": round(stats["rss_bytes"] / 2 ** 20, 1)})
+        logfire.info("A2A worker 資源使用", workers=rows)
+        return rows
+
+    def stop(self):
+        self._stopping = True
+        handles = self.workers + [new for new, _ in self._replacing.values()] + [old for old, _ in self._retiring]
+        for handle in handles:
+            if handle.process.is_alive():
+                handle.process.terminate()
+        for handle in handles:
+            self._terminate(handle)
+        logfire.info("所有 worker 已停止")
+
+    def run(self):
+        """前景執行：SIGTERM / SIGINT 停止，SIGHUP 滾動重啟"""
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "_stopping", True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "_stopping", True))
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda *_: setattr(self, "_restart_requested", True))
+
+        self.start()
+        if self.wait_ready():
+            logfire.info("所有 worker 已就緒", workers=[handle.label for handle in self.workers])
+
+        next_health = next_report = time.monotonic()
+        try:
+            while not self._stopping:
+                time.sleep(0.5)
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self.rolling_restart()
+                self.advance_replacements()
+                self.reap_retired()
+                self.restart_dead_workers()
+                now = time.monotonic()
+                if now >= next_health:
+                    self.check_health()
+                    next_health = now + self.health_interval
+                if now >= next_report:
+                    self.report()
+                    next_report = now + self.report_interval
+        finally:
+            self.stop()
@@ -0,0 +1,279 @@
+"""
+A2A 任務儲存
+fasta2a 預設的 InMemoryStorage 會永久保留所有任務（history / artifacts）與對話 context，記憶體隨流量持續成長。
+- BoundedTaskStorage：行程內儲存，結束狀態的任務與 context 在 TTL 後淘汰，並限制最大筆數（先淘汰最早結束的）
+- SqliteTaskStorage：SQLite 持久化，重啟後仍可查詢任務；同一 agent 的多個 worker 行程可共用，
+  任何一個 worker 都能回應 tasks/get
+兩者都定期回報任務數與估計大小的 gauge
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import logfire
+from fasta2a.schema import Artifact, Message, Task, TaskState, TaskStatus
+from fasta2a.storage import InMemoryStorage, Storage
+from pydantic import TypeAdapter
+from pydantic_ai.messages import ModelMessagesTypeAdapter
+
+from cores.settings import SETTINGS
+
+TERMINAL_STATES = ("completed", "failed", "canceled", "rejected")
+
+_tasks_gauge = logfire.metric_gauge(
+    "a2a.task_store.tasks", unit="1", description="A2A 任務儲存中的任務數，依 agent 與 state（active / terminal）區分")
+_contexts_gauge = logfire.metric_gauge("a2a.task_store.contexts", unit="1", description="A2A 任務儲存中的對話 context 數")
+_bytes_gauge = logfire.metric_gauge(
+    "a2a.task_store.bytes", unit="By", description="A2A 任務儲存大小（記憶體：結束任務的 JSON 大小估計；SQLite：資料庫檔案大小）")
+
+
+def _trim_history(task: Task, history_length: Optional[int]) -> Task:
+    """回傳只保留最後 history_length 則訊息的副本，不修改儲存的任務"""
+    if history_length and "history" in task:
+        return {**task, "history": task["history"][-history_length:]}
+    return task
+
+
+class BoundedTaskStorage(InMemoryStorage):
+    """有 TTL 與筆數上限的行程內任務儲存"""
+
+    def __init__(self, agent: str, ttl: float = None, max_entries: int = None):
+        super().__init__()
+        self.agent = agent
+        self.ttl = ttl if ttl is not None else SETTINGS.A2A_TASK_TTL
+        self.max_entries = max_entries or SETTINGS.A2A_TASK_MAX_ENTRIES
+        self.tasks: "OrderedDict[str, Task]" = OrderedDict()
+        # context_id → (到期時間, context)，依最後更新排序
+        self.contexts: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # 結束狀態的任務 → (到期時間, JSON 大小)，依結束時間排序
+        self._finished: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._finished_bytes = 0
+
+    async def load_task(self, task_id: str, history_length: int | None = None) -> Task | None:
+        task = self.tasks.get(task_id)
+        return None if task is None else _trim_history(task, history_length)
+
+    async def submit_task(self, context_id: str, message: Message) -> Task:
+        task = await super().submit_task(context_id, message)
+        self.evict()
+        return task
+
+    async def update_task(self, task_id: str, state: TaskState, new_artifacts: list[Artifact] | None = None,
+                          new_messages: list[Message] | None = None) -> Task:
+        task = await super().update_task(task_id, state, new_artifacts, new_messages)
+        if state in TERMINAL_STATES and task_id not in self._finished:
+            size = len(json.dumps(task, ensure_ascii=False, default=str))
+            self._finished[task_id] = (time.monotonic() + self.ttl, size)
+            self._finished_bytes += size
+            self.evict()
+        return task
+
+    async def load_context(self, context_id: str) -> Any | None:
+        entry = self.contexts.get(context_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    async def update_context(self, context_id: str, context: Any) -> None:
+        self.contexts[context_id] = (time.monotonic() + self.ttl, context)
+        self.contexts.move_to_end(context_id)
+
+    def evict(self):
+        """淘汰過期或超過上限的結束任務與 context；執行中的任務不淘汰"""
+        now = time.monotonic()
+        while self._finished:
+            task_id, (expires_at, size) = next(iter(self._finished.items()))
+            if expires_at > now and len(self.tasks) <= self.max_entries:
+                break
+            del self._finished[task_id]
+            self._finished_bytes -= size
+            self.tasks.pop(task_id, None)
+        while self.contexts:
+            context_id, (expires_at, _) = next(iter(self.contexts.items()))
+            if expires_at > now and len(self.contexts) <= self.max_entries:
+                break
+            del self.contexts[context_id]
+        self.report()
+
+    def report(self):
+        attributes = {"agent": self.agent}
+        _tasks_gauge.set(len(self._finished), {**attributes, "state": "terminal"})
+        _tasks_gauge.set(len(self.tasks) - len(self._finished), {**attributes, "state": "active"})
+        _contexts_gauge.set(len(self.contexts), attributes)
+        _bytes_gauge.set(self._finished_bytes, attributes)
+
+
+class SqliteTaskStorage(Storage):
+    """SQLite 任務儲存：任務與 context 以 JSON 儲存，結束任務寫入到期時間，定期清理"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS a2a_tasks (
+        id TEXT PRIMARY KEY,
+        agent TEXT NOT NULL,
+        state TEXT NOT NULL,
+        updated_at REAL NOT NULL,
+        expires_at REAL,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_a2a_tasks_agent_expires ON a2a_tasks (agent, expires_at);
+    CREATE TABLE IF NOT EXISTS a2a_contexts (
+        agent TEXT NOT NULL,
+        id TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        data TEXT NOT NULL,
+        PRIMARY KEY (agent, id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_a2a_contexts_agent_expires ON a2a_contexts (agent, expires_at);
+    """
+
+    def __init__(self, agent: str, path: str = None, ttl: float = None, max_entries: int = None,
+                 context_adapter: TypeAdapter = ModelMessagesTypeAdapter, purge_interval: float = 10):
+        self.agent = agent
+        self.path = path or SETTINGS.A2A_TASK_DB_PATH
+        self.ttl = ttl if ttl is not None else SETTINGS.A2A_TASK_TTL
+        self.max_entries = max_entries or SETTINGS.A2A_TASK_MAX_ENTRIES
+        self.context_adapter = context_adapter
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(self.SCHEMA)
+
+    async def _run(self, fn, *args):
+        def call():
+            with self._lock, self._connection:
+                return fn(self._connection, *args)
+        return await asyncio.to_thread(call)
+
+    def _write_task(self, connection: sqlite3.Connection, task: Task):
+        # 以牆上時間記錄，讓共用資料庫的多個行程一致
+        now = time.time()
+        state = task["status"]["state"]
+        expires_at = now + self.ttl if state in TERMINAL_STATES else None
+        connection.execute(
+            "INSERT OR REPLACE INTO a2a_tasks (id, agent, state, updated_at, expires_at, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (task["id"], self.agent, state, now, expires_at, json.dumps(task, ensure_ascii=False, default=str)),
+        )
+
+    async def load_task(self, task_id: str, history_length: int | None = None) -> Task | None:
+        def fetch(connection: sqlite3.Connection):
+            return connection.execute("SELECT data FROM a2a_tasks WHERE id = ?", (task_id,)).fetchone()
+
+        row = await self._run(fetch)
+        return None if row is None else _trim_history(json.loads(row[0]), history_length)
+
+    async def submit_task(self, context_id: str, message: Message) -> Task:
+        task_id = str(uuid.uuid4())
+        message["task_id"] = task_id
+        message["context_id"] = context_id
+        task = Task(id=task_id, context_id=context_id, kind="task", history=[message],
+                    status=TaskStatus(state="submitted", timestamp=datetime.now().isoformat()))
+        await self._run(self._write_task, task)
+        if time.monotonic() >= self._next_purge:
+            self._next_purge = time.monotonic() + self.purge_interval
+            await self._run(self.purge)
+        return task
+
+    async def update_task(self, task_id: str, state: TaskState, new_artifacts: list[Artifact] | None = None,
+                          new_messages: list[Message] | None = None) -> Task:
+        def update(connection: sqlite3.Connection) -> Task:
+            row = connection.execute("SELECT data FROM a2a_tasks WHERE id = ?", (task_id,)).fetchone()
+            if row is None:
+                raise KeyError(task_id)
+            task = json.loads(row[0])
+            task["status"] = TaskStatus(state=state, timestamp=datetime.now().isoformat())
+            if new_artifacts:
+                task.setdefault("artifacts", []).extend(new_artifacts)
+            for message in new_messages or []:
+                message["task_id"] = task_id
+                message["context_id"] = task["context_id"]
+                task.setdefault("history", []).append(message)
+            self._write_task(connection, task)
+            return task
+
+        return await self._run(update)
+
+    async def load_context(self, context_id: str) -> Any | None:
+        def fetch(connection: sqlite3.Connection):
+            return connection.execute(
+                "SELECT data FROM a2a_contexts WHERE agent = ? AND id = ? AND expires_at > ?",
+                (self.agent, context_id, time.time()),
+            ).fetchone()
+
+        row = await self._run(fetch)
+        return None if row is None else self.context_adapter.validate_json(row[0])
+
+    async def update_context(self, context_id: str, context: Any) -> None:
+        data = self.context_adapter.dump_json(context).decode()
+
+        def write(connection: sqlite3.Connection):
+            connection.execute(
+                "INSERT OR REPLACE INTO a2a_contexts (agent, id, expires_at, data) VALUES (?, ?, ?, ?)",
+                (self.agent, context_id, time.time() + self.ttl, data),
+            )
+
+        await self._run(write)
+
+    def purge(self, connection: sqlite3.Connection) -> Dict[str, int]:
+        """刪除過期或超過上限的結束任務與 context；超過 TTL 仍未結束的任務（worker 已中止）標為 failed"""
+        now = time.time()
+        stale = connection.execute(
+            "SELECT id, data FROM a2a_tasks WHERE agent = ? AND expires_at IS NULL AND updated_at < ?",
+            (self.agent, now - self.ttl),
+        ).fetchall()
+        for task_id, data in stale:
+            task = json.loads(data)
+            task["status"] = TaskStatus(state="failed", timestamp=datetime.now().isoformat())
+            self._write_task(connection, task)
+
+        connection.execute("DELETE FROM a2a_tasks WHERE agent = ? AND expires_at <= ?", (self.agent, now))
+        connection.execute("DELETE FROM a2a_contexts WHERE agent = ? AND expires_at <= ?", (self.agent, now))
+        counts = dict(connection.execute(
+            "SELECT expires_at IS NULL, COUNT(*) FROM a2a_tasks WHERE agent = ? GROUP BY 1", (self.agent,)
+        ).fetchall())
+        active, terminal = counts.get(1, 0), counts.get(0, 0)
+        overflow = active + terminal - self.max_entries
+        if overflow > 0 and terminal:
+            connection.execute(
+                "DELETE FROM a2a_tasks WHERE id IN (SELECT id FROM a2a_tasks WHERE agent = ? AND expires_at IS NOT NULL "
+                "ORDER BY expires_at LIMIT ?)", (self.agent, min(overflow, terminal)),
+            )
+            terminal -= min(overflow, terminal)
+        connection.execute(
+            "DELETE FROM a2a_contexts WHERE agent = ? AND id IN (SELECT id FROM a2a_contexts WHERE agent = ? "
+            "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)", (self.agent, self.agent, self.max_entries),
+        )
+        contexts = connection.execute("SELECT COUNT(*) FROM a2a_contexts WHERE agent = ?", (self.agent,)).fetchone()[0]
+        page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+        page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+
+        stats = {"active": active, "terminal": terminal, "contexts": contexts, "bytes": page_count * page_size}
+        attributes = {"agent": self.agent}
+        _tasks_gauge.set(active, {**attributes, "state": "active"})
+        _tasks_gauge.set(terminal, {**attributes, "state": "terminal"})
+        _contexts_gauge.set(contexts, attributes)
+        _bytes_gauge.set(stats["bytes"], attributes)
+        if stale:
+            logfire.warning(f"{self.agent} 有 {len(stale)} 個逾時未結束的任務，已標為 failed")
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def build_task_storage(agent_name: str) -> Storage:
+    """依 A2A_TASK_STORE（memory / sqlite）建立 agent 的任務儲存"""
+    if SETTINGS.A2A_TASK_STORE == "sqlite":
+        return SqliteTaskStorage(agent_name)
+    if SETTINGS.A2A_TASK_STORE == "memory":
+        return BoundedTaskStorage(agent_name)
+    raise ValueError(f"未知的 A2A_TASK_STORE: {SETTINGS.A2A_TASK_STORE}")
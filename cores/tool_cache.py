@@ -0,0 +1,139 @@
+"""
+工具結果快取
+process_data 這類 嵌入 → Milvus 查詢 → 格式化 的工具結果，以 (agent, 正規化查詢, 集合版本) 為鍵快取，
+TTL 到期或超過容量（LRU）時淘汰；同一行程（a2a_services.py）內的所有 agent 共用。
+匯入資料時 bump_collection_version() 更新版本檔，鍵隨之改變，舊結果不再命中
+"""
+import functools
+import json
+import os
+import pathlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import logfire
+
+from cores.settings import SETTINGS
+
+_cache_counter = logfire.metric_counter(
+    "tool_cache.requests", unit="1", description="工具結果快取查詢次數，依 agent 與 result（hit / miss）區分")
+
+
+def normalize_query(text: str) -> str:
+    """全半形統一、小寫、合併空白並去除結尾標點，讓措辭相同的問題共用快取"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip(" ?!.。？！～~")
+
+
+class ToolResultCache:
+    """TTL + LRU 的執行緒安全快取"""
+
+    def __init__(self, max_entries: int = None, ttl: float = None):
+        self.max_entries = max_entries or SETTINGS.TOOL_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else SETTINGS.TOOL_CACHE_TTL
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _record(self, agent: str, result: str):
+        stats = self._stats.setdefault(agent, {"hits": 0, "misses": 0})
+        stats["hits" if result == "hit" else "misses"] += 1
+        _cache_counter.add(1, {"agent": agent, "result": result})
+
+    def get(self, agent: str, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._record(agent, "hit")
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self._record(agent, "miss")
+            return None
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """每個 agent 的命中次數與命中率"""
+        with self._lock:
+            return {
+                agent: {**counts, "hit_rate": round(counts["hits"] / (counts["hits"] + counts["misses"]), 4)}
+                for agent, counts in self._stats.items()
+            }
+
+
+_cache = ToolResultCache()
+
+_versions: Dict[str, int] = {}
+_versions_mtime_ns: Optional[int] = None
+_versions_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolResultCache:
+    """取得行程內共用的工具結果快取"""
+    return _cache
+
+
+def get_collection_versions() -> Dict[str, int]:
+    """讀取集合版本檔（依 mtime 快取）；檔案不存在時所有集合版本為 0"""
+    global _versions, _versions_mtime_ns
+    path = pathlib.Path(SETTINGS.COLLECTION_VERSIONS_PATH)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if mtime_ns != _versions_mtime_ns:
+        with _versions_lock:
+            if mtime_ns != _versions_mtime_ns:
+                _versions = json.loads(path.read_text())
+                _versions_mtime_ns = mtime_ns
+    return _versions
+
+
+def bump_collection_version(collection_name: str) -> int:
+    """集合資料變更後遞增版本，使相關的工具快取失效"""
+    path = pathlib.Path(SETTINGS.COLLECTION_VERSIONS_PATH)
+    with _versions_lock:
+        versions = json.loads(path.read_text()) if path.exists() else {}
+        versions[collection_name] = versions.get(collection_name, 0) + 1
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(versions, ensure_ascii=False))
+        os.replace(tmp_path, path)
+    logfire.info(f"集合 {collection_name} 版本更新", version=versions[collection_name])
+    return versions[collection_name]
+
+
+def cached_tool(agent: str, collections: Sequence[str]) -> Callable:
+    """快取 (query: str) -> str 工具的結果；例外不快取"""
+
+    def decorator(fn: Callable[[str], str]) -> Callable[[str], str]:
+        @functools.wraps(fn)
+        def wrapper(data: str) -> str:
+            versions = get_collection_versions()
+            key = (agent, normalize_query(data), tuple(versions.get(name, 0) for name in collections))
+            result = _cache.get(agent, key)
+            if result is None:
+                result = fn(data)
+                _cache.set(key, result)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,107 @@
+"""
+服務啟動預熱
+SentenceTransformer、Milvus 集合、LLM provider 的 HTTP 連線與 pydantic_ai agent 都在第一次使用時才初始化，
+部署後的第一批請求因此特別慢。Warmup 在服務啟動後於背景依序執行各元件的預熱，
+記錄每個元件耗時；完成前 GET /ready 回傳 503，完成後回傳 200（預熱失敗的元件列在 errors，不影響就緒）
+"""
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import logfire
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from cores.storages import generate_embedding, get_client
+
+_warmup_histogram = logfire.metric_histogram(
+    "warmup.duration", unit="s", description="服務啟動預熱耗時，依 service 與 component 區分")
+
+WarmupStep = Tuple[str, Callable[[], Any]]
+
+
+def warm_embedding_model():
+    """第一次 encode 會載入權重並初始化 kernel"""
+    generate_embedding("warmup")
+
+
+def warm_collection(collection_name: str):
+    """對集合送出一次搜尋，確認連線並讓集合載入記憶體"""
+    get_client().search(
+        collection_name=collection_name,
+        data=[generate_embedding("warmup")],
+        limit=1,
+        output_fields=["id"],
+    )
+
+
+async def warm_llm_connection(model):
+    """以 models.list 建立到 LLM provider 的連線（TLS 握手、連線池），不消耗 token"""
+    client = getattr(model, "client", None)
+    if client is None or not hasattr(client, "models"):
+        return
+    await client.with_options(max_retries=0, timeout=10).models.list()
+
+
+async def warm_agent(agent):
+    """以不呼叫工具的 TestModel 執行一次 agent，預先建立工具 schema 與 instrumentation"""
+    from pydantic_ai.models.test import TestModel
+
+    with agent.override(model=TestModel(call_tools=[])):
+        await agent.run("warmup")
+
+
+class Warmup:
+    """依序執行預熱步驟並提供 /ready"""
+
+    def __init__(self, service: str, steps: Sequence[WarmupStep]):
+        self.service = service
+        self.steps: List[WarmupStep] = list(steps)
+        self.durations: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.ready = False
+        self._task: Optional[asyncio.Task] = None
+        self.routes = [Route("/ready", self.ready_endpoint, methods=["GET"])]
+
+    async def run(self):
+        started_at = time.perf_counter()
+        for component, fn in self.steps:
+            step_started_at = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(fn):
+                    await fn()
+                else:
+                    # CPU 密集的步驟（encode）放到執行緒，預熱期間 /ready 仍可回應
+                    await asyncio.to_thread(fn)
+            except Exception as e:
+                self.errors[component] = f"{type(e).__name__}: {e}"
+                logfire.warning(f"{self.service} 預熱 {component} 失敗: {e}")
+            finally:
+                self.durations[component] = round(time.perf_counter() - step_started_at, 4)
+                _warmup_histogram.record(self.durations[component], {"service": self.service, "component": component})
+        self.durations["total"] = round(time.perf_counter() - started_at, 4)
+        self.ready = True
+        logfire.info(f"{self.service} 預熱完成", durations=self.durations, errors=self.errors)
+
+    def start(self):
+        """在背景開始預熱"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def wait(self):
+        """等待背景預熱結束"""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {"service": self.service, "ready": self.ready, "durations": self.durations, "errors": self.errors}
+
+    async def ready_endpoint(self, request: Request) -> JSONResponse:
+        return JSONResponse(self.status(), status_code=200 if self.ready else 503)
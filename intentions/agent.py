@@ -1,32 +1,56 @@
-from typing import Dict
+from typing import Dict, Optional
 
 import logfire
 from pydantic_ai import Agent
 
+from cores.llm import get_model
 from intentions.router import RouterOutput, IntentionRouter
 
-router_config = IntentionRouter()
+_router: Optional[IntentionRouter] = None
+_router_agent: Optional[Agent] = None
 
-# 建立分類代理
-router_agent = Agent(
-    "openai:gpt-4",
-    system_prompt=f"""你是一個智能客服路由器，負責將用戶查詢分派給最適合的專業代理。
+
+def get_intention_router() -> IntentionRouter:
+    """第一次使用時才建立 IntentionRouter（載入編碼器並編碼所有意圖範例）"""
+    global _router
+    if _router is None:
+        _router = IntentionRouter()
+    return _router
+
+
+def get_router_agent() -> Agent:
+    """建立分類代理"""
+    global _router_agent
+    if _router_agent is None:
+        _router_agent = Agent(
+            get_model("gpt-4"),
+            system_prompt=f"""你是一個智能客服路由器，負責將用戶查詢分派給最適合的專業代理。
 
 可用的代理類型：
-{router_config.build_categories_description()}
+{get_intention_router().build_categories_description()}
 
 請根據用戶查詢內容，選擇最適合的代理並說明理由。
 """,
-    output_type=RouterOutput,
-    instrument=True,
-)
+            output_type=RouterOutput,
+            instrument=True,
+        )
+    return _router_agent
+
+
+def __getattr__(name: str):
+    """相容舊的 `router_config` / `router_agent` 模組屬性，存取時才建立"""
+    if name == "router_config":
+        return get_intention_router()
+    if name == "router_agent":
+        return get_router_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 @logfire.instrument('ai-agent-classify_intent')
 async def classify_intent(query: str, context: Dict = None):
     """分類用戶意圖"""
     # 先使用向量相似度快速匹配
-    routing_result = router_config.route_with_context(query, context)
+    routing_result = get_intention_router().route_with_context(query, context)
     logfire.info("classify_intent.routing_result", routing_result=routing_result)
 
     # 如果置信度較低，使用 LLM 進行二次判斷
@@ -41,7 +65,7 @@ async def classify_intent(query: str, context: Dict = None):
 
 請重新評估並選擇最適合的代理。
 """
-        llm_result = await router_agent.run(prompt)
+        llm_result = await get_router_agent().run(prompt)
         return llm_result.output
 
     return RouterOutput(
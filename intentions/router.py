@@ -8,7 +8,6 @@ from typing import Dict
 import logfire
 from pydantic import BaseModel, Field
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from pydantic_ai import Agent
 
 
@@ -27,7 +26,8 @@ class IntentionRouter:
         intentions_path = pathlib.Path("dummy_data/intentions.json")
         self.intentions_config = json.load(intentions_path.open())
 
-        # 初始化語意編碼器
+        # 初始化語意編碼器（sentence_transformers 匯入需數秒，建立 router 時才載入）
+        from sentence_transformers import SentenceTransformer
         self.encoder = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
 
         # 建立意圖向量索引
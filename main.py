@@ -1,13 +1,26 @@
+import functools
+import math
+import time
 import traceback
+from contextlib import asynccontextmanager
 from http.client import HTTPException
 
 import uvicorn
 import logfire
 
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import JSONResponse
+from cores import constants
+from cores.a2a_transport import close_transports, get_transport
+from cores.llm import close_http_client, http_stats
+from cores.llm_cache import get_llm_cache
+from cores.llm_scheduler import LlmBusyError, get_scheduler
 from cores.settings import SETTINGS
-from orchestrator import Orchestrator
+from cores.warmup import Warmup, warm_agent, warm_llm_connection
+from intentions.agent import get_intention_router
+from orchestrator import Orchestrator, model as orchestrator_model
 from pydantic import BaseModel
+from utils.order_fast_path import answer_order_status
 
 logfire.configure(
     send_to_logfire=False,
@@ -16,10 +29,49 @@ logfire.configure(
     scrubbing=False,
 )
 
-app = FastAPI()
-orchestrator = Orchestrator()
 
-logfire.instrument_fastapi(app)
+async def warm_inprocess_service(service: str):
+    """啟動 in-process agent，並等待它自己的預熱完成"""
+    transport = get_transport(service)
+    await transport.start()
+    await transport.app.state.warmup.wait()
+
+
+def build_warmup(orchestrator: Orchestrator) -> Warmup:
+    """意圖分類的編碼器、LLM 連線、orchestrator agent 與 in-process agent 的預熱步驟"""
+    steps = []
+    if SETTINGS.WARMUP_ENABLED:
+        steps.append(("intent_encoder", lambda: get_intention_router().encoder.encode(["warmup"])))
+        steps.append(("llm_connection", functools.partial(warm_llm_connection, orchestrator_model)))
+        steps.append(("agent", functools.partial(warm_agent, orchestrator.orchestrator_agent)))
+        for service, config in constants.A2A_SERVICES.items():
+            if config["transport"] == "inprocess":
+                steps.append((f"inprocess:{service}", functools.partial(warm_inprocess_service, service)))
+    return Warmup("main", steps)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """建立 orchestrator 並在背景預熱；關閉時釋放 A2A 傳輸與 LLM HTTP client"""
+    app.state.orchestrator = Orchestrator()
+    app.state.warmup = build_warmup(app.state.orchestrator)
+    app.state.warmup.start()
+    yield
+    await app.state.warmup.stop()
+    await close_transports()
+    await close_http_client()
+
+
+def create_app() -> FastAPI:
+    """建立 FastAPI app；重資源（模型、連線）在 lifespan 或第一次使用時才建立"""
+    app = FastAPI(lifespan=lifespan)
+    logfire.instrument_fastapi(app)
+    app.include_router(router)
+    return app
+
+
+chat_latency = logfire.metric_histogram(
+    "chat.latency", unit="ms", description="/chat 處理時間，依 path（fast / agent）區分")
 
 
 class ProcessRequest(BaseModel):
@@ -32,17 +84,52 @@ class ProcessResponse(BaseModel):
     error: str = None
 
 
-@app.post("/chat", response_model=ProcessResponse)
-async def process_request(payload: ProcessRequest):
+router = APIRouter()
+
+
+@router.get("/ready")
+async def ready(request: Request):
+    """預熱完成後回傳 200，並附上各元件預熱耗時"""
+    warmup = request.app.state.warmup
+    return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
+
+
+@router.get("/llm/stats")
+async def llm_stats():
+    """共用 LLM HTTP client 的連線重用率、請求延遲、排程器狀態與回應快取命中率"""
+    cache = get_llm_cache()
+    return {"http": http_stats.snapshot(), "scheduler": get_scheduler().report(),
+            "cache": None if cache is None else cache.report()}
+
+
+@router.post("/chat", response_model=ProcessResponse)
+async def process_request(payload: ProcessRequest, request: Request):
+    orchestrator = request.app.state.orchestrator
+    started_at = time.perf_counter()
     try:
+        # 單純的訂單狀態查詢直接以模板回覆，不經過 LLM
+        if SETTINGS.ORDER_FAST_PATH and (result := await answer_order_status(payload.message)) is not None:
+            chat_latency.record((time.perf_counter() - started_at) * 1000, {"path": "fast"})
+            return ProcessResponse(status="success", result=result)
+
         reference_result = await orchestrator.route_task(payload.model_dump())
         result = await orchestrator.preprocess_answer(payload.model_dump(), reference_result)
+        chat_latency.record((time.perf_counter() - started_at) * 1000, {"path": "agent"})
         return ProcessResponse(status="success", result=result)
+    except LlmBusyError as e:
+        # provider 限流且重試用盡：回 503 與 Retry-After，讓前端稍後重送
+        logfire.warning(f"LLM 限流，請求未完成: {e}")
+        response = ProcessResponse(status="busy", result="目前詢問人數較多，請稍後再試", error=str(e))
+        return JSONResponse(response.model_dump(), status_code=503,
+                            headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         logfire.error(f"Processing error: {str(e)}", exc_info=traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
 
+app = create_app()
+
+
 if __name__ == "__main__":
     # 運行主要的協調服務
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,24 +1,19 @@
-import asyncio
-from uuid import uuid4
-
-import httpx
 import logfire
-from fasta2a.schema import MessageSendConfiguration
 
 from pydantic import Field
 from typing import Any, List
 from pydantic_ai import Agent
 from pydantic_ai.tools import Tool
-from pydantic_ai.models.openai import OpenAIChatModel
 from pydantic import BaseModel
 
-from fasta2a.client import A2AClient, Message
-
 from cores import constants
+from cores.a2a_transport import get_transport
+from cores.llm import get_model
+from cores.llm_scheduler import PRIORITY_HIGH, llm_priority
 from cores.settings import SETTINGS
-from intentions.agent import router_config, classify_intent
+from intentions.agent import classify_intent, get_intention_router
 
-model = OpenAIChatModel("gpt-4.1", provider='openai')
+model = get_model("gpt-4.1")
 
 
 class ServiceContext(BaseModel):
@@ -29,14 +24,8 @@ class ServiceContext(BaseModel):
 
 class Orchestrator:
     def __init__(self):
-        # A2A 服務端點
+        # A2A 服務端點與傳輸方式（http / inprocess）
         self.services = constants.A2A_SERVICES
-        self.default_timeout = httpx.Timeout(
-            connect=10,
-            read=60 * 2,  # 2分鐘讀取超時
-            write=10,
-            pool=10
-        )
 
         self.orchestrator_agent = Agent(
             model,
@@ -52,53 +41,21 @@ class Orchestrator:
             if _ctx.service not in self.services:
                 result.append(f"未知的服務: {_ctx.service}: {_ctx.msg}")
                 continue
-            async with httpx.AsyncClient(timeout=self.default_timeout) as http_client:
-                a2a_client = A2AClient(
-                    base_url=self.services[_ctx.service],
-                    http_client=http_client
-                )
-
-                # 設定 blocking 配置
-                configuration = MessageSendConfiguration(
-                    accepted_output_modes=["text/plain", "application/json"],
-                    blocking=False
-                )
-
-                message = Message(
-                    role='user',
-                    kind='message',
-                    message_id=f"msg_{_ctx.service}_{uuid4().hex[:8]}",
-                    parts=[{"kind": "text", "text": _ctx.msg}]
-                )
-
-                response = await a2a_client.send_message(
-                    message=message,
-                    configuration=configuration
-                )
-                task_status = response
-                async with asyncio.timeout(60*5):
-                    try:
-                        if task_id := response["result"]["id"]:
-                            while True:
-                                task_status = await a2a_client.get_task(task_id)
-                                logfire.info(f"A2A get task route", task_status=task_status)
-                                if task_status["result"]["status"]["state"] in ['completed', 'failed']:
-                                    break
-                                await asyncio.sleep(1)
-                    except asyncio.TimeoutError:
-                        logfire.error(f"A2A get task timeout")
-
-                logfire.info(f"A2A send message route", response=task_status)
-
-                if 'result' in task_status and 'artifacts' in task_status['result']:
-                    combine_text = ''
-                    for artifact in task_status['result']['artifacts']:
-                        for part in artifact.get('parts', []):
-                            if part.get('kind') == 'text':
-                                combine_text += part.get('text', '') + '\n'
-                    result.append(combine_text.strip())
-                else:
-                    result.append(f"服務 {_ctx.service} 沒有返回預期結果")
+            task_status = await get_transport(_ctx.service).run(_ctx.msg)
+            logfire.info(f"A2A send message route", response=task_status)
+
+            if task_status.get('result', {}).get('status', {}).get('state') == 'rejected':
+                # agent 任務佇列已滿，不再等待
+                result.append(f"服務 {_ctx.service} 目前忙碌中，請稍後再試")
+            elif 'result' in task_status and 'artifacts' in task_status['result']:
+                combine_text = ''
+                for artifact in task_status['result']['artifacts']:
+                    for part in artifact.get('parts', []):
+                        if part.get('kind') == 'text':
+                            combine_text += part.get('text', '') + '\n'
+                result.append(combine_text.strip())
+            else:
+                result.append(f"服務 {_ctx.service} 沒有返回預期結果")
         return '\n'.join(result)
 
     @logfire.instrument('ai-agent-router')
@@ -129,7 +86,7 @@ class Orchestrator:
 - 絕對不要編造或假設用戶ID、訂單ID等敏感資訊
 
 可用服務 maintains：
-{router_config.build_categories_description()}
+{get_intention_router().build_categories_description()}
 '''
         logfire.info("enhanced prompt", enhanced_prompt=enhanced_prompt)
         # 使用 orchestrator agent 來決定如何處理
@@ -160,5 +117,7 @@ class Orchestrator:
 - 資料不足：說明「目前無法確認」並提供替代方案
 - 只使用工具提供的圖片連結，不外抓圖片
 '''
-        result = await preprocess_agent.run(enhanced_prompt)
+        # 已完成前面步驟的請求優先取得 LLM 額度，尖峰時先讓進行中的對話收尾
+        with llm_priority(PRIORITY_HIGH):
+            result = await preprocess_agent.run(enhanced_prompt)
         return result.output
@@ -6,6 +6,8 @@ import pandas as pd
 from pydantic import Field
 from pydantic_ai import Agent
 
+from cores.llm import get_model
+from cores.llm_cache import get_llm_cache
 from intentions.router import IntentionRouter
 
 
@@ -14,8 +16,9 @@ class CheckerModel(pydantic.BaseModel):
     reason: str = Field(..., description="精準說明差異的原因")
 
 
+# 評分也走共用的 model（LLM_CACHE_MODE=record / replay 時可離線重跑）
 checker_agent = Agent(
-    "openai:gpt-4.1-mini",
+    get_model("gpt-4.1-mini"),
     system_prompt=f"""你是一個 AI 測試兼客服專家，你將會幫我判斷兩段句子語意符合度
 會提供 0~100% 精確比率
 """,
@@ -62,6 +65,8 @@ async def main():
         raise e
     finally:
         df.to_csv('dummy_data/updated_test_data.csv', index=False)
+        if (cache := get_llm_cache()) is not None:
+            print("LLM cache:", cache.report())
 
 async def test():
     llm_result = await sentence_checker(
@@ -0,0 +1,85 @@
+"""
+A2A 傳輸 overhead benchmark
+以回傳固定文字的 stub agent（TestModel，不呼叫 LLM）隔離傳輸成本，
+比較 HTTP（localhost uvicorn）與 in-process 傳輸每次 send_message → 任務完成 的延遲
+
+export PYTHONPATH=$PWD
+python3 scripts/bench_a2a_transport.py --calls 200 --concurrency 4 --poll-interval 0.01
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import time
+
+import logfire
+import uvicorn
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from cores.a2a_transport import HttpA2ATransport, InProcessA2ATransport
+
+
+def build_stub_app(url: str):
+    agent = Agent(TestModel(custom_output_text="stub answer"))
+    return agent.to_a2a(name="stub_service", url=url)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100)[q - 1] * 1000
+
+
+async def measure(name, transport, calls, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            started_at = time.perf_counter()
+            task_status = await transport.run(f"question {i}")
+            latencies.append(time.perf_counter() - started_at)
+            assert task_status["result"]["status"]["state"] == "completed", task_status
+
+    await transport.run("warmup")
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started_at
+    print(f"{name:<10} p50={percentile(latencies, 50):7.2f}ms  p99={percentile(latencies, 99):7.2f}ms  "
+          f"throughput={calls / elapsed:7.1f}/s")
+
+
+async def main(calls: int, concurrency: int, poll_interval: float):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+
+    server = uvicorn.Server(uvicorn.Config(build_stub_app(url), host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    http_transport = HttpA2ATransport("stub_agent", url, poll_interval=poll_interval)
+    inprocess_transport = InProcessA2ATransport("stub_agent", app=build_stub_app(url), poll_interval=poll_interval)
+    try:
+        await measure("http", http_transport, calls, concurrency)
+        await measure("inprocess", inprocess_transport, calls, concurrency)
+    finally:
+        await http_transport.close()
+        await inprocess_transport.close()
+        server.should_exit = True
+        await server_task
+
+
+if __name__ == "__main__":
+    logfire.configure(send_to_logfire=False, console=False)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--poll-interval", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.concurrency, args.poll_interval))
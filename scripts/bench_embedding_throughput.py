@@ -0,0 +1,58 @@
+"""
+匯入路徑嵌入吞吐量 benchmark（rows/s）
+比較逐筆 generate_embedding 與不同 batch size 的批次編碼
+
+export PYTHONPATH=$PWD
+python3 scripts/bench_embedding_throughput.py --rows 5000 --batch-sizes 32 128 512
+"""
+import argparse
+import pathlib
+import time
+
+import logfire
+import pandas as pd
+
+from cores.storages import initialize_milvus, generate_embedding
+from utils.parser import build_faq_documents, prepare_faq_data
+
+
+def synthetic_faqs(rows: int) -> pd.DataFrame:
+    """複製範例 FAQ 至指定筆數，並讓每筆文字不同以避免快取效應"""
+    base = pd.read_csv(pathlib.Path('dummy_data/ai-eng-test-sample-knowledges.csv'))
+    repeated = pd.concat([base] * (rows // len(base) + 1), ignore_index=True).iloc[:rows].copy()
+    repeated['id'] = [f"{doc_id}-{i}" for i, doc_id in enumerate(repeated['id'])]
+    repeated['content'] = [f"{content} #{i}" for i, content in enumerate(repeated['content'])]
+    return repeated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="嵌入吞吐量 benchmark")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 128, 512])
+    parser.add_argument("--skip-per-row", action="store_true", help="略過逐筆編碼基準")
+    args = parser.parse_args()
+
+    logfire.configure(send_to_logfire=False, service_name='ai_agent_crm-bench', console=False)
+    initialize_milvus()
+    df = synthetic_faqs(args.rows)
+
+    # 暖機，避免首次載入 kernel 影響結果
+    generate_embedding("warmup")
+
+    if not args.skip_per_row:
+        start = time.perf_counter()
+        _, texts = build_faq_documents(df)
+        for text in texts:
+            generate_embedding(text)
+        elapsed = time.perf_counter() - start
+        print(f"per-row        : {args.rows / elapsed:10.1f} rows/s ({elapsed:.2f}s)")
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        prepare_faq_data(df, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"batch_size={batch_size:<5}: {args.rows / elapsed:10.1f} rows/s ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
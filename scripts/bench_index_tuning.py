@@ -0,0 +1,117 @@
+"""
+向量索引調校 benchmark
+對 FAQ / 產品資料以不同索引類型與搜尋參數建立暫存集合，回報 recall@k 與搜尋延遲
+
+export PYTHONPATH=$PWD
+python3 scripts/bench_index_tuning.py --k 5
+"""
+import argparse
+import pathlib
+import statistics
+import time
+
+import logfire
+import numpy as np
+import pandas as pd
+
+from cores.schemas import get_collection_spec
+from cores.storages import (
+    initialize_milvus,
+    create_collection,
+    insert_data,
+    drop_collection,
+    get_client,
+    generate_embedding,
+)
+from utils.parser import prepare_faq_data, prepare_product_data
+
+# (index_type, build_params, [search_params...])
+INDEX_CANDIDATES = [
+    ("FLAT", {}, [{}]),
+    ("HNSW", {"M": 8, "efConstruction": 64}, [{"ef": 16}, {"ef": 32}, {"ef": 64}]),
+    ("HNSW", {"M": 16, "efConstruction": 200}, [{"ef": 16}, {"ef": 64}, {"ef": 128}]),
+    ("IVF_FLAT", {"nlist": 16}, [{"nprobe": 1}, {"nprobe": 4}, {"nprobe": 16}]),
+]
+
+DATASETS = {
+    "faqs": (pathlib.Path("dummy_data/ai-eng-test-sample-knowledges.csv"), prepare_faq_data),
+    "products": (pathlib.Path("dummy_data/ai-eng-test-sample-products.csv"), prepare_product_data),
+}
+
+
+def exact_top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    """以暴力 cosine 計算 ground truth"""
+    docs = doc_vectors / np.linalg.norm(doc_vectors, axis=1, keepdims=True)
+    queries = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    scores = queries @ docs.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def run_dataset(collection_name: str, queries: list, k: int) -> list:
+    csv_path, prepare = DATASETS[collection_name]
+    rows = prepare(pd.read_csv(csv_path))
+    ids = np.array([row["id"] for row in rows])
+    doc_vectors = np.array([row["vector"] for row in rows], dtype=np.float32)
+    query_vectors = np.array([generate_embedding(q) for q in queries], dtype=np.float32)
+    truth = [set(ids[idx]) for idx in exact_top_k(doc_vectors, query_vectors, k)]
+
+    base_spec = get_collection_spec(collection_name)
+    bench_collection = f"{collection_name}_index_bench"
+    client = get_client()
+    report = []
+
+    for index_type, build_params, search_params_list in INDEX_CANDIDATES:
+        spec = base_spec.with_vector_index(index_type=index_type, build_params=build_params)
+        create_collection(bench_collection, recreate=True, schema=spec)
+        insert_data(bench_collection, rows)
+
+        for search_params in search_params_list:
+            latencies = []
+            recalls = []
+            for query_vector, expected in zip(query_vectors.tolist(), truth):
+                start = time.perf_counter()
+                hits = client.search(
+                    collection_name=bench_collection,
+                    data=[query_vector],
+                    limit=k,
+                    output_fields=[],
+                    search_params={"metric_type": spec.vector_index.metric_type, "params": search_params},
+                )[0]
+                latencies.append((time.perf_counter() - start) * 1000)
+                found = {hit["id"] for hit in hits}
+                recalls.append(len(found & expected) / max(len(expected), 1))
+
+            report.append({
+                "collection": collection_name,
+                "index_type": index_type,
+                "build_params": build_params,
+                "search_params": search_params,
+                f"recall@{k}": round(statistics.mean(recalls), 4),
+                "p50_ms": round(statistics.median(latencies), 3),
+                "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            })
+
+    drop_collection(bench_collection)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Milvus 索引 recall / latency benchmark")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", default="dummy_data/test_data.csv", help="含 question 欄位的 CSV")
+    parser.add_argument("--collections", nargs="+", default=list(DATASETS))
+    args = parser.parse_args()
+
+    logfire.configure(send_to_logfire=False, service_name='ai_agent_crm-bench')
+    initialize_milvus()
+    queries = pd.read_csv(args.queries, dtype=str, keep_default_na=False)["question"].tolist()
+
+    report = []
+    for collection_name in args.collections:
+        report.extend(run_dataset(collection_name, queries, args.k))
+
+    print(pd.DataFrame(report).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
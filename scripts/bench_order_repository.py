@@ -0,0 +1,97 @@
+"""
+訂單查詢延遲 benchmark
+以合成資料建立不同大小的 SQLite 訂單表，量測依 user / order_id / status 查詢的 p50 / p99，
+索引正確時延遲不隨表大小成長
+
+export PYTHONPATH=$PWD
+python3 scripts/bench_order_repository.py --sizes 10000 100000 1000000 --queries 2000 --concurrency 8
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import logfire
+
+from cores.order_repository import SqliteOrderRepository
+
+STATUSES = ["processing", "shipped", "delivered", "cancelled"]
+ORDERS_PER_USER = 10
+
+
+def synthetic_orders(size: int):
+    """每位用戶 ORDERS_PER_USER 筆訂單"""
+    placed_at = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    for i in range(size):
+        yield {
+            "order_id": f"JTCG-{202500 + i % 12 + 1}-{i:08d}",
+            "user_id": f"u_{i // ORDERS_PER_USER:06d}",
+            "status": STATUSES[i % len(STATUSES)],
+            "carrier": "黑貓",
+            "tracking": f"T{i:010d}",
+            "eta": None,
+            "shipping_address": "台北市信義區",
+            "contact_phone": "0900000000",
+            "order_url": f"https://example.com/orders/{i}",
+            "placed_at": placed_at + datetime.timedelta(minutes=i),
+            "items": [{"sku": f"SKU-{i % 500:04d}", "qty": 1}],
+        }
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100)[q - 1] * 1000
+
+
+async def measure(name, fn, queries, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            started_at = time.perf_counter()
+            await fn(i)
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(queries)))
+    elapsed = time.perf_counter() - started_at
+    print(f"  {name:<18} p50={percentile(latencies, 50):7.3f}ms p99={percentile(latencies, 99):7.3f}ms "
+          f"qps={queries / elapsed:9.1f}")
+
+
+async def bench(size, queries, concurrency, pool_size):
+    with tempfile.TemporaryDirectory() as directory:
+        repository = SqliteOrderRepository(os.path.join(directory, "orders.db"), pool_size=pool_size)
+        started_at = time.perf_counter()
+        repository.upsert_orders(synthetic_orders(size))
+        print(f"size={size}: load {time.perf_counter() - started_at:.1f}s")
+
+        users = size // ORDERS_PER_USER
+        await measure("get_order", lambda i: repository.get_order(
+            f"JTCG-{202500 + (n := random.randrange(size)) % 12 + 1}-{n:08d}"), queries, concurrency)
+        await measure("list_user_orders", lambda i: repository.list_user_orders(
+            f"u_{random.randrange(users):06d}", limit=5), queries, concurrency)
+        await measure("list_by_status", lambda i: repository.list_user_orders(
+            f"u_{random.randrange(users):06d}", status="shipped"), queries, concurrency)
+        await repository.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="訂單查詢延遲 benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    logfire.configure(send_to_logfire=False, service_name='ai_agent_crm-bench', console=False)
+    for size in args.sizes:
+        asyncio.run(bench(size, args.queries, args.concurrency, args.pool_size))
+
+
+if __name__ == "__main__":
+    main()
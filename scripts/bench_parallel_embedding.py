@@ -0,0 +1,46 @@
+"""
+多行程嵌入擴展性 benchmark
+以 1..N 個 worker 編碼同一批 FAQ 文字，回報 rows/s 與相對單 worker 的加速比
+
+export PYTHONPATH=$PWD
+python3 scripts/bench_parallel_embedding.py --rows 20000 --max-workers 8 --torch-threads 1
+"""
+import argparse
+import time
+
+import logfire
+
+from scripts.bench_embedding_throughput import synthetic_faqs
+from utils.parallel_embedding import ParallelEncoder
+from utils.parser import build_faq_documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="平行嵌入擴展性 benchmark")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument("--torch-threads", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=128)
+    args = parser.parse_args()
+
+    logfire.configure(send_to_logfire=False, service_name='ai_agent_crm-bench', console=False)
+    _, texts = build_faq_documents(synthetic_faqs(args.rows))
+
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        with ParallelEncoder(workers=workers, torch_threads=args.torch_threads,
+                             batch_size=args.batch_size) as encoder:
+            # 暖機：每個 worker 載入模型後再計時
+            encoder.encode(["warmup"] * workers * args.batch_size)
+            start = time.perf_counter()
+            encoder.encode(texts)
+            elapsed = time.perf_counter() - start
+
+        rows_per_second = args.rows / elapsed
+        baseline = baseline or rows_per_second
+        print(f"workers={workers:<3} torch_threads={args.torch_threads:<3} "
+              f"{rows_per_second:10.1f} rows/s  speedup x{rows_per_second / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
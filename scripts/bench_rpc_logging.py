@@ -0,0 +1,115 @@
+"""
+A2A RPC 記錄 middleware overhead benchmark
+直接以 ASGI 呼叫（不經網路）只讀取 body 並回應的 Starlette app，比較：
+不記錄 / 舊版（BaseHTTPMiddleware + request.body() 全量記錄）/ RpcLoggingMiddleware 各種策略
+的每個請求耗時；請求組成模擬 orchestrator：1 個 message/send 搭配多個 tasks/get 輪詢
+
+export PYTHONPATH=$PWD
+python3 scripts/bench_rpc_logging.py --requests 20000 --polls-per-send 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import logfire
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+from starlette.routing import Route
+
+from cores.rpc_logging import RpcLoggingMiddleware, RpcLogPolicy
+
+REDACT_KEYS = frozenset({"contact_phone", "shipping_address"})
+
+
+async def endpoint(request):
+    body = await request.body()
+    return Response(body[:64], media_type="application/json")
+
+
+def build_app():
+    return Starlette(routes=[Route("/", endpoint, methods=["POST"])])
+
+
+def legacy_app():
+    app = build_app()
+
+    @app.middleware("http")
+    async def log_rpc(request, call_next):
+        body = await request.body()
+        logfire.info("bench RPC Request", method=request.method, url=str(request.url),
+                     body=body.decode() if body else None, service="bench")
+        return await call_next(request)
+
+    return app
+
+
+def with_policy(policy: RpcLogPolicy):
+    app = build_app()
+    app.add_middleware(RpcLoggingMiddleware, service_name="bench", policy=policy)
+    return app
+
+
+def rpc_bodies(polls_per_send: int):
+    send = json.dumps({
+        "jsonrpc": "2.0", "id": "1", "method": "message/send",
+        "params": {"message": {"role": "user", "kind": "message", "message_id": "m1", "parts": [
+            {"kind": "text", "text": "查詢訂單 JTCG-202508-10001，聯絡電話 0912345678 " * 10}]}},
+    }).encode()
+    poll = json.dumps({"jsonrpc": "2.0", "id": None, "method": "tasks/get", "params": {"id": "task-1"}}).encode()
+    return [send] + [poll] * polls_per_send
+
+
+async def call(app, body: bytes):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+             "path": "/", "raw_path": b"/", "query_string": b"", "root_path": "",
+             "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+             "server": ("127.0.0.1", 8000), "client": ("127.0.0.1", 5000)}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(name, app, requests: int, polls_per_send: int):
+    bodies = rpc_bodies(polls_per_send)
+    for body in bodies:
+        await call(app, body)
+    latencies = []
+    for i in range(requests):
+        started_at = time.perf_counter()
+        await call(app, bodies[i % len(bodies)])
+        latencies.append(time.perf_counter() - started_at)
+    print(f"{name:<28} mean={statistics.fmean(latencies) * 1e6:8.1f}µs  "
+          f"p99={statistics.quantiles(latencies, n=100)[98] * 1e6:8.1f}µs")
+
+
+async def main(requests: int, polls_per_send: int):
+    variants = [
+        ("no logging", build_app()),
+        ("legacy (full body)", legacy_app()),
+        ("all methods, 100%", with_policy(RpcLogPolicy(redact_keys=REDACT_KEYS))),
+        ("message/send only, 100%", with_policy(RpcLogPolicy(methods=frozenset({"message/send"}),
+                                                              redact_keys=REDACT_KEYS))),
+        ("message/send only, 10%", with_policy(RpcLogPolicy(sample_rate=0.1, methods=frozenset({"message/send"}),
+                                                             redact_keys=REDACT_KEYS))),
+        ("disabled (0%)", with_policy(RpcLogPolicy(sample_rate=0))),
+    ]
+    for name, app in variants:
+        await measure(name, app, requests, polls_per_send)
+
+
+if __name__ == "__main__":
+    logfire.configure(send_to_logfire=False, console=False)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--polls-per-send", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.polls_per_send))
@@ -0,0 +1,81 @@
+"""
+兩階段檢索傳輸量 benchmark
+以相同的候選數、逐筆查詢、冷的 payload 快取比較：
+- full：search_many 一次取回 candidates 筆完整 payload
+- two-phase：search_two_phase 取同樣 candidates 筆（只看拆成 id 搜尋 + payload 取回本身的差異）
+- two-phase + keep/threshold：只為前 keep 筆（及通過分數門檻者）取 payload，節省量另外列出
+每筆查詢前清空 payload 快取，快取命中不會被算成 0 bytes；兩者的耗時都包含查詢編碼
+
+export PYTHONPATH=$PWD
+python3 scripts/bench_two_phase_retrieval.py --collection products --candidates 10 --keep 3
+"""
+import argparse
+import time
+
+import logfire
+import pandas as pd
+
+from cores.storages import (
+    initialize_milvus,
+    generate_embedding,
+    search_many,
+    search_two_phase,
+    clear_payload_cache,
+    get_transfer_stats,
+    reset_transfer_stats,
+)
+
+
+def run_two_phase(collection: str, queries, limit: int, score_threshold: float = None):
+    """逐筆執行兩階段檢索，每筆前清空 payload 快取，回傳 (bytes, 秒數, 統計)"""
+    reset_transfer_stats()
+    start = time.perf_counter()
+    for query in queries:
+        clear_payload_cache()
+        search_two_phase(collection, [generate_embedding(query)], limit=limit, score_threshold=score_threshold)
+    seconds = time.perf_counter() - start
+    stats = get_transfer_stats()
+    return stats["id_search_bytes"] + stats["payload_fetch_bytes"], seconds, stats
+
+
+def report(label: str, total_bytes: int, seconds: float, baseline: int):
+    saved = f", saved {100 * (1 - total_bytes / baseline):.1f}% vs full" if baseline else ""
+    print(f"{label:<32} {total_bytes:>10} bytes  {seconds:.3f}s{saved}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="兩階段檢索 bytes-transferred benchmark")
+    parser.add_argument("--collection", default="products")
+    parser.add_argument("--queries", default="dummy_data/test_data.csv", help="含 question 欄位的 CSV")
+    parser.add_argument("--candidates", type=int, default=10, help="向量搜尋取回的候選數")
+    parser.add_argument("--keep", type=int, default=3, help="實際使用的結果數")
+    parser.add_argument("--score-threshold", type=float, default=None)
+    args = parser.parse_args()
+
+    logfire.configure(send_to_logfire=False, service_name='ai_agent_crm-bench')
+    initialize_milvus()
+    queries = pd.read_csv(args.queries, dtype=str, keep_default_na=False)["question"].tolist()
+
+    reset_transfer_stats()
+    start = time.perf_counter()
+    for query in queries:
+        search_many(args.collection, [query], limit=args.candidates)
+    full_seconds = time.perf_counter() - start
+    full_bytes = get_transfer_stats()["full_search_bytes"]
+
+    split_bytes, split_seconds, _ = run_two_phase(args.collection, queries, args.candidates)
+    keep_bytes, keep_seconds, keep_stats = run_two_phase(args.collection, queries, args.keep, args.score_threshold)
+
+    print(f"queries: {len(queries)}, candidates: {args.candidates}, keep: {args.keep}, "
+          f"score threshold: {args.score_threshold}")
+    report("full payload search", full_bytes, full_seconds, full_bytes)
+    report("two-phase, same candidates", split_bytes, split_seconds, full_bytes)
+    report("two-phase + keep/threshold", keep_bytes, keep_seconds, full_bytes)
+    print(f"  id search {keep_stats['id_search_bytes']}, payload fetch {keep_stats['payload_fetch_bytes']}")
+    if split_bytes:
+        print(f"keep/threshold alone saves {100 * (1 - keep_bytes / split_bytes):.1f}% over two-phase "
+              f"with the same candidates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import pathlib
+import logfire
+import pandas as pd
+
+from cores.settings import SETTINGS
+from cores.storages import initialize_milvus, get_client
+from utils.compatibility import rebuild_compatibility_table
+from utils.ingestion import sync_collection
+from utils.parallel_embedding import ParallelEncoder
+from utils.pipeline import run_streaming_ingestion
+from utils.parser import (
+    build_faq_documents,
+    build_product_documents,
+    build_classification_documents,
+)
+
+SOURCES = {
+    "faqs": ('dummy_data/ai-eng-test-sample-knowledges.csv', build_faq_documents),
+    "products": ('dummy_data/ai-eng-test-sample-products.csv', build_product_documents),
+    "classification": ('dummy_data/faq-classification.csv', build_classification_documents),
+}
+
+
+def main():
+    """匯入 faqs / products / classification；多行程嵌入時必須在 main guard 內執行（spawn）"""
+    parser = argparse.ArgumentParser(description="增量匯入 faqs / products / classification")
+    parser.add_argument("--recreate", action="store_true", help="刪除並重建集合後全量匯入")
+    parser.add_argument("--stream", action="store_true", help="大型目錄：分塊串流匯入，可從 checkpoint 續跑")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--checkpoint", default=".ingestion_checkpoint.json")
+    parser.add_argument("--workers", type=int, default=SETTINGS.EMBEDDING_WORKERS, help="平行嵌入的行程數")
+    parser.add_argument("--torch-threads", type=int, default=SETTINGS.EMBEDDING_TORCH_THREADS,
+                        help="每個嵌入行程的 torch 執行緒數")
+    args = parser.parse_args()
+
+    logfire.configure(
+        send_to_logfire=False,
+        service_name='ai_agent_crm-dev',
+    )
+    initialize_milvus()
+    encoder = ParallelEncoder(workers=args.workers, torch_threads=args.torch_threads) if args.workers > 1 else None
+
+    report = {}
+    try:
+        for collection_name, (csv_path, build_documents) in SOURCES.items():
+            if args.stream:
+                report[collection_name] = run_streaming_ingestion(
+                    collection_name, csv_path, build_documents, chunk_size=args.chunk_size,
+                    checkpoint_path=args.checkpoint, encode_fn=encoder, recreate=args.recreate)
+            else:
+                documents, texts = build_documents(pd.read_csv(pathlib.Path(csv_path)))
+                report[collection_name] = sync_collection(collection_name, documents, texts,
+                                                          recreate=args.recreate, encode_fn=encoder)
+            if collection_name == "products":
+                # 商品規格變更後重建相容性對照表（分塊讀取，不需嵌入）
+                rebuild_compatibility_table(
+                    document
+                    for chunk in pd.read_csv(pathlib.Path(csv_path), chunksize=args.chunk_size)
+                    for document in build_documents(chunk)[0]
+                )
+    finally:
+        if encoder is not None:
+            encoder.close()
+
+    for collection_name, counts in report.items():
+        print(f"{collection_name}: {counts}")
+
+    client = get_client()
+    results = client.query(
+        collection_name="products",
+        filter="id > 0",
+        output_fields=["id","doc_id","doc_type","title","content","metadata",],
+        limit=10
+    )
+    print(results)
+
+
+if __name__ == "__main__":
+    main()
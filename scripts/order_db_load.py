@@ -0,0 +1,34 @@
+"""
+將 orders.json 匯入 SQLite 訂單資料庫（ORDER_BACKEND=sqlite 時使用）
+
+export PYTHONPATH=$PWD
+python3 scripts/order_db_load.py --source dummy_data/orders.json --db orders.db
+"""
+import argparse
+import time
+
+import logfire
+
+from cores.order_repository import SqliteOrderRepository
+from cores.settings import SETTINGS
+from utils.parser import iter_order_entities
+
+
+def main():
+    parser = argparse.ArgumentParser(description="orders.json 匯入 SQLite")
+    parser.add_argument("--source", default=SETTINGS.ORDER_DATA_PATH)
+    parser.add_argument("--db", default=SETTINGS.ORDER_DB_PATH)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    logfire.configure(send_to_logfire=False, service_name='ai_agent_crm-dev')
+    repository = SqliteOrderRepository(args.db)
+
+    start = time.perf_counter()
+    orders = (entity for kind, entity in iter_order_entities(args.source) if kind == "order")
+    total = repository.upsert_orders(orders, batch_size=args.batch_size)
+    print(f"{total} orders -> {args.db} ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+匯入時間 profile
+每個模組在獨立的 Python 行程中匯入，回報耗時、最慢的直接相依模組（-X importtime 的累計時間），
+並檢查 torch / sentence_transformers / pymilvus / openai 等重量級套件是否在匯入時就被載入
+
+export PYTHONPATH=$PWD
+python3 scripts/profile_imports.py orchestrator agents.a2a_apps intentions.agent main --top 5
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "pymilvus", "openai")
+DEFAULT_MODULES = ("orchestrator", "agents.a2a_apps", "intentions.agent", "main")
+
+_PROBE = """
+import json, sys, time
+started_at = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started_at
+print(json.dumps({{"seconds": elapsed, "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+_IMPORTTIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile_module(module: str, top: int):
+    """回傳 (耗時秒數, 已載入的重量級套件, 最慢的 top 個直接相依模組)"""
+    env = {**os.environ, "HF_HUB_OFFLINE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"匯入 {module} 失敗:\n{result.stderr[-2000:]}")
+
+    # importtime 以縮排表示層級，縮排三格的是 module 的直接相依
+    children = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match and len(match.group(2)) == 3:
+            children.append((int(match.group(1)) / 1e6, match.group(3)))
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    return probe["seconds"], probe["heavy"], sorted(children, reverse=True)[:top]
+
+
+def main(modules, top: int):
+    for module in modules:
+        seconds, heavy, children = profile_module(module, top)
+        print(f"{module:<20} {seconds * 1000:8.1f}ms  heavy={heavy or '-'}")
+        for child_seconds, child in children:
+            print(f"    {child:<40} {child_seconds * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+    main(args.modules, args.top)
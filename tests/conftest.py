@@ -0,0 +1,12 @@
+import pytest
+
+from cores.tool_cache import get_tool_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_tool_cache(tmp_path, monkeypatch):
+    """每個測試使用空的工具快取與獨立的集合版本檔"""
+    monkeypatch.setattr("cores.tool_cache.SETTINGS.COLLECTION_VERSIONS_PATH", str(tmp_path / "collection_versions.json"))
+    get_tool_cache().clear()
+    yield
+    get_tool_cache().clear()
@@ -0,0 +1,48 @@
+import asyncio
+from unittest.mock import patch
+
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from cores import a2a_transport
+from cores.a2a_transport import HttpA2ATransport, InProcessA2ATransport, get_transport
+
+
+def build_stub_app():
+    agent = Agent(TestModel(custom_output_text="stub answer"))
+    return agent.to_a2a(name="stub_service", url="http://localhost:0")
+
+
+class TestInProcessA2ATransport:
+    def test_run_completes_task(self):
+        """in-process 傳輸回傳與 HTTP 相同結構的已完成任務"""
+
+        async def run():
+            transport = InProcessA2ATransport("stub_agent", app=build_stub_app())
+            try:
+                first = await transport.run("hello")
+                second = await transport.run("again")
+            finally:
+                await transport.close()
+            return first, second
+
+        first, second = asyncio.run(run())
+        for task_status in (first, second):
+            assert task_status["result"]["status"]["state"] == "completed"
+            texts = [part["text"] for artifact in task_status["result"]["artifacts"]
+                     for part in artifact["parts"] if part["kind"] == "text"]
+            assert texts == ["stub answer"]
+
+
+class TestGetTransport:
+    def test_transport_follows_service_config(self):
+        """依 A2A_SERVICES 的 transport 設定選擇傳輸方式"""
+        services = {
+            "remote_agent": {"url": "http://localhost:8001", "transport": "http"},
+            "local_agent": {"url": "http://localhost:8002", "transport": "inprocess"},
+        }
+        with patch.object(a2a_transport.constants, "A2A_SERVICES", services), \
+                patch.dict(a2a_transport._transports, clear=True):
+            assert isinstance(get_transport("remote_agent"), HttpA2ATransport)
+            assert isinstance(get_transport("local_agent"), InProcessA2ATransport)
+            assert get_transport("local_agent") is get_transport("local_agent")
@@ -0,0 +1,92 @@
+import asyncio
+import dataclasses
+import inspect
+
+from fasta2a import broker as fasta2a_broker
+from fasta2a.worker import Worker
+from pydantic_ai import Agent, _a2a
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from cores.a2a_transport import InProcessA2ATransport, build_message
+from cores.agent_pool import AgentLimits, AgentPool, parse_agent_limits
+from cores.task_store import BoundedTaskStorage
+
+
+def build_pooled_app(release: asyncio.Event, limits: AgentLimits):
+    async def slow_model(messages, info):
+        await release.wait()
+        return ModelResponse(parts=[TextPart("done")])
+
+    agent = Agent(FunctionModel(slow_model))
+    storage = BoundedTaskStorage("test_agent")
+    pool = AgentPool("test_agent", agent, storage, limits=limits)
+    app = agent.to_a2a(storage=storage, broker=pool.broker, lifespan=pool.lifespan, routes=pool.routes)
+    return app, pool
+
+
+class TestAgentPool:
+    """agent 併發與有界佇列測試"""
+
+    def test_parse_agent_limits(self):
+        limits = parse_agent_limits("product_recommendation_agent:8:64, order_query_agent:2")
+        assert limits["product_recommendation_agent"] == AgentLimits(8, 64)
+        assert limits["order_query_agent"].concurrency == 2
+
+    def test_saturated_pool_rejects_and_runs_concurrently(self):
+        """worker 與佇列都滿時拒絕新任務，其餘任務並行完成"""
+
+        async def run():
+            release = asyncio.Event()
+            app, pool = build_pooled_app(release, AgentLimits(concurrency=2, queue_size=1))
+            transport = InProcessA2ATransport("test_agent", app=app, poll_interval=0.005)
+            try:
+                sent = []
+                for i in range(4):
+                    response = await transport.send_message(build_message("test_agent", f"q{i}"), {})
+                    sent.append(response["result"]["id"])
+                    await asyncio.sleep(0.01)
+                load = pool.load()
+                states = [(await transport.get_task(task_id))["result"]["status"]["state"] for task_id in sent]
+
+                release.set()
+                await asyncio.sleep(0.1)
+                final = [(await transport.get_task(task_id))["result"]["status"]["state"] for task_id in sent]
+            finally:
+                await transport.close()
+            return load, states, final
+
+        load, states, final = asyncio.run(run())
+        assert load == {"running": 2, "concurrency": 2, "queue_depth": 1, "queue_size": 1}
+        assert states == ["working", "working", "submitted", "rejected"]
+        assert final == ["completed", "completed", "completed", "rejected"]
+
+
+class TestPrivateInternals:
+    """AgentPool 依賴 fasta2a / pydantic_ai 的私有實作；套件升級改變這些實作時要在這裡明確失敗，而不是在服務中出錯"""
+
+    def test_fasta2a_broker_internals(self):
+        """BoundedBroker 自行建立 _write_stream / _read_stream 並送出 _RunTask"""
+        operation = fasta2a_broker._RunTask(operation="run", params={"id": "t1"}, _current_span=None)
+        assert operation == {"operation": "run", "params": {"id": "t1"}, "_current_span": None}
+
+        async def streams():
+            async with fasta2a_broker.InMemoryBroker() as broker:
+                received = asyncio.create_task(broker._read_stream.receive())
+                await broker.run_task({"id": "t1"})
+                assert (await received)["params"]["id"] == "t1"
+                return sorted(vars(broker))
+
+        assert {"_write_stream", "_read_stream", "aexit_stack"} <= set(asyncio.run(streams()))
+
+    def test_worker_loop_internals(self):
+        """PooledAgentWorker 開多個 _loop，並覆寫 _handle_task_operation 計算執行中任務"""
+        assert inspect.iscoroutinefunction(Worker._loop)
+        assert list(inspect.signature(Worker._handle_task_operation).parameters) == ["self", "task_operation"]
+        loop_source = inspect.getsource(Worker._loop)
+        assert "receive_task_operations" in loop_source and "_handle_task_operation" in loop_source
+        assert "self._loop" in inspect.getsource(Worker.run)
+
+    def test_pydantic_ai_agent_worker(self):
+        assert issubclass(_a2a.AgentWorker, Worker)
+        assert {"agent", "broker", "storage"} <= {field.name for field in dataclasses.fields(_a2a.AgentWorker)}
@@ -0,0 +1,63 @@
+import pathlib
+from unittest.mock import patch
+
+import pandas as pd
+
+from agents.models import CompatibilityQuery
+from utils.compatibility import CompatibilityTable
+from utils.parser import build_product_documents
+
+PRODUCTS_CSV = pathlib.Path(__file__).parent.parent / "dummy_data" / "ai-eng-test-sample-products.csv"
+
+
+def _table():
+    documents, _ = build_product_documents(pd.read_csv(PRODUCTS_CSV))
+    return CompatibilityTable.build(documents)
+
+
+class TestCompatibilityTable:
+    """相容性對照表測試"""
+
+    def test_compatible_skus(self):
+        """所有維度都相容的 SKU"""
+        table = _table()
+        assert table.compatible_skus(inch=32, kg=8, desk_mm=60) == ["JTCG-ARM-DUAL-PRO-32", "JTCG-ARM-ULTRAWIDE-49"]
+        assert table.compatible_skus(vesa="200x100") == ["JTCG-ARM-ULTRAWIDE-49"]
+        assert table.compatible_skus(inch=27, kg=20) == []
+
+    def test_check_sku_boundaries(self):
+        """範圍邊界與超出範圍；無該規格時為 None"""
+        table = _table()
+        assert table.check("JTCG-ARM-SINGLE-LITE-27", inch=27, vesa="100x100", kg=6) == \
+            {"inch": True, "vesa": True, "kg": True}
+        assert table.check("JTCG-ARM-SINGLE-LITE-27", inch=27.5, kg=6.2) == {"inch": False, "kg": False}
+        assert table.check("JTCG-WALL-ARM-34", desk_mm=40) == {"desk_mm": None}
+        assert table.check("JTCG-UNKNOWN", inch=27) is None
+
+    def test_range_boundaries_are_exact(self):
+        """範圍兩端的值相容，剛好超出範圍的值（包括和下限同一個 bucket 的值）不相容"""
+        table = CompatibilityTable.build([{"doc_id": "A", "weight_min_kg": 2, "weight_max_kg": 9,
+                                           "desk_min_mm": 10, "desk_max_mm": 85}])
+        assert table.check("A", kg=1.8, desk_mm=9.5) == {"kg": False, "desk_mm": False}
+        assert table.compatible_skus(kg=1.6) == []
+        assert table.check("A", kg=2, desk_mm=10) == {"kg": True, "desk_mm": True}
+        assert table.check("A", kg=9, desk_mm=85) == {"kg": True, "desk_mm": True}
+        assert table.check("A", kg=9.2, desk_mm=85.5) == {"kg": False, "desk_mm": False}
+        assert table.compatible_skus(kg=2.1, desk_mm=84.6) == ["A"]
+
+        fractional = CompatibilityTable.build([{"doc_id": "B", "weight_min_kg": 2.2, "weight_max_kg": 8.8}])
+        assert fractional.compatible_skus(kg=2.1) == []
+        assert fractional.compatible_skus(kg=2.2) == fractional.compatible_skus(kg=8.8) == ["B"]
+        assert fractional.compatible_skus(kg=8.9) == []
+
+    def test_round_trip(self, tmp_path):
+        """存檔後重新載入結果一致"""
+        table = _table()
+        path = tmp_path / "compatibility_table.json"
+        table.save(str(path))
+        with patch("utils.compatibility.SETTINGS") as settings:
+            settings.COMPATIBILITY_TABLE_PATH = str(path)
+            from agents.product_recommendation_agent import check_compatibility
+            result = check_compatibility(CompatibilityQuery(sku="JTCG-ARM-DUAL-PRO-32", screen_inch=27,
+                                                            vesa="100x100", weight_kg=7))
+        assert "相容" in result and "不相容" not in result
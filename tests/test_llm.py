@@ -0,0 +1,80 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from cores.llm import LazyModel, build_http_client, close_http_client, get_http_client, get_model, http_stats
+from cores.settings import SETTINGS
+
+
+class TestLazyModel:
+    """延遲建立 model 測試"""
+
+    def test_model_built_on_first_use(self):
+        """建立 Agent 不會呼叫 factory，第一次請求才建立並只建立一次"""
+        built = []
+
+        def factory():
+            built.append(1)
+            return TestModel(custom_output_text="ok")
+
+        model = LazyModel(factory, "test-model", system="test", profile=TestModel().profile)
+        agent = Agent(model)
+        assert built == [] and model.model_name == "test-model"
+
+        assert agent.run_sync("hi").output == "ok"
+        assert agent.run_sync("hi again").output == "ok"
+        assert built == [1]
+
+    def test_get_model_not_built_by_agent(self):
+        """Agent 建構時讀取 profile 也不會建立 OpenAI client"""
+        model = get_model("gpt-4.1-nano")
+        Agent(model)
+        assert model._wrapped is None and model.profile.supports_tools
+
+    def test_get_model_is_cached(self):
+        assert get_model("gpt-4.1") is get_model("gpt-4.1")
+        assert get_model("gpt-4.1") is not get_model("gpt-4")
+
+
+class FakeKeepAliveTransport(httpx.AsyncBaseTransport):
+    """模擬 httpcore：只有第一次請求建立新連線（觸發 connect_tcp trace），之後重用"""
+
+    def __init__(self):
+        self.connected = False
+
+    async def handle_async_request(self, request):
+        if not self.connected:
+            await request.extensions["trace"]("connection.connect_tcp.started", {})
+            self.connected = True
+        return httpx.Response(200, json={"ok": True})
+
+
+class TestSharedHttpClient:
+    """共用 LLM HTTP client 測試"""
+
+    def test_stats_count_connection_reuse(self):
+        async def run():
+            client = build_http_client(transport=FakeKeepAliveTransport())
+            async with client:
+                for _ in range(3):
+                    await client.get("https://api.openai.com/v1/models")
+
+        http_stats.reset()
+        asyncio.run(run())
+        stats = http_stats.snapshot()
+        assert stats["requests"] == 3
+        assert stats["new_connections"] == 1 and stats["reused_connections"] == 2
+        assert stats["mean_ms"] is not None
+
+    def test_models_share_one_client(self):
+        """不同 model 共用同一個 http client；關閉後 model 會以新的 client 重建"""
+        with patch.object(SETTINGS, "OPENAI_API_KEY", "sk-test"):
+            first, second = get_model("gpt-4.1"), get_model("gpt-4")
+            assert first.client._client is second.client._client is get_http_client()
+
+            asyncio.run(close_http_client())
+            assert first.client._client is get_http_client()
+            asyncio.run(close_http_client())
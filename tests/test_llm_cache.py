@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models import ModelRequestParameters
+from pydantic_ai.messages import ToolReturnPart
+from pydantic_ai.models.function import DeltaToolCall, FunctionModel
+from pydantic_ai.tools import ToolDefinition
+
+from cores.llm_cache import CachedModel, LlmCacheMiss, LlmResponseCache, cache_key
+
+
+def counting_model(calls: list, text: str = "answer") -> FunctionModel:
+    def respond(messages, info):
+        calls.append(messages)
+        return ModelResponse(parts=[TextPart(text)])
+
+    return FunctionModel(respond, model_name="fake")
+
+
+class TestLlmCache:
+    """LLM 回應快取測試"""
+
+    def test_key_ignores_timestamps_but_not_settings(self):
+        """同樣的 prompt 在不同次執行鍵相同；settings 或工具不同時鍵不同"""
+        calls = []
+        agent = Agent(counting_model(calls), system_prompt="sys")
+        agent.run_sync("hi")
+        agent.run_sync("hi")
+        first, second = calls
+        assert first[0].parts[0].timestamp != second[0].parts[0].timestamp
+
+        plain = ModelRequestParameters()
+        with_tool = ModelRequestParameters(function_tools=[ToolDefinition(name="lookup")])
+        assert cache_key("m", first, None, plain) == cache_key("m", second, None, plain)
+        assert cache_key("m", first, None, plain) != cache_key("m", first, {"temperature": 0}, plain)
+        assert cache_key("m", first, None, plain) != cache_key("m", first, None, with_tool)
+        assert cache_key("m", first, None, plain) != cache_key("other", first, None, plain)
+
+    def test_record_then_replay_offline(self, tmp_path):
+        """record 錄製後，replay 不呼叫 model 也能得到相同結果，命中時 usage 為 0"""
+        path = str(tmp_path / "llm_cache.db")
+        calls = []
+        recorder = Agent(CachedModel(counting_model(calls), LlmResponseCache(path, mode="record")))
+        assert recorder.run_sync("運費多少？").output == "answer"
+
+        replay_cache = LlmResponseCache(path, mode="replay")
+        replayer = Agent(CachedModel(counting_model(calls, text="live"), replay_cache))
+        result = replayer.run_sync("運費多少？")
+        assert result.output == "answer"
+        assert result.usage().output_tokens == 0
+        assert len(calls) == 1
+        assert replay_cache.stats()["fake"] == {"hits": 1, "misses": 0, "hit_rate": 1.0}
+
+        with pytest.raises(LlmCacheMiss):
+            replayer.run_sync("沒錄過的問題")
+
+    def test_stream_record_then_replay(self, tmp_path):
+        """串流回應錄製後可由快取重播，文字與 tool call 都保留"""
+        path = str(tmp_path / "llm_cache.db")
+        calls = []
+
+        async def stream(messages, info):
+            calls.append(messages)
+            if not any(isinstance(part, ToolReturnPart) for message in messages for part in message.parts):
+                yield {0: DeltaToolCall(name="shipping_fee", json_args="{}", tool_call_id="call_1")}
+                return
+            for chunk in ("運費", "60 元"):
+                yield chunk
+
+        async def run(mode):
+            agent = Agent(CachedModel(FunctionModel(stream_function=stream, model_name="fake"),
+                                      LlmResponseCache(path, mode=mode)))
+            agent.tool_plain(lambda: "60", name="shipping_fee")
+            async with agent.run_stream("運費多少？") as result:
+                return await result.get_output()
+
+        assert asyncio.run(run("record")) == "運費60 元"
+        assert asyncio.run(run("replay")) == "運費60 元"
+        assert len(calls) == 2
+
+    def test_ttl_expiry(self, tmp_path):
+        calls = []
+        cache = LlmResponseCache(str(tmp_path / "llm_cache.db"), ttl=60, mode="on")
+        agent = Agent(CachedModel(counting_model(calls), cache))
+        agent.run_sync("hi")
+        agent.run_sync("hi")
+        assert len(calls) == 1
+
+        cache._connection.execute("UPDATE llm_cache SET created_at = created_at - 120")
+        cache._connection.commit()
+        agent.run_sync("hi")
+        assert len(calls) == 2
+        assert cache.stats()["fake"]["hit_rate"] == pytest.approx(1 / 3, abs=1e-3)
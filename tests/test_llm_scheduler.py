@@ -0,0 +1,167 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import openai
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.test import TestModel
+
+from cores.llm_scheduler import (PRIORITY_HIGH, PRIORITY_LOW, LlmBusyError, LlmScheduler, ScheduledModel,
+                                 TokenBucket)
+
+
+class FakeClock:
+    """sleep 只推進時間，不真的等待"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def rate_limited(retry_after: str) -> ModelHTTPError:
+    """模擬 pydantic_ai 包裝 openai.RateLimitError 後的例外"""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    error = ModelHTTPError(429, "gpt-4.1")
+    error.__cause__ = openai.RateLimitError("rate limited", response=response, body=None)
+    return error
+
+
+def connection_error(timeout: bool = False, wrapped: bool = False) -> Exception:
+    """openai SDK 的連線錯誤 / 逾時；wrapped 時模擬新版 pydantic_ai 包成其他例外、原例外放在 __cause__"""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    error = openai.APITimeoutError(request) if timeout else openai.APIConnectionError(request=request)
+    if not wrapped:
+        return error
+    wrapper = RuntimeError("model api error")
+    wrapper.__cause__ = error
+    return wrapper
+
+
+class TestLlmScheduler:
+    """LLM 請求排程器測試"""
+
+    def test_token_bucket_delay(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock)
+        bucket.consume(60)
+        assert bucket.delay(1) == pytest.approx(1.0)
+        clock.now += 0.5
+        assert bucket.delay(1) == pytest.approx(0.5)
+        assert TokenBucket(0, clock).delay(10 ** 6) == 0
+
+    def test_high_priority_dispatched_first(self):
+        """額度不足時排隊，優先權高的先放行"""
+
+        async def run():
+            scheduler = LlmScheduler()
+            scheduler._blocked_until = scheduler._clock() + 0.05
+            order = []
+
+            async def call(name, priority):
+                await scheduler.acquire(10, priority)
+                order.append(name)
+
+            low = asyncio.create_task(call("low", PRIORITY_LOW))
+            await asyncio.sleep(0)
+            high = asyncio.create_task(call("high", PRIORITY_HIGH))
+            await asyncio.gather(low, high)
+            return order
+
+        assert asyncio.run(run()) == ["high", "low"]
+
+    def test_retry_honors_retry_after(self):
+        """429 依 Retry-After 等待後重試，成功時回傳結果"""
+        clock = FakeClock()
+        scheduler = LlmScheduler(base_delay=0.1, clock=clock, sleep=clock.sleep)
+        attempts = []
+
+        async def call():
+            attempts.append(clock.now)
+            if len(attempts) == 1:
+                raise rate_limited("2")
+            return ModelResponse(parts=[TextPart("ok")])
+
+        response = asyncio.run(scheduler.run(call, tokens=10))
+        assert response.parts[0].content == "ok"
+        assert 2 <= clock.sleeps[0] <= 2.1
+        assert scheduler.report()["retries"] == 1 and scheduler.report()["rate_limited"] == 1
+
+    def test_exhausted_rate_limit_raises_busy(self):
+        clock = FakeClock()
+        scheduler = LlmScheduler(max_retries=2, clock=clock, sleep=clock.sleep)
+
+        async def call():
+            raise rate_limited("1")
+
+        with pytest.raises(LlmBusyError) as exc_info:
+            asyncio.run(scheduler.run(call, tokens=10))
+        assert exc_info.value.retry_after == 1
+        assert len(clock.sleeps) == 2
+
+    @pytest.mark.parametrize("error, reason", [
+        (connection_error(), "connection"),
+        (connection_error(timeout=True, wrapped=True), "timeout"),
+        (ModelHTTPError(408, "gpt-4.1"), "408"),
+        (ModelHTTPError(409, "gpt-4.1"), "409"),
+        (ModelHTTPError(520, "gpt-4.1"), "520"),
+    ])
+    def test_transient_errors_are_retried(self, error, reason):
+        """SDK 不重試（max_retries=0）後，連線錯誤、逾時與 408 / 409 / 5xx 由排程器重試，且不暫停其他請求"""
+        clock = FakeClock()
+        scheduler = LlmScheduler(base_delay=0.1, clock=clock, sleep=clock.sleep)
+        attempts = []
+
+        async def call():
+            attempts.append(clock.now)
+            if len(attempts) < 3:
+                raise error
+            return ModelResponse(parts=[TextPart("ok")])
+
+        with patch("cores.llm_scheduler._retry_counter.add") as counted:
+            assert asyncio.run(scheduler.run(call, tokens=10)).parts[0].content == "ok"
+        assert counted.call_args.args[1] == {"status": reason}
+        assert scheduler.report()["retries"] == 2 and scheduler.report()["rate_limited"] == 0
+        assert scheduler.report()["blocked_for"] == 0
+
+    def test_exhausted_connection_errors_are_raised(self):
+        clock = FakeClock()
+        scheduler = LlmScheduler(max_retries=1, clock=clock, sleep=clock.sleep)
+
+        async def call():
+            raise connection_error(timeout=True)
+
+        with pytest.raises(openai.APITimeoutError):
+            asyncio.run(scheduler.run(call, tokens=10))
+        assert len(clock.sleeps) == 1
+
+    def test_non_retryable_error_is_raised(self):
+        scheduler = LlmScheduler()
+
+        async def call():
+            raise ModelHTTPError(400, "gpt-4.1")
+
+        async def broken():
+            raise ValueError("bad request body")
+
+        with pytest.raises(ModelHTTPError):
+            asyncio.run(scheduler.run(call, tokens=10))
+        with pytest.raises(ValueError):
+            asyncio.run(scheduler.run(broken, tokens=10))
+        assert scheduler.report()["retries"] == 0
+
+    def test_scheduled_model_with_agent(self):
+        scheduler = LlmScheduler(rpm=600, tpm=100000)
+        agent = Agent(ScheduledModel(TestModel(custom_output_text="ok"), scheduler=scheduler))
+        assert agent.run_sync("hi").output == "ok"
+        assert scheduler.report()["requests"] == 1
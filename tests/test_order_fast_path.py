@@ -0,0 +1,68 @@
+import asyncio
+import datetime
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from agents.models import Order
+from utils.order_fast_path import answer_order_status, is_simple_status_query
+
+
+def _order():
+    return Order(
+        order_id="JTCG-202508-10001",
+        status="in_transit",
+        carrier="DHL",
+        tracking="DHL1234567",
+        eta=datetime.date(2025, 8, 16),
+        shipping_address="台北市信義區松高路 100 號 10 樓",
+        contact_phone="0912-345-678",
+        order_url="https://example.com/jtcg/o/JTCG-202508-10001",
+        placed_at=datetime.datetime(2025, 8, 10, 3, 33, tzinfo=datetime.timezone.utc),
+        user_id="u_123456",
+    )
+
+
+class TestOrderFastPath:
+    """訂單狀態快速路徑測試"""
+
+    @pytest.mark.parametrize("message", [
+        "JTCG-202508-10001 到哪了 u_123456",
+        "u_123456",
+        "請問我的訂單 JTCG-202508-10001 狀態？",
+        "Where is my order JTCG-202508-10001?",
+    ])
+    def test_simple_queries(self, message):
+        """單純狀態查詢走快速路徑"""
+        assert is_simple_status_query(message)
+
+    @pytest.mark.parametrize("message", [
+        "JTCG-202508-10001 我要退貨 u_123456",
+        "u_123456 可以改寄送地址嗎",
+        "Cancel order JTCG-202508-10001 please",
+    ])
+    def test_complex_queries_fall_back(self, message):
+        """含其他意圖時交回 agent"""
+        assert asyncio.run(answer_order_status(message)) is None
+
+    def test_reply_in_user_language(self):
+        """依訊息語言套用模板"""
+        repository = Mock(get_order=AsyncMock(return_value=_order()))
+        with patch("utils.order_fast_path.get_order_repository", return_value=repository):
+            zh = asyncio.run(answer_order_status("JTCG-202508-10001 到哪了 u_123456"))
+            en = asyncio.run(answer_order_status("where is JTCG-202508-10001 u_123456"))
+
+        repository.get_order.assert_awaited_with("JTCG-202508-10001", user_id="u_123456")
+        assert "運送中" in zh and "DHL1234567" in zh
+        assert "in transit" in en and "2025-08-16" in en
+
+    def test_order_id_without_user(self):
+        """只有訂單編號時要求提供用戶 ID，不查詢資料"""
+        with patch("utils.order_fast_path.get_order_repository") as get_repository:
+            result = asyncio.run(answer_order_status("JTCG-202508-10001 到哪了"))
+        assert "u_123456" in result
+        get_repository.return_value.get_order.assert_not_called()
+
+    def test_no_ids(self):
+        """沒有任何 id 時不處理"""
+        assert asyncio.run(answer_order_status("推薦一款螢幕支架")) is None
@@ -0,0 +1,63 @@
+import json
+
+from agents.models import Order
+from utils.order_render import render_orders, select_fields
+from utils.tokens import estimate_tokens
+
+
+def _order(i):
+    return Order(
+        order_id=f"JTCG-202508-{i:05d}",
+        status="in_transit",
+        carrier="DHL",
+        tracking=f"DHL{i:07d}",
+        eta="2025-08-16",
+        shipping_address="台北市信義區松高路 100 號 10 樓",
+        contact_phone="0912-345-678",
+        order_url=f"https://example.com/jtcg/o/{i}",
+        placed_at="2025-08-10T03:33:00Z",
+        items=[{"sku": "JTCG-ARM-DUAL-PRO-32", "name": "JTCG 雙螢幕氣壓臂 Pro", "qty": 1}],
+        user_id="u_123456",
+    )
+
+
+class TestOrderRender:
+    """訂單工具精簡輸出測試"""
+
+    def test_fields_follow_question(self):
+        """只輸出問題需要的欄位"""
+        fields = select_fields("我的包裹物流到哪了")
+        assert {"carrier", "tracking", "eta"} <= set(fields)
+        assert "shipping_address" not in fields and "contact_phone" not in fields
+
+        result = json.loads(render_orders([_order(1)], "寄送地址是哪裡"))
+        assert set(result["orders"][0]) == {"order_id", "status", "placed_at", "shipping_address"}
+
+    def test_compact_and_cursor(self):
+        """無空白輸出，有下一頁時回傳 next_cursor"""
+        text = render_orders([_order(1), _order(2)], "訂單狀態", offset=5, has_more=True)
+        assert ", " not in text and ": " not in text
+        assert json.loads(text)["next_cursor"] == "7"
+        assert "next_cursor" not in json.loads(render_orders([_order(1)], "訂單狀態"))
+
+    def test_token_budget_truncates(self):
+        """超過 token 上限時捨棄較舊的訂單並指向下一筆"""
+        orders = [_order(i) for i in range(20)]
+        result = json.loads(render_orders(orders, "商品 地址 電話 物流", token_budget=200))
+        assert 1 <= len(result["orders"]) < 20
+        assert result["next_cursor"] == str(len(result["orders"]))
+
+    def test_token_budget_holds_for_single_oversized_order(self):
+        """只有一筆訂單仍超過上限時截短欄位、捨棄品項並標記 truncated"""
+        order = _order(1)
+        order.shipping_address = "台北市信義區松高路 100 號 10 樓" * 5
+        order.items = [{"sku": f"SKU-{i}", "name": f"JTCG 螢幕支架配件 {i}", "qty": 1} for i in range(60)]
+        text = render_orders([order], "商品 地址 電話 物流", token_budget=200)
+        result = json.loads(text)
+
+        assert estimate_tokens(text) <= 200
+        assert result["truncated"] is True and "next_cursor" not in result
+        row = result["orders"][0]
+        assert row["order_id"] == "JTCG-202508-00001"
+        assert len(row.get("items", [])) + row["items_omitted"] == 60 and row["items_omitted"] > 0
+        assert "truncated" not in json.loads(render_orders([_order(1)], "商品", token_budget=200))
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import os
+
+from cores.order_repository import SqliteOrderRepository
+from cores.order_store import OrderStore
+
+
+def _order(order_id, status="processing", placed_at="2025-08-01T10:00:00+08:00"):
+    return {
+        "order_id": order_id,
+        "status": status,
+        "shipping_address": "台北市",
+        "contact_phone": "0900000000",
+        "order_url": f"https://example.com/{order_id}",
+        "placed_at": placed_at,
+        "items": [],
+    }
+
+
+def _write(path, orders_db):
+    path.write_text(json.dumps({"orders_db": orders_db}), encoding="utf-8")
+
+
+class TestOrderStore:
+    """訂單索引測試"""
+
+    def test_lookup_by_user_and_order(self, tmp_path):
+        """只回傳該用戶的訂單"""
+        path = tmp_path / "orders.json"
+        _write(path, {
+            "u_000001": {"orders": [_order("JTCG-202508-00001"), _order("JTCG-202508-00002")]},
+            "u_000002": {"orders": [_order("JTCG-202508-00003")]},
+        })
+        store = OrderStore(str(path))
+
+        assert [o.order_id for o in store.get_user_orders("u_000001")] == ["JTCG-202508-00001", "JTCG-202508-00002"]
+        assert store.get_user_orders("u_999999") == []
+        assert store.get_order("JTCG-202508-00003").user_id == "u_000002"
+        assert store.get_order("JTCG-202508-00003", user_id="u_000001") is None
+
+    def test_reload_on_mtime_change(self, tmp_path):
+        """檔案修改後重新載入"""
+        path = tmp_path / "orders.json"
+        _write(path, {"u_000001": {"orders": [_order("JTCG-202508-00001")]}})
+        store = OrderStore(str(path))
+        assert store.get_order("JTCG-202508-00001").status == "processing"
+
+        _write(path, {"u_000001": {"orders": [_order("JTCG-202508-00001", status="shipped")]}})
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert store.get_order("JTCG-202508-00001").status == "shipped"
+
+
+class TestSqliteOrderRepository:
+    """SQLite 訂單查詢測試"""
+
+    def test_lookup_pagination_and_status(self, tmp_path):
+        """依用戶分頁（新到舊）、狀態過濾、訂單歸屬檢查"""
+        repository = SqliteOrderRepository(str(tmp_path / "orders.db"), pool_size=2)
+        orders = [dict(_order(f"JTCG-202508-{i:05d}", status="shipped" if i % 2 else "processing",
+                              placed_at=f"2025-08-{i + 1:02d}T10:00:00+08:00"), user_id="u_000001")
+                  for i in range(5)]
+        orders.append(dict(_order("JTCG-202508-99999"), user_id="u_000002"))
+        assert repository.upsert_orders(orders, batch_size=2) == 6
+
+        async def run():
+            page = await repository.list_user_orders("u_000001", limit=2, offset=1)
+            shipped = await repository.list_user_orders("u_000001", status="shipped")
+            return (page, shipped, await repository.count_user_orders("u_000001"),
+                    await repository.get_order("JTCG-202508-99999"),
+                    await repository.get_order("JTCG-202508-99999", user_id="u_000001"))
+
+        page, shipped, count, order, foreign = asyncio.run(run())
+        assert [o.order_id for o in page] == ["JTCG-202508-00003", "JTCG-202508-00002"]
+        assert [o.order_id for o in shipped] == ["JTCG-202508-00003", "JTCG-202508-00001"]
+        assert count == 5
+        assert order.user_id == "u_000002"
+        assert foreign is None
+        asyncio.run(repository.close())
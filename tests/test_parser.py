@@ -0,0 +1,110 @@
+import pandas as pd
+import pytest
+
+from utils.misc import stable_id, content_hash
+from utils.parser import build_faq_documents, build_classification_documents, parse_orders
+
+
+@pytest.fixture
+def faq_df():
+    return pd.DataFrame([
+        {"id": "FAQ-RET-001", "title": "退換貨政策", "content": "7 天鑑賞期", "tags/0": "退換貨"},
+        {"id": "FAQ-WAR-002", "title": "保固與維修", "content": "1 年有限保固", "tags/0": "保固"},
+    ])
+
+
+def test_stable_id_is_deterministic():
+    """ID 不受行程 hash salt 影響，且落在 INT64 正數範圍"""
+    assert stable_id("FAQ-RET-001") == stable_id("FAQ-RET-001")
+    assert stable_id("FAQ-RET-001") != stable_id("FAQ-WAR-002")
+    assert 0 <= stable_id("FAQ-RET-001") < 2 ** 63
+
+
+def test_content_hash_ignores_key_order():
+    assert content_hash({"a": 1, "b": 2}) == content_hash({"b": 2, "a": 1})
+
+
+def test_build_faq_documents_hashes(faq_df):
+    """內容變更會改變 content_hash，標籤變更不影響 embed_hash"""
+    documents, texts = build_faq_documents(faq_df)
+    assert texts[0] == "退換貨政策 7 天鑑賞期"
+    assert "vector" not in documents[0]
+
+    changed = faq_df.copy()
+    changed.loc[0, "tags/0"] = "政策"
+    changed_documents, _ = build_faq_documents(changed)
+
+    assert changed_documents[0]["id"] == documents[0]["id"]
+    assert changed_documents[0]["content_hash"] != documents[0]["content_hash"]
+    assert changed_documents[0]["embed_hash"] == documents[0]["embed_hash"]
+    assert changed_documents[1]["content_hash"] == documents[1]["content_hash"]
+
+
+def test_classification_ids_do_not_collide():
+    """同一 FAQ 對應多個 agent 時 ID 不重複"""
+    df = pd.DataFrame([
+        {"faq_id": "FAQ-RET-001", "agent_type": "policy_information_agent"},
+        {"faq_id": "FAQ-RET-001", "agent_type": "order_query_agent"},
+    ])
+    documents, _ = build_classification_documents(df)
+    assert documents[0]["id"] != documents[1]["id"]
+
+
+@pytest.fixture
+def orders_file(tmp_path):
+    import json
+    path = tmp_path / "orders.json"
+    path.write_text(json.dumps({
+        "brand": "JTCG Shop",
+        "generated_at": "2025-08-15T07:00:00Z",
+        "orders_db": {
+            "u_123456": {"orders": [{
+                "order_id": "JTCG-202508-10001", "placed_at": "2025-08-10T03:33:00Z", "status": "in_transit",
+                "carrier": "DHL", "tracking": "DHL1234567", "eta": "2025-08-16",
+                "items": [{"sku": "SKU-A", "name": "A", "qty": 1}, {"sku": "SKU-B", "name": "B", "qty": 2}],
+                "shipping_address": "台北市", "contact_phone": "0912-345-678", "order_url": "https://example.com/o/1",
+            }]},
+            "u_654321": {"orders": [{
+                "order_id": "JTCG-202508-10002", "placed_at": "2025-08-11T03:33:00Z", "status": "delivered",
+                "items": [{"sku": "SKU-A", "name": "A", "qty": 1}],
+                "shipping_address": "新北市", "contact_phone": "0987-654-321", "order_url": "https://example.com/o/2",
+            }]},
+            "u_000000": {"orders": []},
+        },
+    }, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_parse_orders_single_pass(orders_file):
+    """單次掃描產生所有實體，SKU 去重"""
+    entities = parse_orders(orders_file)
+
+    assert [user["id"] for user in entities["users"]] == ["u_123456", "u_654321", "u_000000"]
+    assert [order["order_id"] for order in entities["orders"]] == ["JTCG-202508-10001", "JTCG-202508-10002"]
+    assert entities["orders"][1]["user_id"] == "u_654321"
+    assert [item["id"] for item in entities["items"]] == ["item_000001", "item_000002", "item_000003"]
+    assert [product["sku"] for product in entities["products"]] == ["SKU-A", "SKU-B"]
+    assert entities["brand"].name == "JTCG Shop"
+
+
+def test_parse_orders_dotted_user_id(tmp_path):
+    """user_id 含 "." 時仍能解析出訂單，巢狀欄位完整保留"""
+    import json
+    path = tmp_path / "orders.json"
+    path.write_text(json.dumps({
+        "brand": "JTCG Shop",
+        "generated_at": "2025-08-15T07:00:00Z",
+        "orders_db": {
+            "u.1": {"orders": [{
+                "order_id": "JTCG-1", "placed_at": "2025-08-10T03:33:00Z", "status": "delivered",
+                "items": [{"sku": "SKU-A", "name": "A", "qty": 1, "options": {"color": "black"}}],
+                "shipping_address": "台北市", "contact_phone": "0912-345-678", "order_url": "https://example.com/o/1",
+            }]},
+        },
+    }, ensure_ascii=False), encoding="utf-8")
+
+    entities = parse_orders(str(path))
+
+    assert [user["id"] for user in entities["users"]] == ["u.1"]
+    assert [(order["order_id"], order["user_id"]) for order in entities["orders"]] == [("JTCG-1", "u.1")]
+    assert [item["product_id"] for item in entities["items"]] == ["SKU-A"]
@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from utils.ingestion import delete_removed
+from utils.parser import build_faq_documents
+from utils.pipeline import run_streaming_ingestion
+
+
+@pytest.fixture
+def faq_csv(tmp_path):
+    path = tmp_path / "faqs.csv"
+    pd.DataFrame([
+        {"id": f"FAQ-{i:03d}", "title": f"標題 {i}", "content": f"內容 {i}"} for i in range(25)
+    ]).to_csv(path, index=False)
+    return str(path)
+
+
+def fake_encode(texts):
+    return [[0.0, 1.0] for _ in texts]
+
+
+@patch('utils.pipeline.prepare_collection', return_value={})
+@patch('utils.pipeline.upsert_data')
+def test_streaming_ingestion_in_chunks(mock_upsert, mock_create, faq_csv, tmp_path):
+    """每個 chunk 一次 upsert，並回報各階段吞吐量"""
+    report = run_streaming_ingestion("faqs", faq_csv, build_faq_documents, chunk_size=10,
+                                     encode_fn=fake_encode, checkpoint_path=str(tmp_path / "ck.json"))
+
+    assert [len(call.args[1]) for call in mock_upsert.call_args_list] == [10, 10, 5]
+    assert report["rows_done"] == 25
+    assert set(report) >= {"read", "encode", "insert"}
+
+
+@patch('utils.pipeline.prepare_collection', return_value={})
+@patch('utils.pipeline.upsert_data')
+def test_streaming_ingestion_resumes_from_checkpoint(mock_upsert, mock_create, faq_csv, tmp_path):
+    """中途失敗後重跑，只處理尚未完成的 chunk"""
+    checkpoint_path = str(tmp_path / "ck.json")
+    mock_upsert.side_effect = [None, RuntimeError("milvus down")]
+
+    with pytest.raises(RuntimeError):
+        run_streaming_ingestion("faqs", faq_csv, build_faq_documents, chunk_size=10,
+                                encode_fn=fake_encode, checkpoint_path=checkpoint_path)
+
+    mock_upsert.reset_mock(side_effect=True)
+    report = run_streaming_ingestion("faqs", faq_csv, build_faq_documents, chunk_size=10,
+                                     encode_fn=fake_encode, checkpoint_path=checkpoint_path)
+
+    resumed_ids = [doc["doc_id"] for call in mock_upsert.call_args_list for doc in call.args[1]]
+    assert resumed_ids[0] == "FAQ-010"
+    assert report["rows_done"] == 25
+
+
+@patch('utils.ingestion.delete_by_ids')
+@patch('utils.ingestion.get_by_ids')
+@patch('utils.pipeline.upsert_data')
+def test_streaming_ingestion_is_incremental(mock_upsert, mock_get_by_ids, mock_delete, faq_csv, tmp_path):
+    """與 sync_collection 相同：未變更略過、只改 metadata 沿用向量、已移除的文件刪除"""
+    documents, _texts = build_faq_documents(pd.read_csv(faq_csv))
+    existing = {document["id"]: {"content_hash": document["content_hash"], "embed_hash": document["embed_hash"]}
+                for document in documents}
+    existing[documents[0]["id"]] = {"content_hash": "old", "embed_hash": documents[0]["embed_hash"]}
+    existing[documents[1]["id"]] = {"content_hash": "old", "embed_hash": "old"}
+    existing[123] = {"content_hash": "removed", "embed_hash": "removed"}
+    mock_get_by_ids.return_value = [{"id": documents[0]["id"], "vector": [1.0, 0.0]}]
+    mock_delete.return_value = {"success": True}
+    encoded = []
+
+    def encode(texts):
+        encoded.extend(texts)
+        return fake_encode(texts)
+
+    with patch('utils.pipeline.prepare_collection', return_value=existing):
+        report = run_streaming_ingestion("faqs", faq_csv, build_faq_documents, chunk_size=10,
+                                         encode_fn=encode, checkpoint_path=str(tmp_path / "ck.json"))
+
+    written = [doc for call in mock_upsert.call_args_list for doc in call.args[1]]
+    assert [doc["id"] for doc in written] == [documents[0]["id"], documents[1]["id"]]
+    assert written[0]["vector"] == [1.0, 0.0]
+    assert len(encoded) == 1
+    assert (report["changed"], report["unchanged"], report["deleted"], report["embedded"]) == (2, 23, 1, 1)
+    mock_delete.assert_called_once_with("faqs", [123])
+
+
+@patch('utils.ingestion.delete_by_ids')
+def test_delete_removed_counts_only_successful_batches(mock_delete):
+    """delete_by_ids 失敗的批次不計入刪除筆數，失敗的 id 留在 existing"""
+    mock_delete.side_effect = [{"success": True}, {"success": False, "error": "milvus down"}]
+    existing = {1: {}, 2: {}, 3: {}}
+
+    assert delete_removed("faqs", existing, batch_size=2) == 2
+    assert list(existing) == [3]
+
+
+@patch('utils.pipeline.bump_collection_version')
+@patch('utils.ingestion.delete_by_ids', return_value={"success": False, "error": "milvus down"})
+@patch('utils.pipeline.upsert_data')
+def test_streaming_ingestion_reports_failed_deletes(mock_upsert, mock_delete, mock_bump, faq_csv, tmp_path):
+    """刪除失敗時回報 delete_failed，沒有實際變更就不更新集合版本"""
+    documents, _texts = build_faq_documents(pd.read_csv(faq_csv))
+    existing = {document["id"]: {"content_hash": document["content_hash"], "embed_hash": document["embed_hash"]}
+                for document in documents}
+    existing[123] = {"content_hash": "removed", "embed_hash": "removed"}
+
+    with patch('utils.pipeline.prepare_collection', return_value=existing):
+        report = run_streaming_ingestion("faqs", faq_csv, build_faq_documents, chunk_size=10,
+                                         encode_fn=fake_encode, checkpoint_path=str(tmp_path / "ck.json"))
+
+    assert (report["deleted"], report["delete_failed"]) == (0, 1)
+    mock_bump.assert_not_called()
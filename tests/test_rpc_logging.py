@@ -0,0 +1,78 @@
+import json
+from unittest.mock import patch
+
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from cores.a2a_transport import build_message
+from cores.rpc_logging import REDACTED, RpcLoggingMiddleware, RpcLogPolicy, redact_text
+
+
+async def echo(request):
+    return Response(await request.body(), media_type="application/json")
+
+
+def client_with(policy: RpcLogPolicy) -> TestClient:
+    app = Starlette(routes=[Route("/", echo, methods=["POST"])])
+    app.add_middleware(RpcLoggingMiddleware, service_name="test_agent", policy=policy)
+    return TestClient(app)
+
+
+def rpc(method: str, **params) -> bytes:
+    return json.dumps({"jsonrpc": "2.0", "id": "1", "method": method, "params": params}).encode()
+
+
+class TestRpcLoggingMiddleware:
+    """RPC 請求記錄策略測試"""
+
+    def test_allowlist_and_redaction(self):
+        """只記錄白名單內的 method，敏感欄位遮蔽，下游仍收到完整 body"""
+        client = client_with(RpcLogPolicy(methods=frozenset({"message/send"}), redact_keys=frozenset({"phone"})))
+        body = rpc("message/send", phone="0912345678", text="hi")
+        with patch("cores.rpc_logging.logfire.info") as log:
+            assert client.post("/", content=body).content == body
+            client.post("/", content=rpc("tasks/get", id="t1"))
+
+        log.assert_called_once()
+        kwargs = log.call_args.kwargs
+        assert kwargs["rpc_method"] == "message/send"
+        assert kwargs["body"]["params"] == {"phone": REDACTED, "text": "hi"}
+        assert kwargs["truncated"] is False
+
+    def test_message_text_pii_masked(self):
+        """message/send 的使用者訊息是自由文字，電話與 email 在 parts[].text 中也要遮蔽，訂單編號保留"""
+        client = client_with(RpcLogPolicy(redact_keys=frozenset({"phone"})))
+        text = "訂單 JTCG-202508-10001 還沒到，我的電話0912-345-678，email amy.lin@example.com"
+        configuration = {"accepted_output_modes": ["text/plain", "application/json"], "blocking": False}
+        body = rpc("message/send", message=build_message("order_query_agent", text), configuration=configuration)
+        with patch("cores.rpc_logging.logfire.info") as log:
+            assert client.post("/", content=body).content == body
+            client_with(RpcLogPolicy(max_body_bytes=300)).post("/", content=body)
+
+        logged = log.call_args_list[0].kwargs["body"]["params"]["message"]["parts"][0]["text"]
+        assert logged == f"訂單 JTCG-202508-10001 還沒到，我的電話{REDACTED}，email {REDACTED}"
+        truncated = log.call_args_list[1].kwargs
+        assert truncated["truncated"] is True
+        assert "0912-345-678" not in truncated["body"] and REDACTED in truncated["body"]
+
+    def test_body_size_cap(self):
+        client = client_with(RpcLogPolicy(max_body_bytes=80, redact_keys=frozenset({"phone"})))
+        body = rpc("message/send", phone="0912345678", text="x" * 1000)
+        with patch("cores.rpc_logging.logfire.info") as log:
+            assert client.post("/", content=body).content == body
+
+        kwargs = log.call_args.kwargs
+        assert kwargs["truncated"] is True
+        assert kwargs["rpc_method"] == "message/send"
+        assert len(kwargs["body"]) <= 90 and "0912345678" not in kwargs["body"]
+
+    def test_sampling_disabled(self):
+        client = client_with(RpcLogPolicy(sample_rate=0))
+        with patch("cores.rpc_logging.logfire.info") as log:
+            client.post("/", content=rpc("message/send"))
+        log.assert_not_called()
+
+    def test_redact_text_truncated_value(self):
+        assert redact_text('{"phone": "09123', frozenset({"phone"})) == f'{{"phone": "{REDACTED}"'
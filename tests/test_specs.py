@@ -0,0 +1,80 @@
+from unittest.mock import patch
+
+import pytest
+
+from utils.specs import build_spec_filter, extract_constraints, parse_range, parse_spec_fields
+
+
+class TestSpecParsing:
+    """規格範圍解析測試"""
+
+    @pytest.mark.parametrize("value, expected", [
+        ("2-9", (2.0, 9.0)),
+        ("10–85", (10.0, 85.0)),
+        (32.0, (32.0, 32.0)),
+        ("500", (500.0, 500.0)),
+        (float("nan"), (None, None)),
+        ("±90°", (None, None)),
+    ])
+    def test_parse_range(self, value, expected):
+        assert parse_range(value) == expected
+
+    def test_parse_spec_fields(self):
+        """CSV specs 轉為數值 / VESA 欄位"""
+        fields = parse_spec_fields({
+            "size_max_inch": 32.0, "vesa/0": "75x75", "vesa/1": "100 × 100",
+            "weight_per_arm_kg": "2-9", "desk_thickness_mm": "10-85",
+        })
+        assert fields["size_max_inch"] == 32.0
+        assert (fields["weight_min_kg"], fields["weight_max_kg"]) == (2.0, 9.0)
+        assert (fields["desk_min_mm"], fields["desk_max_mm"]) == (10.0, 85.0)
+        assert fields["vesa"] == ["75x75", "100x100"]
+        assert fields["tray_min_inch"] is None
+
+
+class TestSpecFilter:
+    """查詢規格過濾條件測試"""
+
+    def test_extract_constraints(self):
+        assert extract_constraints("32吋螢幕 8kg 桌板 60mm") == {"inch": 32.0, "kg": 8.0, "mm": 60.0}
+        assert extract_constraints("螢幕重量約 6.5 公斤") == {"kg": 6.5}
+        assert extract_constraints("桌板厚度 6 公分，VESA 100x100") == {"mm": 60.0, "vesa": "100x100"}
+        assert extract_constraints("推薦一款支架") == {}
+
+    @pytest.mark.parametrize("query", [
+        "M4 螺絲長度 12mm",
+        "包裹 5kg 運費多少",
+        "線材長度 150cm 夠嗎",
+    ])
+    def test_unrelated_units_are_ignored(self, query):
+        """與桌板 / 螢幕無關的長度、重量不會變成過濾條件"""
+        assert extract_constraints(query) == {}
+
+    def test_build_spec_filter(self):
+        expr = build_spec_filter({"kg": 8.0, "mm": 60.0, "vesa": "100x100"})
+        assert "(weight_min_kg <= 8.0 and weight_max_kg >= 8.0)" in expr
+        assert "(desk_min_mm <= 60.0 and desk_max_mm >= 60.0)" in expr
+        assert 'ARRAY_CONTAINS(vesa, "100x100")' in expr
+        assert build_spec_filter({}) == ""
+
+    @patch("agents.product_recommendation_agent.search_two_phase", return_value=[])
+    @patch("agents.product_recommendation_agent.generate_embedding", return_value=[0.1] * 384)
+    def test_process_data_prefilters(self, mock_embedding, mock_search):
+        """商品推薦的向量搜尋帶入規格過濾條件"""
+        from agents.product_recommendation_agent import process_data
+
+        result = process_data("32吋螢幕 8kg 桌板 60mm")
+        assert "未找到" in result
+        assert "size_max_inch >= 32.0" in mock_search.call_args_list[0].kwargs["filter_expr"]
+
+    @patch("agents.product_recommendation_agent.generate_embedding", return_value=[0.1] * 384)
+    def test_process_data_falls_back_without_filter(self, mock_embedding):
+        """過濾後沒有結果時改用不過濾的搜尋，不直接回傳未找到"""
+        from agents.product_recommendation_agent import process_data
+
+        product = {"title": "單螢幕支架", "content": "適用 17-32 吋", "metadata": {}}
+        with patch("agents.product_recommendation_agent.search_two_phase", side_effect=[[], [product]]) as mock_search:
+            result = process_data("32吋螢幕 承重 8kg")
+        assert "單螢幕支架" in result
+        filters = [call.kwargs["filter_expr"] for call in mock_search.call_args_list]
+        assert filters[0] and filters[1] == ""
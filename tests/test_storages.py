@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+from unittest.mock import Mock, patch
+
+from cores.schemas import FAQ_SPEC
+from cores.tool_cache import bump_collection_version
+from cores.storages import (
+    build_index_params,
+    build_schema,
+    clear_payload_cache,
+    get_search_params,
+    search_data,
+    search_many,
+    search_two_phase,
+)
+
+
+class TestCollectionSchema:
+    """測試宣告式 schema 轉換"""
+
+    def test_build_schema_fields(self):
+        """欄位型別與 VARCHAR 長度"""
+        schema = build_schema(FAQ_SPEC)
+        fields = {field.name: field for field in schema.fields}
+
+        assert list(fields) == FAQ_SPEC.field_names
+        assert fields["id"].is_primary
+        assert fields["doc_id"].params["max_length"] == 64
+        assert fields["vector"].params["dim"] == 384
+
+    def test_build_index_params(self):
+        """向量索引與純量索引"""
+        index_params = build_index_params(FAQ_SPEC.with_vector_index(index_type="IVF_FLAT",
+                                                                     build_params={"nlist": 16}))
+        indexes = {index.field_name: index for index in index_params}
+
+        assert indexes["vector"].index_type == "IVF_FLAT"
+        assert indexes["doc_id"].index_type == "INVERTED"
+        assert indexes["doc_type"].index_type == "INVERTED"
+
+    def test_get_search_params(self):
+        assert get_search_params("faqs") == {"metric_type": "COSINE", "params": {"ef": 64}}
+        assert get_search_params("unknown") is None
+
+
+class TestSearchMany:
+    """測試批次搜尋"""
+
+    @patch('cores.storages.get_model')
+    @patch('cores.storages.get_client')
+    def test_search_many_maps_results_per_query(self, mock_get_client, mock_get_model):
+        """單次編碼、單次搜尋，結果依查詢順序對應"""
+        mock_model = Mock()
+        mock_model.encode.return_value = np.array([[0.1, 0.2], [0.3, 0.4]])
+        mock_get_model.return_value = mock_model
+
+        mock_client = Mock()
+        mock_client.search.return_value = [
+            [{"id": 1, "distance": 0.9, "entity": {"doc_id": "FAQ-1", "title": "退貨"}}],
+            [{"id": 2, "distance": 0.8, "entity": {"doc_id": "FAQ-2", "title": "保固"}}],
+        ]
+        mock_get_client.return_value = mock_client
+
+        results = search_many("faqs", ["退貨", "保固"], output_fields=["doc_id", "title"])
+
+        assert results == [
+            [{"id": 1, "score": 0.9, "doc_id": "FAQ-1", "title": "退貨"}],
+            [{"id": 2, "score": 0.8, "doc_id": "FAQ-2", "title": "保固"}],
+        ]
+        mock_model.encode.assert_called_once()
+        mock_client.search.assert_called_once()
+        assert mock_client.search.call_args.kwargs["data"] == [[0.1, 0.2], [0.3, 0.4]]
+
+    @patch('cores.storages.search_many')
+    def test_search_data_wraps_search_many(self, mock_search_many):
+        mock_search_many.return_value = [[{"id": 1}]]
+
+        assert search_data("faqs", "退貨") == [{"id": 1}]
+        mock_search_many.assert_called_once_with("faqs", ["退貨"], limit=5, output_fields=None, filter_expr=None)
+
+    def test_search_many_empty_queries(self):
+        assert search_many("faqs", []) == []
+
+
+class TestSearchTwoPhase:
+    """測試兩階段檢索"""
+
+    def setup_method(self):
+        clear_payload_cache()
+
+    @patch('cores.storages.get_by_ids')
+    @patch('cores.storages.get_client')
+    def test_threshold_dedup_and_payload_fetch(self, mock_get_client, mock_get_by_ids):
+        """門檻與去重後，只為存活結果取回 payload"""
+        mock_client = Mock()
+        mock_client.search.return_value = [
+            [{"id": 1, "distance": 0.9, "entity": {}}, {"id": 2, "distance": 0.3, "entity": {}}],
+            [{"id": 1, "distance": 0.7, "entity": {}}, {"id": 3, "distance": 0.6, "entity": {}}],
+        ]
+        mock_get_client.return_value = mock_client
+        mock_get_by_ids.return_value = [
+            {"id": 1, "title": "雙螢幕臂"},
+            {"id": 3, "title": "單臂"},
+        ]
+
+        results = search_two_phase("products", [[0.1], [0.2]], limit=3,
+                                   output_fields=["title"], score_threshold=0.5)
+
+        assert results == [
+            {"id": 1, "score": 0.9, "title": "雙螢幕臂"},
+            {"id": 3, "score": 0.6, "title": "單臂"},
+        ]
+        assert mock_client.search.call_args.kwargs["output_fields"] == []
+        mock_get_by_ids.assert_called_once_with("products", [1, 3], output_fields=["title"])
+
+    @patch('cores.storages.get_by_ids')
+    @patch('cores.storages.get_client')
+    def test_payload_cache(self, mock_get_client, mock_get_by_ids):
+        """重複命中時使用 payload 快取"""
+        mock_client = Mock()
+        mock_client.search.return_value = [[{"id": 1, "distance": 0.9, "entity": {}}]]
+        mock_get_client.return_value = mock_client
+        mock_get_by_ids.return_value = [{"id": 1, "title": "雙螢幕臂"}]
+
+        search_two_phase("products", [[0.1]], output_fields=["title"])
+        results = search_two_phase("products", [[0.1]], output_fields=["title"])
+
+        assert results == [{"id": 1, "score": 0.9, "title": "雙螢幕臂"}]
+        mock_get_by_ids.assert_called_once()
+
+    @patch('cores.storages.get_by_ids')
+    @patch('cores.storages.get_client')
+    def test_payload_cache_invalidated_by_collection_version(self, mock_get_client, mock_get_by_ids):
+        """重新匯入後 id 不變，集合版本更新後改取新的 payload"""
+        mock_client = Mock()
+        mock_client.search.return_value = [[{"id": 1, "distance": 0.9, "entity": {}}]]
+        mock_get_client.return_value = mock_client
+        mock_get_by_ids.return_value = [{"id": 1, "title": "舊名稱"}]
+        search_two_phase("products", [[0.1]], output_fields=["title"])
+
+        mock_get_by_ids.return_value = [{"id": 1, "title": "新名稱"}]
+        bump_collection_version("products")
+        results = search_two_phase("products", [[0.1]], output_fields=["title"])
+
+        assert results == [{"id": 1, "score": 0.9, "title": "新名稱"}]
+        assert mock_get_by_ids.call_count == 2
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from cores.supervisor import AgentGroup, Supervisor, WorkerHandle, _monitor_group, parse_groups, read_process_stats
+
+
+class TestSupervisorConfig:
+    """supervisor 群組設定與行程統計測試"""
+
+    def test_default_one_process_per_agent(self):
+        groups = parse_groups([])
+        assert len(groups) == 7
+        assert all(len(group.agents) == 1 and group.workers == 1 for group in groups)
+
+    def test_group_spec(self):
+        groups = parse_groups(["product_recommendation_agent:3", "order_query_agent, policy_information_agent"])
+        assert groups == [
+            AgentGroup(("product_recommendation_agent",), 3),
+            AgentGroup(("order_query_agent", "policy_information_agent"), 1),
+        ]
+        assert groups[1].name == "order_query_agent+policy_information_agent"
+
+    @pytest.mark.parametrize("specs", [["unknown_agent"], ["order_query_agent", "order_query_agent:2"]])
+    def test_invalid_groups(self, specs):
+        with pytest.raises(ValueError):
+            parse_groups(specs)
+
+    def test_read_process_stats(self):
+        stats = read_process_stats(os.getpid())
+        assert stats["rss_bytes"] > 0 and stats["cpu_seconds"] > 0
+
+    def test_multiple_workers_require_shared_task_store(self):
+        """多 worker 搭配各自獨立的 memory task store 時拒絕啟動"""
+        groups = [AgentGroup(("product_recommendation_agent",), 2)]
+        with pytest.raises(ValueError, match="A2A_TASK_STORE=sqlite"):
+            Supervisor(groups, task_store="memory")
+        assert Supervisor(groups, task_store="sqlite").groups == groups
+        assert Supervisor([AgentGroup(("order_query_agent",))], task_store="memory")
+
+
+class TestSupervisorHealth:
+    """worker 就緒與健康檢查測試"""
+
+    def test_ready_after_ready_endpoint_returns_200(self):
+        """server 啟動後仍要等 /ready 回 200 才通知就緒，之後持續更新心跳"""
+        calls = []
+
+        async def ready_endpoint(request):
+            calls.append(time.time())
+            return JSONResponse({}, status_code=200 if len(calls) >= 3 else 503)
+
+        app = Starlette(routes=[Route("/ready", ready_endpoint)])
+
+        async def run():
+            ready, heartbeat = threading.Event(), SimpleNamespace(value=0.0)
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://worker")
+            task = asyncio.create_task(_monitor_group([SimpleNamespace(started=True)], [client], ready, heartbeat, 0.01))
+            while not ready.is_set():
+                assert heartbeat.value == 0.0
+                await asyncio.sleep(0.01)
+            first_beat = heartbeat.value
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await client.aclose()
+            return first_beat, heartbeat.value
+
+        first_beat, last_beat = asyncio.run(run())
+        assert first_beat > 0 and last_beat > first_beat
+
+    def test_worker_replaced_after_consecutive_failures(self, monkeypatch):
+        supervisor = Supervisor([AgentGroup(("order_query_agent",))], health_interval=10, max_health_failures=3)
+        ready = threading.Event()
+        ready.set()
+        process = SimpleNamespace(is_alive=lambda: True, pid=os.getpid())
+        handle = WorkerHandle(supervisor.groups[0], 0, process, ready, SimpleNamespace(value=time.time()))
+        supervisor.workers = [handle]
+        replaced = []
+        monkeypatch.setattr(supervisor, "replace_worker", replaced.append)
+
+        assert supervisor.check_health() == {"order_query_agent#0": True}
+        handle.heartbeat.value = time.time() - 60
+        supervisor.check_health()
+        supervisor.check_health()
+        assert replaced == [] and handle.health_failures == 2
+        assert supervisor.check_health() == {"order_query_agent#0": False}
+        assert replaced == [0]
+
+
+class _FakeProcess:
+    """可控制存活狀態的 worker 行程"""
+
+    def __init__(self):
+        self.alive = True
+        self.pid = os.getpid()
+        self.exitcode = None
+        self.terminated = False
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.terminated = True
+
+    def join(self, timeout=None):
+        pass
+
+    def kill(self):
+        self.alive = False
+
+
+class TestSupervisorReplacement:
+    """worker 替換流程測試"""
+
+    def _supervisor(self, monkeypatch, task_store="sqlite", workers=2):
+        supervisor = Supervisor([AgentGroup(("order_query_agent",), workers)], task_store=task_store,
+                                ready_timeout=60)
+
+        def spawn(group, index):
+            return WorkerHandle(group, index, _FakeProcess(), threading.Event(), SimpleNamespace(value=0.0))
+
+        monkeypatch.setattr(supervisor, "_spawn", spawn)
+        supervisor.workers = [spawn(supervisor.groups[0], index) for index in range(workers)]
+        for handle in supervisor.workers:
+            handle.ready.set()
+        return supervisor
+
+    def test_replacement_does_not_block(self, monkeypatch):
+        """replace_worker 不等待新 worker 就緒；就緒後才換下舊 worker"""
+        supervisor = self._supervisor(monkeypatch)
+        old = supervisor.workers[0]
+        assert supervisor.replace_worker(0)
+        assert not supervisor.replace_worker(0)
+        supervisor.advance_replacements()
+        assert supervisor.workers[0] is old and not old.process.terminated
+
+        new, _ = supervisor._replacing[0]
+        new.ready.set()
+        supervisor.advance_replacements()
+        assert supervisor.workers[0] is new and old.process.terminated
+        old.process.alive = False
+        supervisor.reap_retired()
+        assert supervisor._retiring == []
+
+    def test_failed_replacement_keeps_old_worker(self, monkeypatch):
+        supervisor = self._supervisor(monkeypatch)
+        old = supervisor.workers[0]
+        supervisor.replace_worker(0)
+        new, _ = supervisor._replacing[0]
+        new.process.alive = False
+        supervisor.advance_replacements()
+        assert supervisor.workers[0] is old and supervisor._replacing == {}
+
+    def test_rolling_restart_one_worker_at_a_time(self, monkeypatch):
+        supervisor = self._supervisor(monkeypatch)
+        first, second = supervisor.workers
+        supervisor.rolling_restart()
+        assert list(supervisor._replacing) == [0]
+        supervisor._replacing[0][0].ready.set()
+        supervisor.advance_replacements()
+        assert supervisor.workers[0] is not first and list(supervisor._replacing) == [1]
+        supervisor._replacing[1][0].ready.set()
+        supervisor.advance_replacements()
+        assert supervisor.workers[1] is not second and supervisor._replacing == {}
+
+    def test_memory_task_store_skips_replacement(self, monkeypatch):
+        """memory task store 替換 worker 會遺失任務，記錄警告並略過"""
+        supervisor = self._supervisor(monkeypatch, task_store="memory", workers=1)
+        supervisor.rolling_restart()
+        assert not supervisor.replace_worker(0)
+        assert supervisor._replacing == {} and supervisor._rolling == []
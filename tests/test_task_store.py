@@ -0,0 +1,85 @@
+import asyncio
+from unittest.mock import patch
+
+from pydantic_ai.messages import ModelRequest, UserPromptPart
+
+from cores.task_store import BoundedTaskStorage, SqliteTaskStorage
+
+
+def user_message(text: str):
+    return {"role": "user", "kind": "message", "message_id": text, "parts": [{"kind": "text", "text": text}]}
+
+
+def complete(storage, text: str):
+    async def run():
+        task = await storage.submit_task("ctx", user_message(text))
+        await storage.update_task(task["id"], "working")
+        await storage.update_task(task["id"], "completed",
+                                  new_artifacts=[{"artifact_id": text, "parts": [{"kind": "text", "text": "ok"}]}])
+        return task["id"]
+    return asyncio.run(run())
+
+
+class TestBoundedTaskStorage:
+    """行程內任務儲存淘汰測試"""
+
+    def test_finished_tasks_expire_after_ttl(self):
+        storage = BoundedTaskStorage("test_agent", ttl=10, max_entries=100)
+        with patch("cores.task_store.time.monotonic", return_value=0):
+            task_id = complete(storage, "q1")
+            assert asyncio.run(storage.load_task(task_id))["status"]["state"] == "completed"
+        with patch("cores.task_store.time.monotonic", return_value=11):
+            storage.evict()
+        assert asyncio.run(storage.load_task(task_id)) is None
+        assert storage._finished_bytes == 0
+
+    def test_cap_evicts_oldest_finished_but_keeps_running(self):
+        """超過上限時先淘汰最早結束的任務，執行中的任務保留"""
+        storage = BoundedTaskStorage("test_agent", ttl=600, max_entries=2)
+        running = asyncio.run(storage.submit_task("ctx", user_message("running")))
+        first = complete(storage, "q1")
+        second = complete(storage, "q2")
+
+        assert asyncio.run(storage.load_task(first)) is None
+        assert asyncio.run(storage.load_task(second)) is not None
+        assert asyncio.run(storage.load_task(running["id"])) is not None
+
+    def test_load_task_does_not_truncate_stored_history(self):
+        storage = BoundedTaskStorage("test_agent")
+        task_id = complete(storage, "q1")
+        asyncio.run(storage.update_task(task_id, "completed", new_messages=[user_message("q2")]))
+        assert len(asyncio.run(storage.load_task(task_id, history_length=1))["history"]) == 1
+        assert len(asyncio.run(storage.load_task(task_id))["history"]) == 2
+
+
+class TestSqliteTaskStorage:
+    """SQLite 任務儲存測試"""
+
+    def test_tasks_and_context_survive_restart(self, tmp_path):
+        path = str(tmp_path / "tasks.db")
+        storage = SqliteTaskStorage("test_agent", path=path)
+        task_id = complete(storage, "q1")
+        context = [ModelRequest(parts=[UserPromptPart(content="q1")])]
+        asyncio.run(storage.update_context("ctx", context))
+        storage.close()
+
+        restarted = SqliteTaskStorage("test_agent", path=path)
+        task = asyncio.run(restarted.load_task(task_id))
+        assert task["status"]["state"] == "completed"
+        assert task["artifacts"][0]["parts"][0]["text"] == "ok"
+        assert asyncio.run(restarted.load_context("ctx"))[0].parts[0].content == "q1"
+
+    def test_purge_expires_caps_and_fails_stale_tasks(self, tmp_path):
+        storage = SqliteTaskStorage("test_agent", path=str(tmp_path / "tasks.db"), ttl=10, max_entries=2)
+        with patch("cores.task_store.time.time", return_value=1000):
+            stale = asyncio.run(storage.submit_task("ctx", user_message("stale")))
+            old = complete(storage, "q1")
+        with patch("cores.task_store.time.time", return_value=1005):
+            recent = [complete(storage, "q2"), complete(storage, "q3")]
+        with patch("cores.task_store.time.time", return_value=1011):
+            stats = storage.purge(storage._connection)
+
+        assert asyncio.run(storage.load_task(old)) is None
+        assert asyncio.run(storage.load_task(stale["id"]))["status"]["state"] == "failed"
+        assert [asyncio.run(storage.load_task(task_id)) is not None for task_id in recent] == [False, True]
+        assert stats["active"] == 0 and stats["terminal"] == 2
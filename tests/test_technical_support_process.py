@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import Mock, patch, MagicMock
+from cores.storages import clear_payload_cache
 from agents.technical_support_agent import (
     get_related_faq,
     get_faq_by_ids,
@@ -11,16 +12,13 @@ from agents.technical_support_agent import (
 class TestGetRelatedFaq:
     """測試 get_related_faq 函數"""
 
-    @patch('agents.technical_support_agent.get_client')
-    def test_get_related_faq_success(self, mock_get_client):
-        """測試成功獲取相關FAQ"""
-        # 模擬客戶端和搜索結果
-        mock_client = Mock()
-        mock_get_client.return_value = mock_client
-
+    @patch('agents.technical_support_agent.search_two_phase')
+    def test_get_related_faq_success(self, mock_search_two_phase):
+        """測試成功獲取相關FAQ（兩階段檢索）"""
         mock_results = [
             {
                 "id": "1",
+                "score": 0.9,
                 "doc_id": "faq_001",
                 "doc_type": "FAQ",
                 "title": "螢幕支架安裝問題",
@@ -28,20 +26,20 @@ class TestGetRelatedFaq:
                 "metadata": {"category": "技術支援"}
             }
         ]
-        mock_client.search.return_value = mock_results
+        mock_search_two_phase.return_value = mock_results
 
         query_vector = [0.1, 0.2, 0.3]
         faq_ids = ["faq_001", "faq_002"]
 
         result = get_related_faq(query_vector, faq_ids)
 
-        # 驗證結果
-        assert result == mock_results
-        mock_client.search.assert_called_once_with(
+        # 驗證結果：與 process_data 期望的格式相同（每個查詢向量一組結果）
+        assert result == [mock_results]
+        mock_search_two_phase.assert_called_once_with(
             collection_name="faqs",
-            data=[query_vector],
-            filter=f"doc_id in {faq_ids}",
-            output_fields=["id", "doc_id", "doc_type", "title", "content", "metadata"],
+            query_vectors=[query_vector],
+            output_fields=["doc_id", "doc_type", "title", "content", "metadata"],
+            filter_expr=f"doc_id in {faq_ids}",
             limit=3
         )
 
@@ -218,15 +216,18 @@ class TestProcessData:
 class TestIntegration:
     """集成測試"""
 
+    @patch('cores.storages.get_client')
     @patch('agents.technical_support_agent.get_client')
     @patch('agents.technical_support_agent.generate_embedding')
-    def test_full_workflow(self, mock_generate_embedding, mock_get_client):
+    def test_full_workflow(self, mock_generate_embedding, mock_get_client, mock_storage_client):
         """測試完整的工作流程"""
+        clear_payload_cache()
         # 模擬整個流程
         mock_generate_embedding.return_value = [0.1, 0.2, 0.3]
 
         mock_client = Mock()
         mock_get_client.return_value = mock_client
+        mock_storage_client.return_value = mock_client
 
         # 模擬 get_faq_by_ids 的結果
         mock_client.query.return_value = [
@@ -234,14 +235,16 @@ class TestIntegration:
             {"faq_id": "faq_002"}
         ]
 
-        # 模擬 get_related_faq 的結果
-        mock_client.search.return_value = [[
+        # 模擬 get_related_faq 的兩階段檢索：先取 id 與分數，再依 id 取回內容
+        mock_client.search.return_value = [[{"id": 1, "distance": 0.9, "entity": {}}]]
+        mock_client.get.return_value = [
             {
+                "id": 1,
                 "title": "VESA支架安裝指南",
                 "content": "使用轉接器或夾式支架解決無VESA孔問題",
-                "url_href": "https://example.com/guide"
+                "metadata": {"url_href": "https://example.com/guide"}
             }
-        ]]
+        ]
 
         query = "螢幕沒有VESA孔怎麼辦"
         result = process_data(query)
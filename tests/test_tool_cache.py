@@ -0,0 +1,49 @@
+from unittest.mock import Mock, patch
+
+from cores.tool_cache import ToolResultCache, bump_collection_version, cached_tool, get_tool_cache, normalize_query
+
+
+class TestToolCache:
+    """工具結果快取測試"""
+
+    def test_normalize_query(self):
+        assert normalize_query("  ＶＥＳＡ   是什麼？ ") == normalize_query("vesa 是什麼")
+
+    def test_hit_and_version_invalidation(self):
+        """相同問題命中快取，集合版本更新後重新查詢"""
+        fn = Mock(side_effect=lambda data: f"result:{data}")
+        tool = cached_tool("test_agent", collections=["faqs"])(fn)
+
+        assert tool("退貨政策？") == "result:退貨政策？"
+        assert tool("退貨政策") == "result:退貨政策？"
+        assert fn.call_count == 1
+
+        bump_collection_version("products")
+        tool("退貨政策")
+        assert fn.call_count == 1
+
+        bump_collection_version("faqs")
+        tool("退貨政策")
+        assert fn.call_count == 2
+        assert get_tool_cache().stats()["test_agent"] == {"hits": 2, "misses": 2, "hit_rate": 0.5}
+
+    def test_exceptions_not_cached(self):
+        fn = Mock(side_effect=[RuntimeError("milvus down"), "ok"])
+        tool = cached_tool("test_agent", collections=["faqs"])(fn)
+        try:
+            tool("q")
+        except RuntimeError:
+            pass
+        assert tool("q") == "ok"
+
+    def test_ttl_and_lru_eviction(self):
+        cache = ToolResultCache(max_entries=2, ttl=10)
+        with patch("cores.tool_cache.time.monotonic", return_value=0):
+            cache.set("a", 1)
+            cache.set("b", 2)
+            cache.get("agent", "a")
+            cache.set("c", 3)
+            assert cache.get("agent", "b") is None
+            assert cache.get("agent", "a") == 1
+        with patch("cores.tool_cache.time.monotonic", return_value=11):
+            assert cache.get("agent", "a") is None
@@ -0,0 +1,49 @@
+import asyncio
+
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+
+from cores.warmup import Warmup
+
+
+class TestWarmup:
+    """服務預熱與 /ready 測試"""
+
+    def test_ready_after_all_steps(self):
+        """同步、非同步步驟都執行並記錄耗時，失敗的步驟列在 errors"""
+        calls = []
+
+        async def async_step():
+            calls.append("async")
+
+        def failing_step():
+            raise RuntimeError("milvus down")
+
+        warmup = Warmup("test", [("sync", lambda: calls.append("sync")), ("async", async_step),
+                                 ("milvus:faqs", failing_step)])
+        asyncio.run(warmup.run())
+
+        assert warmup.ready
+        assert calls == ["sync", "async"]
+        assert set(warmup.durations) == {"sync", "async", "milvus:faqs", "total"}
+        assert "milvus down" in warmup.errors["milvus:faqs"]
+
+    def test_ready_endpoint_waits_for_warmup(self):
+        release = asyncio.Event()
+
+        async def slow_step():
+            await release.wait()
+
+        warmup = Warmup("test", [("agent", slow_step)])
+        client = TestClient(Starlette(routes=warmup.routes))
+        assert client.get("/ready").status_code == 503
+
+        async def run():
+            warmup.start()
+            release.set()
+            await warmup.wait()
+
+        asyncio.run(run())
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
@@ -0,0 +1,185 @@
+"""
+商品相容性對照表
+由商品規格離線建立：每個維度（螢幕尺寸、VESA、單臂承重、桌板厚度）的 bucket → SKU bitmask，
+查詢時每個維度一次 dict 查找再做 bitwise AND，只有落在規格範圍邊界 bucket 的 SKU 才以原始範圍精確比對，
+不需向量搜尋或 LLM 推論；
+商品匯入時重建並存成 JSON，服務端依檔案 mtime 自動重新載入
+"""
+import json
+import math
+import os
+import pathlib
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import logfire
+
+from cores.settings import SETTINGS
+from utils.specs import normalize_vesa
+
+# 維度 → bucket 寬度；bucket n 涵蓋 ((n-1)*step, n*step]，查詢值無條件進位到所在 bucket
+BUCKET_STEPS = {"inch": 1.0, "kg": 0.5, "desk_mm": 1.0}
+MAX_BUCKETS = 1000
+
+
+def to_bucket(dimension: str, value: float) -> int:
+    """數值轉為 bucket 編號"""
+    return int(math.ceil(round(value / BUCKET_STEPS[dimension], 6)))
+
+
+def _bucket_range(dimension: str, low: Optional[float], high: Optional[float]) -> Iterator[Tuple[int, bool]]:
+    """規格範圍 [low, high] 有交集的 bucket 與它是否只被部分涵蓋（邊界 bucket 需以原始範圍再比對）"""
+    step = BUCKET_STEPS[dimension]
+    low = low or 0
+    first = to_bucket(dimension, low)
+    last = min(to_bucket(dimension, high), first + MAX_BUCKETS)
+    for bucket in range(first, last + 1):
+        yield bucket, (bucket - 1) * step < low or bucket * step > high
+
+
+class CompatibilityTable:
+    """各維度 bucket → SKU bitmask 的相容性對照表"""
+
+    DIMENSIONS = ("inch", "vesa", "kg", "desk_mm")
+
+    def __init__(self, skus: List[str] = None, masks: Dict[str, Dict[str, int]] = None,
+                 known: Dict[str, int] = None, edges: Dict[str, Dict[str, int]] = None,
+                 ranges: Dict[str, Dict[str, List[List[float]]]] = None):
+        self.skus = skus or []
+        self.bits = {sku: index for index, sku in enumerate(self.skus)}
+        # masks[dimension][bucket] = 規格範圍與該 bucket 有交集的 SKU 的 bitmask；known[dimension] = 該維度有規格的 SKU
+        self.masks = masks or {dimension: {} for dimension in self.DIMENSIONS}
+        self.known = known or {dimension: 0 for dimension in self.DIMENSIONS}
+        # edges[dimension][bucket] = 該 bucket 只被部分涵蓋的 SKU；ranges[dimension][sku] = 原始 [low, high] 範圍
+        self.edges = edges or {dimension: {} for dimension in BUCKET_STEPS}
+        self.ranges = ranges or {dimension: {} for dimension in BUCKET_STEPS}
+
+    def _add(self, dimension: str, bucket: Any, bit: int, partial: bool = False):
+        key = str(bucket)
+        self.masks[dimension][key] = self.masks[dimension].get(key, 0) | bit
+        self.known[dimension] |= bit
+        if partial:
+            self.edges[dimension][key] = self.edges[dimension].get(key, 0) | bit
+
+    def _add_range(self, dimension: str, sku: str, low: Optional[float], high: float, bit: int):
+        self.ranges[dimension].setdefault(sku, []).append([low or 0, high])
+        for bucket, partial in _bucket_range(dimension, low, high):
+            self._add(dimension, bucket, bit, partial)
+
+    def _matches(self, dimension: str, bucket: str, value: Any, mask: int) -> int:
+        """mask 中與 bucket 相容的 SKU；邊界 bucket 上的 SKU 以原始範圍精確比對"""
+        mask &= self.masks[dimension].get(bucket, 0)
+        uncertain = mask & self.edges.get(dimension, {}).get(bucket, 0)
+        while uncertain:
+            bit = uncertain & -uncertain
+            uncertain ^= bit
+            ranges = self.ranges[dimension].get(self.skus[bit.bit_length() - 1], [])
+            if not any(low <= value <= high for low, high in ranges):
+                mask &= ~bit
+        return mask
+
+    @classmethod
+    def build(cls, documents: Iterable[Dict[str, Any]]) -> "CompatibilityTable":
+        """由商品文件（build_product_documents 的輸出）建立對照表"""
+        table = cls()
+        for document in documents:
+            sku = document["doc_id"]
+            if sku in table.bits:
+                continue
+            bit = 1 << len(table.skus)
+            table.bits[sku] = len(table.skus)
+            table.skus.append(sku)
+
+            if document.get("size_max_inch") is not None:
+                table._add_range("inch", sku, 0, document["size_max_inch"], bit)
+            if document.get("tray_max_inch") is not None:
+                table._add_range("inch", sku, document["tray_min_inch"], document["tray_max_inch"], bit)
+            if document.get("weight_max_kg") is not None:
+                table._add_range("kg", sku, document["weight_min_kg"], document["weight_max_kg"], bit)
+            if document.get("desk_max_mm") is not None:
+                table._add_range("desk_mm", sku, document["desk_min_mm"], document["desk_max_mm"], bit)
+            for pattern in document.get("vesa") or []:
+                table._add("vesa", pattern, bit)
+        return table
+
+    def _requirements(self, inch: float = None, vesa: str = None, kg: float = None,
+                      desk_mm: float = None) -> Dict[str, Tuple[str, Any]]:
+        """各維度的 (bucket, 原始查詢值)"""
+        requirements = {}
+        if inch is not None:
+            requirements["inch"] = (str(to_bucket("inch", inch)), inch)
+        if vesa:
+            pattern = normalize_vesa(vesa) or vesa
+            requirements["vesa"] = (pattern, pattern)
+        if kg is not None:
+            requirements["kg"] = (str(to_bucket("kg", kg)), kg)
+        if desk_mm is not None:
+            requirements["desk_mm"] = (str(to_bucket("desk_mm", desk_mm)), desk_mm)
+        return requirements
+
+    def compatible_skus(self, inch: float = None, vesa: str = None, kg: float = None,
+                        desk_mm: float = None) -> List[str]:
+        """所有給定維度都相容的 SKU"""
+        mask = (1 << len(self.skus)) - 1
+        for dimension, (bucket, value) in self._requirements(inch, vesa, kg, desk_mm).items():
+            mask = self._matches(dimension, bucket, value, mask)
+        return [sku for index, sku in enumerate(self.skus) if mask >> index & 1]
+
+    def check(self, sku: str, inch: float = None, vesa: str = None, kg: float = None,
+              desk_mm: float = None) -> Optional[Dict[str, Optional[bool]]]:
+        """單一 SKU 各維度是否相容；商品沒有該維度規格時為 None，SKU 不存在時回傳 None"""
+        if sku not in self.bits:
+            return None
+        bit = 1 << self.bits[sku]
+        result: Dict[str, Optional[bool]] = {}
+        for dimension, (bucket, value) in self._requirements(inch, vesa, kg, desk_mm).items():
+            if not self.known[dimension] & bit:
+                result[dimension] = None
+            else:
+                result[dimension] = bool(self._matches(dimension, bucket, value, bit))
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"skus": self.skus, "masks": self.masks, "known": self.known, "edges": self.edges,
+                "ranges": self.ranges}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompatibilityTable":
+        return cls(skus=data["skus"], masks=data["masks"], known=data["known"], edges=data.get("edges"),
+                   ranges=data.get("ranges"))
+
+    def save(self, path: str = None):
+        """原子寫入 JSON"""
+        path = pathlib.Path(path or SETTINGS.COMPATIBILITY_TABLE_PATH)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.to_dict(), ensure_ascii=False))
+        os.replace(tmp_path, path)
+        logfire.info(f"相容性對照表已寫入: {path}", skus=len(self.skus))
+
+
+_table: Optional[CompatibilityTable] = None
+_table_mtime_ns: Optional[int] = None
+_table_lock = threading.Lock()
+
+
+def get_compatibility_table() -> Optional[CompatibilityTable]:
+    """取得相容性對照表，檔案更新時重新載入；尚未建立時回傳 None"""
+    global _table, _table_mtime_ns
+    path = pathlib.Path(SETTINGS.COMPATIBILITY_TABLE_PATH)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if mtime_ns != _table_mtime_ns:
+        with _table_lock:
+            if mtime_ns != _table_mtime_ns:
+                _table = CompatibilityTable.from_dict(json.loads(path.read_text()))
+                _table_mtime_ns = mtime_ns
+    return _table
+
+
+def rebuild_compatibility_table(documents: Iterable[Dict[str, Any]], path: str = None) -> CompatibilityTable:
+    """商品匯入後重建相容性對照表"""
+    table = CompatibilityTable.build(documents)
+    table.save(path)
+    return table
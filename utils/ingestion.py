@@ -0,0 +1,149 @@
+"""
+增量匯入
+以穩定 ID 與內容雜湊比對集合現況，只 upsert 新增 / 變更的文件、刪除已移除的文件，
+嵌入文字未變更時沿用既有向量，不重新編碼
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import logfire
+
+from cores.schemas import get_collection_spec
+from cores.storages import (
+    get_client,
+    create_collection,
+    upsert_data,
+    query_all,
+    get_by_ids,
+    delete_by_ids,
+)
+from cores.tool_cache import bump_collection_version
+from utils.parser import attach_embeddings
+
+
+def schema_outdated(collection_name: str) -> bool:
+    """既有集合的欄位與宣告式 schema 不符時回傳 True"""
+    spec = get_collection_spec(collection_name)
+    client = get_client()
+    if spec is None or not client.has_collection(collection_name):
+        return False
+    fields = {field["name"] for field in client.describe_collection(collection_name)["fields"]}
+    return not set(spec.field_names).issubset(fields)
+
+
+def load_existing_hashes(collection_name: str) -> Dict[int, Dict[str, str]]:
+    """讀出集合內每筆文件的雜湊"""
+    rows = query_all(collection_name, output_fields=["id", "content_hash", "embed_hash"])
+    return {row["id"]: row for row in rows}
+
+
+def prepare_collection(collection_name: str, recreate: bool = False) -> Dict[int, Dict[str, str]]:
+    """建立（必要時重建）集合，回傳既有文件的雜湊"""
+    if recreate or schema_outdated(collection_name):
+        logfire.warning(f"集合 {collection_name} 重建（recreate={recreate}）")
+        create_collection(collection_name, recreate=True)
+        return {}
+    create_collection(collection_name)
+    return load_existing_hashes(collection_name)
+
+
+def diff_documents(documents: List[Dict[str, Any]], texts: List[str], existing: Dict[int, Dict[str, str]],
+                   seen: set, counts: Dict[str, int]) -> Tuple[List[Tuple[Dict[str, Any], str]],
+                                                               List[Tuple[Dict[str, Any], str]]]:
+    """與既有雜湊比對，回傳 (需要重新編碼, 可沿用向量) 的文件；比對過的 id 會從 existing 移除"""
+    to_embed, to_reuse = [], []
+    for document, text in zip(documents, texts):
+        if document["id"] in seen:
+            continue
+        seen.add(document["id"])
+        previous = existing.pop(document["id"], None)
+
+        if previous is None:
+            counts["added"] += 1
+        elif previous["content_hash"] == document["content_hash"]:
+            counts["unchanged"] += 1
+            continue
+        else:
+            counts["changed"] += 1
+            if previous["embed_hash"] == document["embed_hash"]:
+                to_reuse.append((document, text))
+                continue
+
+        to_embed.append((document, text))
+    return to_embed, to_reuse
+
+
+def reuse_vectors(collection_name: str, to_reuse: List[Tuple[Dict[str, Any], str]]
+                  ) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], str]]]:
+    """嵌入文字未變更：取回既有向量；回傳 (已附上向量的文件, 找不到向量而需重新編碼的文件)"""
+    if not to_reuse:
+        return [], []
+    ids = [document["id"] for document, _ in to_reuse]
+    vectors = {row["id"]: row["vector"] for row in get_by_ids(collection_name, ids, output_fields=["vector"])}
+    reusable, missing = [], []
+    for document, text in to_reuse:
+        if document["id"] in vectors:
+            document["vector"] = vectors[document["id"]]
+            reusable.append(document)
+        else:
+            missing.append((document, text))
+    return reusable, missing
+
+
+def delete_removed(collection_name: str, existing: Dict[int, Dict[str, str]], batch_size: int = 500) -> int:
+    """刪除來源中已不存在的文件，回傳實際刪除的筆數；刪除成功的 id 會從 existing 移除，失敗的留在 existing"""
+    ids = list(existing)
+    deleted = 0
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        result = delete_by_ids(collection_name, batch)
+        if not result.get("success"):
+            continue
+        deleted += len(batch)
+        for doc_id in batch:
+            existing.pop(doc_id, None)
+    if existing:
+        # 文件仍在集合中，下次匯入時會再次被判定為已移除而重試刪除
+        logfire.error(f"集合 {collection_name} 有 {len(existing)} 筆已移除的文件刪除失敗", deleted=deleted,
+                      failed_ids=list(existing)[:20])
+    return deleted
+
+
+def new_counts() -> Dict[str, int]:
+    return {"added": 0, "changed": 0, "unchanged": 0, "deleted": 0, "delete_failed": 0, "embedded": 0}
+
+
+def sync_collection(collection_name: str, documents: List[Dict[str, Any]], texts: List[str],
+                    batch_size: int = 500, recreate: bool = False,
+                    encode_fn: Optional[Callable[[List[str]], List[List[float]]]] = None) -> Dict[str, int]:
+    """將文件增量同步到集合，回傳新增 / 變更 / 未變更 / 刪除 / 重新編碼的筆數"""
+    existing = prepare_collection(collection_name, recreate)
+    counts = new_counts()
+    to_embed, to_reuse = diff_documents(documents, texts, existing, set(), counts)
+
+    # 嵌入文字未變更：沿用既有向量
+    for start in range(0, len(to_reuse), batch_size):
+        reusable, missing = reuse_vectors(collection_name, to_reuse[start:start + batch_size])
+        to_embed.extend(missing)
+        if reusable:
+            upsert_data(collection_name, reusable)
+
+    for start in range(0, len(to_embed), batch_size):
+        batch = [document for document, _ in to_embed[start:start + batch_size]]
+        batch_texts = [text for _, text in to_embed[start:start + batch_size]]
+        if encode_fn is None:
+            attach_embeddings(batch, batch_texts)
+        else:
+            for document, vector in zip(batch, encode_fn(batch_texts)):
+                document["vector"] = vector
+        upsert_data(collection_name, batch)
+        counts["embedded"] += len(batch)
+
+    if existing:
+        counts["deleted"] = delete_removed(collection_name, existing, batch_size)
+        counts["delete_failed"] = len(existing)
+
+    if counts["added"] or counts["changed"] or counts["deleted"]:
+        bump_collection_version(collection_name)
+
+    logfire.info(f"集合 {collection_name} 同步完成", **counts)
+    return counts
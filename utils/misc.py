@@ -0,0 +1,18 @@
+import hashlib
+import json
+
+from typing import Any
+
+
+def stable_id(*parts: Any) -> int:
+    """由內容推導出跨行程穩定的 64 位元 ID（Milvus INT64 主鍵，保持為正數）"""
+    key = "\x1f".join(str(part) for part in parts)
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & 0x7FFFFFFFFFFFFFFF
+
+
+def content_hash(payload: Any) -> str:
+    """計算文件內容雜湊，用於判斷資料是否變更"""
+    if not isinstance(payload, str):
+        payload = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
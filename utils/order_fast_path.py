@@ -0,0 +1,131 @@
+"""
+訂單狀態快速路徑
+「JTCG-202508-10001 到哪了」、單獨的 u_123456 這類訊息直接查詢訂單並以模板回覆，不經過任何 LLM；
+訊息含其他意圖（退貨、改地址…）時回傳 None，交由原本的 agent 路徑處理
+"""
+import re
+from typing import List, Optional
+
+import logfire
+
+from agents.models import Order
+from cores.order_repository import get_order_repository
+from cores.settings import SETTINGS
+
+ORDER_ID_PATTERN = re.compile(r"JTCG-\d{6}-\d{5}", re.IGNORECASE)
+USER_ID_PATTERN = re.compile(r"(?<![A-Za-z0-9])u_\d{6}(?![A-Za-z0-9])", re.IGNORECASE)
+_CJK = re.compile(r"[一-鿿]")
+
+# 去除 id 後只剩這些詞（與標點）時視為單純的狀態查詢
+_STATUS_PHRASES = re.compile(
+    r"請問|麻煩|幫我|幫忙|查詢|查一下|查|一下|看看|我的|我|的|訂單|用戶|會員|帳號|編號|號碼|"
+    r"到哪了|到哪裡|到哪|在哪裡|在哪|狀態|進度|出貨了|出貨|寄出|送達|到貨|物流|什麼時候|何時|了|嗎|呢|吧|是|"
+    r"\b(?:hi|hello|please|can|could|you|check|track|tracking|where|is|are|what|what's|whats|the|my|"
+    r"order|orders|status|user|id|of|for|on|it|shipped|delivered|yet|now)\b",
+    re.IGNORECASE,
+)
+_FILLER = re.compile(r"[\s\W_]+")
+
+STATUS_LABELS = {
+    "zh": {"processing": "處理中", "shipped": "已出貨", "in_transit": "運送中", "delivered": "已送達"},
+    "en": {"processing": "processing", "shipped": "shipped", "in_transit": "in transit", "delivered": "delivered"},
+}
+
+TEMPLATES = {
+    "zh": {
+        "order": "訂單 {order_id}（{placed_at} 下單）目前狀態：{status}。",
+        "carrier": "物流：{carrier}，追蹤碼 {tracking}。",
+        "eta": "預計 {eta} 送達。",
+        "url": "訂單詳情：{order_url}",
+        "need_user": "請提供您的用戶 ID（格式如 u_123456），以便查詢訂單 {order_id}。",
+        "not_found": "查無用戶 {user_id} 的訂單 {order_id}，請確認訂單編號是否正確。",
+        "no_orders": "用戶 {user_id} 目前沒有訂單紀錄。",
+        "list_header": "用戶 {user_id} 最近的訂單：",
+        "list_item": "- {order_id}：{status}（{placed_at} 下單）",
+    },
+    "en": {
+        "order": "Order {order_id} (placed {placed_at}) is currently {status}.",
+        "carrier": "Carrier: {carrier}, tracking number {tracking}.",
+        "eta": "Estimated delivery: {eta}.",
+        "url": "Order details: {order_url}",
+        "need_user": "Please provide your user ID (e.g. u_123456) so we can look up order {order_id}.",
+        "not_found": "We couldn't find order {order_id} for user {user_id}. Please check the order number.",
+        "no_orders": "User {user_id} has no orders yet.",
+        "list_header": "Recent orders for user {user_id}:",
+        "list_item": "- {order_id}: {status} (placed {placed_at})",
+    },
+}
+
+
+def detect_language(message: str) -> str:
+    """去除 id 後含英文字且無中文時回覆英文，其餘（含只有 id 的訊息）回覆中文"""
+    text = USER_ID_PATTERN.sub(" ", ORDER_ID_PATTERN.sub(" ", message))
+    if _CJK.search(text) or not re.search(r"[A-Za-z]{2,}", text):
+        return "zh"
+    return "en"
+
+
+def is_simple_status_query(message: str) -> bool:
+    """訊息去除 id 與狀態查詢用語後沒有其他內容"""
+    residual = ORDER_ID_PATTERN.sub(" ", message)
+    residual = USER_ID_PATTERN.sub(" ", residual)
+    residual = _STATUS_PHRASES.sub(" ", residual)
+    return not _FILLER.sub("", residual)
+
+
+def render_order(order: Order, language: str) -> str:
+    """單筆訂單的模板回覆"""
+    template = TEMPLATES[language]
+    lines = [template["order"].format(
+        order_id=order.order_id,
+        placed_at=order.placed_at.date().isoformat(),
+        status=STATUS_LABELS[language].get(order.status, order.status),
+    )]
+    if order.carrier and order.tracking:
+        lines.append(template["carrier"].format(carrier=order.carrier, tracking=order.tracking))
+    if order.eta and order.status != "delivered":
+        lines.append(template["eta"].format(eta=order.eta.isoformat()))
+    lines.append(template["url"].format(order_url=order.order_url))
+    return "\n".join(lines)
+
+
+def render_order_list(user_id: str, orders: List[Order], language: str) -> str:
+    """用戶最近訂單的模板回覆"""
+    template = TEMPLATES[language]
+    if not orders:
+        return template["no_orders"].format(user_id=user_id)
+    lines = [template["list_header"].format(user_id=user_id)]
+    lines += [template["list_item"].format(
+        order_id=order.order_id,
+        status=STATUS_LABELS[language].get(order.status, order.status),
+        placed_at=order.placed_at.date().isoformat(),
+    ) for order in orders]
+    return "\n".join(lines)
+
+
+async def answer_order_status(message: str) -> Optional[str]:
+    """單純的訂單狀態查詢直接回覆；無法確定時回傳 None"""
+    order_ids = {match.upper() for match in ORDER_ID_PATTERN.findall(message)}
+    user_ids = {match.lower() for match in USER_ID_PATTERN.findall(message)}
+    if not order_ids and not user_ids:
+        return None
+    if len(order_ids) > 1 or len(user_ids) > 1 or not is_simple_status_query(message):
+        return None
+
+    language = detect_language(message)
+    template = TEMPLATES[language]
+    order_id = next(iter(order_ids), None)
+    user_id = next(iter(user_ids), None)
+    repository = get_order_repository()
+
+    if user_id is None:
+        return template["need_user"].format(order_id=order_id)
+    if order_id is None:
+        orders = await repository.list_user_orders(user_id, limit=SETTINGS.ORDER_PAGE_SIZE)
+        return render_order_list(user_id, orders, language)
+
+    order = await repository.get_order(order_id, user_id=user_id)
+    if order is None:
+        return template["not_found"].format(order_id=order_id, user_id=user_id)
+    logfire.info("訂單狀態快速路徑", order_id=order_id, user_id=user_id, language=language)
+    return render_order(order, language)
@@ -0,0 +1,109 @@
+"""
+訂單工具結果的精簡輸出
+依問題關鍵字只保留需要的欄位、最近 N 筆分頁、無空白 JSON，並以 token 上限截斷：
+先自尾端捨棄訂單（next_cursor 指向下一筆），只剩一筆仍超過時再截短長欄位、捨棄品項（items_omitted 記錄筆數），
+最後只留基本欄位；單筆訂單被截斷時輸出 truncated: true
+"""
+import json
+from typing import Any, Dict, List, Sequence
+
+import logfire
+
+from agents.models import Order
+from utils.tokens import estimate_tokens
+
+BASE_FIELDS = ["order_id", "status", "placed_at"]
+# 單筆訂單超過 token 上限時，文字欄位截短到此長度
+MAX_FIELD_CHARS = 40
+
+# 問題關鍵字 → 額外輸出的欄位
+FIELD_KEYWORDS = {
+    ("物流", "配送", "運送", "出貨", "到貨", "追蹤", "貨運", "宅配", "ship", "track", "deliver", "carrier", "eta"):
+        ["carrier", "tracking", "eta"],
+    ("地址", "寄到", "收件", "address"): ["shipping_address"],
+    ("電話", "聯絡", "手機", "phone", "contact"): ["contact_phone"],
+    ("商品", "品項", "內容", "買了", "數量", "item", "product", "sku"): ["items"],
+    ("連結", "網址", "link", "url"): ["order_url"],
+}
+
+_tokens_histogram = logfire.metric_histogram(
+    "order_data.tool_tokens", unit="1", description="order_data 工具回傳給 LLM 的 token 數")
+
+
+def select_fields(question: str) -> List[str]:
+    """依問題決定輸出欄位；沒有命中任何關鍵字時附上物流與品項摘要"""
+    question = (question or "").lower()
+    fields = list(BASE_FIELDS)
+    for keywords, extra in FIELD_KEYWORDS.items():
+        if any(keyword in question for keyword in keywords):
+            fields += [field for field in extra if field not in fields]
+    if fields == BASE_FIELDS:
+        fields += ["carrier", "eta", "items"]
+    return fields
+
+
+def project_order(order: Order, fields: Sequence[str]) -> Dict[str, Any]:
+    """只保留指定欄位，空值不輸出；品項只留名稱與數量"""
+    projected = {}
+    for field in fields:
+        value = getattr(order, field, None)
+        if value in (None, "", []):
+            continue
+        if field == "items":
+            value = [{"name": item.get("name") or item.get("sku"), "qty": item.get("qty", 1)} for item in value]
+        elif hasattr(value, "isoformat"):
+            value = value.isoformat()
+        projected[field] = value
+    return projected
+
+
+def shrink_order(row: Dict[str, Any]) -> bool:
+    """縮小一筆已投影的訂單一步：截短長文字欄位 → 自尾端捨棄品項 → 捨棄非基本欄位；已無法再縮小時回傳 False"""
+    for field, value in row.items():
+        if field not in BASE_FIELDS and isinstance(value, str) and len(value) > MAX_FIELD_CHARS:
+            row[field] = value[:MAX_FIELD_CHARS - 1] + "…"
+            return True
+    if row.get("items"):
+        row["items"].pop()
+        row["items_omitted"] = row.get("items_omitted", 0) + 1
+        if not row["items"]:
+            del row["items"]
+        return True
+    extra = [field for field in row if field not in BASE_FIELDS and field != "items_omitted"]
+    if extra:
+        del row[extra[-1]]
+        return True
+    return False
+
+
+def render_orders(orders: List[Order], question: str = "", offset: int = 0, has_more: bool = False,
+                  token_budget: int = 800) -> str:
+    """輸出精簡 JSON；超過 token 上限時自尾端捨棄訂單，next_cursor 指向下一筆未輸出的訂單，
+    只剩一筆仍超過時縮小該筆訂單並標記 truncated"""
+    fields = select_fields(question)
+    rows = [project_order(order, fields) for order in orders]
+    truncated = False
+
+    def dumps() -> str:
+        payload: Dict[str, Any] = {"orders": rows}
+        if has_more or len(rows) < len(orders):
+            payload["next_cursor"] = str(offset + len(rows))
+        if truncated:
+            payload["truncated"] = True
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str)
+
+    text = dumps()
+    while estimate_tokens(text) > token_budget:
+        if len(rows) > 1:
+            rows.pop()
+        elif rows and shrink_order(rows[0]):
+            truncated = True
+        else:
+            logfire.warning("order_data 工具輸出無法縮小到 token 上限", token_budget=token_budget)
+            break
+        text = dumps()
+
+    tokens = estimate_tokens(text)
+    _tokens_histogram.record(tokens)
+    logfire.info("order_data 工具輸出", tokens=tokens, orders=len(rows), fields=fields, truncated=truncated)
+    return text
@@ -0,0 +1,81 @@
+"""
+多行程平行嵌入
+將文字分片到 process pool，每個 worker 只載入一次模型並限制 torch 執行緒數，結果依原順序合併
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import logfire
+
+from cores.settings import SETTINGS
+from cores.storages import DEFAULT_EMBEDDING_MODEL
+
+# worker 行程內的模型
+_worker_model = None
+_worker_batch_size = 64
+
+
+def _init_worker(model_name: str, torch_threads: int, batch_size: int):
+    """worker 啟動時載入模型一次"""
+    global _worker_model, _worker_batch_size
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(torch_threads)
+    _worker_model = SentenceTransformer(model_name)
+    _worker_batch_size = batch_size
+
+
+def _encode_shard(texts: List[str]) -> List[List[float]]:
+    return _worker_model.encode(texts, batch_size=_worker_batch_size).tolist()
+
+
+class ParallelEncoder:
+    """以 process pool 平行編碼，可作為 run_streaming_ingestion 的 encode_fn"""
+
+    def __init__(self, workers: int = None, torch_threads: int = None,
+                 model_name: str = DEFAULT_EMBEDDING_MODEL, batch_size: int = None,
+                 shard_size: Optional[int] = None):
+        self.workers = workers or SETTINGS.EMBEDDING_WORKERS
+        self.torch_threads = torch_threads or SETTINGS.EMBEDDING_TORCH_THREADS
+        self.model_name = model_name
+        self.batch_size = batch_size or SETTINGS.EMBEDDING_BATCH_SIZE
+        self.shard_size = shard_size or self.batch_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> "ParallelEncoder":
+        if self._executor is None:
+            # spawn 避免 fork 已初始化的 torch 執行緒池
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.torch_threads, self.batch_size),
+            )
+            logfire.info(f"平行嵌入啟動: workers={self.workers}, torch_threads={self.torch_threads}")
+        return self
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "ParallelEncoder":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.close()
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        """分片平行編碼，結果順序與輸入一致"""
+        if not texts:
+            return []
+        self.start()
+        shards = [texts[start:start + self.shard_size] for start in range(0, len(texts), self.shard_size)]
+        vectors: List[List[float]] = []
+        for shard_vectors in self._executor.map(_encode_shard, shards):
+            vectors.extend(shard_vectors)
+        return vectors
+
+    __call__ = encode
@@ -1,211 +1,322 @@
 import pathlib
+import time
 
+import ijson
+import logfire
 import pandas as pd
-import json
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
 from datetime import datetime
 from agents.models import Brand, User, Order, Item, Product
-from cores.storages import generate_embedding
+from cores.settings import SETTINGS
+from cores.storages import generate_embeddings
+from utils.misc import stable_id, content_hash
+from utils.specs import parse_spec_fields
+
+
+def _attach_hashes(document: Dict[str, Any], embedding_text: str) -> Dict[str, Any]:
+    """加上嵌入文字雜湊與整份文件雜湊，供增量匯入比對"""
+    document["embed_hash"] = content_hash(embedding_text)
+    document["content_hash"] = content_hash(document)
+    return document
+
+
+def _column(df: pd.DataFrame, name: str, default: Any = '') -> List[Any]:
+    """取出整欄資料，欄位不存在時以預設值填滿"""
+    if name in df.columns:
+        return df[name].tolist()
+    return [default] * len(df)
+
+
+def embed_texts(texts: List[str], batch_size: int = None, progress: bool = True) -> List[List[float]]:
+    """分塊批次編碼，每塊一次 encode 呼叫，並回報進度與吞吐量"""
+    batch_size = batch_size or SETTINGS.EMBEDDING_BATCH_SIZE
+    vectors: List[List[float]] = []
+    total = len(texts)
+    started_at = time.perf_counter()
+
+    for start in range(0, total, batch_size):
+        vectors.extend(generate_embeddings(texts[start:start + batch_size], batch_size=batch_size))
+        if progress:
+            done = len(vectors)
+            elapsed = time.perf_counter() - started_at
+            logfire.info(f"嵌入進度 {done}/{total}",
+                         done=done, total=total, rows_per_second=round(done / elapsed, 1) if elapsed else None)
+
+    return vectors
+
+
+def attach_embeddings(documents: List[Dict[str, Any]], texts: List[str],
+                      batch_size: int = None) -> List[Dict[str, Any]]:
+    """為文件加上嵌入向量"""
+    for document, vector in zip(documents, embed_texts(texts, batch_size=batch_size)):
+        document["vector"] = vector
+    return documents
+
+
+def build_faq_documents(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """組合 FAQ 文件與嵌入文字（尚未生成向量）"""
+    # 組合文字內容用於嵌入
+    texts = [f"{title} {content}" for title, content in zip(df['title'], df['content'])]
+
+    # 處理標籤 tags/0, tags/1, tags/2
+    tag_columns = [_column(df, f'tags/{i}', None) for i in range(3)]
+    tags = [[tag for tag in row_tags if pd.notna(tag)] for row_tags in zip(*tag_columns)]
+
+    documents = []
+    for doc_id, title, content, url_label, url_href, image, row_tags, text in zip(
+            df['id'], df['title'], df['content'], _column(df, 'urls/0/label'), _column(df, 'urls/0/href'),
+            _column(df, 'images/0'), tags, texts):
+        document = {
+            "id": stable_id(doc_id),
+            "doc_id": doc_id,
+            "doc_type": "faq",
+            "title": title,
+            "content": content,
+            "metadata": {
+                "url_label": url_label,
+                "url_href": url_href,
+                "image": image,
+                "tags": row_tags
+            }
+        }
+        documents.append(_attach_hashes(document, text))
 
+    return documents, texts
 
-def prepare_faq_data(df: pd.DataFrame) -> List[Dict[str, Any]]:
-    """準備 FAQ 資料用於插入"""
-    data_list = []
 
-    for _, row in df.iterrows():
-        # 組合文字內容用於嵌入
-        content_text = f"{row['title']} {row['content']}"
+def prepare_faq_data(df: pd.DataFrame, batch_size: int = None) -> List[Dict[str, Any]]:
+    """準備 FAQ 資料用於插入"""
+    documents, texts = build_faq_documents(df)
+    return attach_embeddings(documents, texts, batch_size=batch_size)
 
-        # 處理標籤
-        tags = []
-        for i in range(3):  # tags/0, tags/1, tags/2
-            tag_col = f'tags/{i}'
-            if tag_col in row and pd.notna(row[tag_col]):
-                tags.append(row[tag_col])
 
-        embedding = generate_embedding(content_text)
+def build_classification_documents(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """組合 Classification 文件與嵌入文字（尚未生成向量）"""
+    texts = (df['faq_id'] + df['agent_type']).tolist()
 
-        data_item = {
-            "id": hash(row['id']) & 0x7FFFFFFF,
-            "doc_id": row['id'],
-            "doc_type": "faq",
-            "title": row['title'],
-            "content": row['content'],
-            "vector": embedding,
-            "metadata": {
-                "url_label": row.get('urls/0/label', ''),
-                "url_href": row.get('urls/0/href', ''),
-                "image": row.get('images/0', ''),
-                "tags": tags
-            }
+    documents = []
+    for faq_id, agent_type, text in zip(df['faq_id'], df['agent_type'], texts):
+        document = {
+            "id": stable_id(faq_id, agent_type),
+            "faq_id": faq_id,
+            "agent_type": agent_type,
         }
-        data_list.append(data_item)
+        documents.append(_attach_hashes(document, text))
 
-    return data_list
+    return documents, texts
 
 
-def prepare_classification_data(df: pd.DataFrame) -> List[Dict[str, Any]]:
+def prepare_classification_data(df: pd.DataFrame, batch_size: int = None) -> List[Dict[str, Any]]:
     """準備 Classification 資料用於插入"""
-    data_list = []
-
-    for _, row in df.iterrows():
-        embedding = generate_embedding(row['faq_id'] + row['agent_type'])
-        data_item = {
-            "id": hash(row['faq_id']) & 0x7FFFFFFF,
-            "faq_id": row['faq_id'],
-            "agent_type": row['agent_type'],
-            "vector": embedding,
-        }
-        data_list.append(data_item)
-    return data_list
-
-
-def prepare_product_data(df: pd.DataFrame) -> List[Dict[str, Any]]:
-    """準備產品資料用於插入"""
-    data_list = []
-
-    for _, row in df.iterrows():
-        # 組合文字內容用於嵌入
-        content_text = f"{row['name']} {row.get('compatibility_notes', '')}"
-
-        # 處理規格資訊
-        specs = {}
-        for col in df.columns:
-            if col.startswith('specs/'):
-                spec_key = col.replace('specs/', '')
-                if pd.notna(row[col]):
-                    specs[spec_key] = row[col]
-
-        # 生成嵌入向量
-        embedding = generate_embedding(content_text)
-
-        data_item = {
-            "id": hash(row['sku']) & 0x7FFFFFFF,
-            "doc_id": row['sku'],
+    documents, texts = build_classification_documents(df)
+    return attach_embeddings(documents, texts, batch_size=batch_size)
+
+
+def build_product_documents(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """組合產品文件與嵌入文字（尚未生成向量）"""
+    notes = _column(df, 'compatibility_notes')
+
+    # 組合文字內容用於嵌入
+    texts = [f"{name} {note}" for name, note in zip(df['name'], notes)]
+
+    # 處理規格資訊
+    spec_columns = [col for col in df.columns if col.startswith('specs/')]
+    spec_keys = [col.replace('specs/', '') for col in spec_columns]
+    specs = [
+        {key: value for key, value in zip(spec_keys, values) if pd.notna(value)}
+        for values in zip(*(df[col].tolist() for col in spec_columns))
+    ] if spec_columns else [{} for _ in range(len(df))]
+
+    documents = []
+    for sku, name, url, image, note, row_specs, text in zip(
+            df['sku'], df['name'], _column(df, 'url'), _column(df, 'images/0'), notes, specs, texts):
+        document = {
+            "id": stable_id(sku),
+            "doc_id": sku,
             "doc_type": "product",
-            "title": row['name'],
-            "content": content_text,
-            "vector": embedding,
+            "title": name,
+            "content": text,
             "metadata": {
-                "sku": row['sku'],
-                "url": row.get('url', ''),
-                "image": row.get('images/0', ''),
-                "specs": specs,
-                "compatibility_notes": row.get('compatibility_notes', '')
-            }
+                "sku": sku,
+                "url": url,
+                "image": image,
+                "specs": row_specs,
+                "compatibility_notes": note
+            },
+            **parse_spec_fields(row_specs),
         }
-        data_list.append(data_item)
+        documents.append(_attach_hashes(document, text))
 
-    return data_list
+    return documents, texts
 
 
-def prepare_order_data(json_file_path: str) -> List[dict[str, Any]]:
-    """準備訂單資料用於插入"""
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+def prepare_product_data(df: pd.DataFrame, batch_size: int = None) -> List[Dict[str, Any]]:
+    """準備產品資料用於插入"""
+    documents, texts = build_product_documents(df)
+    return attach_embeddings(documents, texts, batch_size=batch_size)
+
+
+def _iter_order_records(json_file_path: str) -> Iterator[Tuple[str, str, Any]]:
+    """單次掃描 orders.json，依序產生 ("meta", key, value)、("user", user_id, None)、("order", user_id, order)
+
+    以 ijson 增量解析，一次只在記憶體中保留一筆訂單。依容器深度而非 ijson 的點號 prefix 判斷位置，
+    user_id 含 "." 時也能正確比對
+    """
+    # 每層容器一個 frame：map 為目前的 key，array 為 None
+    path: List[Any] = []
+    builder = None
+    depth = 0
+    user_id = None
+    with open(json_file_path, 'rb') as f:
+        for event, value in ijson.basic_parse(f, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if event in ('start_map', 'start_array'):
+                    depth += 1
+                elif event in ('end_map', 'end_array'):
+                    depth -= 1
+                    if depth == 0:
+                        yield "order", user_id, builder.value
+                        builder = None
+                continue
+
+            if event == 'map_key':
+                path[-1] = value
+                if len(path) == 2 and path[0] == 'orders_db':
+                    user_id = value
+                    yield "user", user_id, None
+            elif event == 'start_map' and len(path) == 4 and path[0] == 'orders_db' and path[2] == 'orders' \
+                    and path[3] is None:
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                depth = 1
+            elif event in ('start_map', 'start_array'):
+                path.append(None)
+            elif event in ('end_map', 'end_array'):
+                path.pop()
+            elif len(path) == 1 and path[0] in ('brand', 'generated_at') and event == 'string':
+                yield "meta", path[0], value
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _build_brand(meta: Dict[str, Any]) -> Brand:
+    return Brand(
+        id="jtcg_shop",
+        name=meta['brand'],
+        description=f"{meta['brand']} - 專業螢幕支架品牌",
+        created_at=_parse_datetime(meta['generated_at']) if meta.get('generated_at') else datetime.now()
+    )
+
 
-    orders = []
+def iter_order_entities(json_file_path: str) -> Iterator[Tuple[str, Any]]:
+    """單次掃描 orders.json，同時產生 user / order / item / product / brand
 
-    for user_id, user_orders in data['orders_db'].items():
-        for order_data in user_orders['orders']:
+    - user / order / item / product 以 model_dump() 後的 dict 產生
+    - product 依 SKU 去重，只在第一次出現時產生
+    - brand 在 brand 與 generated_at 都讀到後（或掃描結束時）產生 Brand 實例
+    """
+    products_seen = set()
+    item_counter = 1
+    meta: Dict[str, Any] = {}
+    brand_emitted = False
+
+    for kind, key, value in _iter_order_records(json_file_path):
+        now = datetime.now()
+        if kind == "meta":
+            meta[key] = value
+            if not brand_emitted and 'brand' in meta and 'generated_at' in meta:
+                brand_emitted = True
+                yield "brand", _build_brand(meta)
+
+        elif kind == "user":
+            user = User(
+                id=key,
+                name=f"User {key}",  # 實際姓名不在資料中
+                email=f"{key}@example.com",  # 實際 email 不在資料中
+                created_at=now,
+                updated_at=now
+            )
+            yield "user", user.model_dump()
+
+        elif kind == "order":
             order = Order(
-                id=order_data['order_id'],
-                name=f"Order {order_data['order_id']}",
-                status=order_data['status'],
-                carrier=order_data.get('carrier', ''),
-                tracking=order_data.get('tracking', ''),
-                eta=datetime.fromisoformat(order_data['eta'].replace('Z', '+00:00')) if order_data.get(
-                    'eta') else datetime.now(),
-                shipping_address=order_data['shipping_address'],
-                contact_phone=order_data['contact_phone'],
-                order_url=order_data['order_url'],
-                placed_at=datetime.fromisoformat(order_data['placed_at'].replace('Z', '+00:00')),
-                created_at=datetime.now(),
-                updated_at=datetime.now()
+                order_id=value['order_id'],
+                status=value['status'],
+                carrier=value.get('carrier', ''),
+                tracking=value.get('tracking', ''),
+                eta=value.get('eta'),
+                shipping_address=value['shipping_address'],
+                contact_phone=value['contact_phone'],
+                order_url=value['order_url'],
+                placed_at=_parse_datetime(value['placed_at']),
+                items=value.get('items', []),
+                user_id=key,
+                created_at=now,
+                updated_at=now
             )
-            orders.append(order.model_dump())
+            yield "order", order.model_dump()
+
+            for item_data in value.get('items', []):
+                item = Item(
+                    id=f"item_{item_counter:06d}",
+                    product_id=item_data['sku'],
+                    order_id=value['order_id'],
+                    created_at=now
+                )
+                item_counter += 1
+                yield "item", item.model_dump()
 
-    return orders
+                if item_data['sku'] not in products_seen:
+                    products_seen.add(item_data['sku'])
+                    product = Product(
+                        id=item_data['sku'],
+                        sku=item_data['sku'],
+                        name=item_data['name'],
+                        quantity=0,  # 庫存資訊在這個資料中不可用
+                        created_at=now,
+                        updated_at=now
+                    )
+                    yield "product", product.model_dump()
 
+    if not brand_emitted and 'brand' in meta:
+        yield "brand", _build_brand(meta)
 
-def prepare_product_data_from_orders(json_file_path: str) -> List[dict[str, Any]]:
-    """從訂單中提取產品資料用於插入"""
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
 
-    products_seen = set()
-    products = []
+def parse_orders(json_file_path: str) -> Dict[str, Any]:
+    """單次掃描收集所有實體：users / orders / items / products / brand"""
+    entities: Dict[str, Any] = {"users": [], "orders": [], "items": [], "products": [], "brand": None}
+    for kind, entity in iter_order_entities(json_file_path):
+        if kind == "brand":
+            entities["brand"] = entity
+        else:
+            entities[f"{kind}s"].append(entity)
+    return entities
 
-    for user_orders in data['orders_db'].values():
-        for order in user_orders['orders']:
-            for item in order['items']:
-                if item['sku'] not in products_seen:
-                    products_seen.add(item['sku'])
 
-                    product = Product(
-                        id=item['sku'],
-                        sku=item['sku'],
-                        name=item['name'],
-                        quantity=0,  # 庫存資訊在這個資料中不可用
-                        created_at=datetime.now(),
-                        updated_at=datetime.now()
-                    )
-                    products.append(product.model_dump())
+def prepare_order_data(json_file_path: str) -> List[dict[str, Any]]:
+    """準備訂單資料用於插入"""
+    return parse_orders(json_file_path)["orders"]
 
-    return products
+
+def prepare_product_data_from_orders(json_file_path: str) -> List[dict[str, Any]]:
+    """從訂單中提取產品資料用於插入"""
+    return parse_orders(json_file_path)["products"]
 
 
 def prepare_user_data_from_orders(json_file_path: str) -> List[dict[str, Any]]:
     """從訂單中提取用戶資料用於插入"""
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    users = []
-    for user_id in data['orders_db'].keys():
-        user = User(
-            id=user_id,
-            name=f"User {user_id}",  # 實際姓名不在資料中
-            email=f"{user_id}@example.com",  # 實際 email 不在資料中
-            created_at=datetime.now(),
-            updated_at=datetime.now()
-        )
-        users.append(user.model_dump())
-
-    return users
+    return parse_orders(json_file_path)["users"]
 
 
 def prepare_brand_data_from_orders(json_file_path: str) -> Brand:
     """從訂單資料中提取品牌資料"""
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    return Brand(
-        id="jtcg_shop",
-        name=data['brand'],
-        description=f"{data['brand']} - 專業螢幕支架品牌",
-        created_at=datetime.fromisoformat(data['generated_at'].replace('Z', '+00:00'))
-    )
+    return parse_orders(json_file_path)["brand"]
 
 
 def prepare_item_data_from_orders(json_file_path: str) -> List[dict[str, Any]]:
     """從訂單中提取商品項目資料用於插入"""
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    items = []
-    item_counter = 1
-
-    for user_orders in data['orders_db'].values():
-        for order in user_orders['orders']:
-            for item_data in order['items']:
-                item = Item(
-                    id=f"item_{item_counter:06d}",
-                    product_id=item_data['sku'],
-                    order_id=order['order_id'],
-                    created_at=datetime.now()
-                )
-                items.append(item.model_dump())
-                item_counter += 1
-
-    return items
+    return parse_orders(json_file_path)["items"]
@@ -0,0 +1,226 @@
+"""
+串流匯入 pipeline
+chunked reader → batch encoder → batched inserter，各階段以有界佇列串接，記憶體只保留有限個 chunk；
+每個 chunk 寫入後記錄 checkpoint，中斷後重跑會從上次完成的位置繼續（穩定 ID + upsert 確保重送冪等）。
+與 sync_collection 相同走內容雜湊比對：schema 過期時重建、未變更的文件略過、只改 metadata 的文件沿用向量，
+整個來源讀完後刪除已移除的文件。記憶體中只多保留既有文件的 id 與雜湊
+"""
+import json
+import os
+import pathlib
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import logfire
+import pandas as pd
+
+from cores.storages import upsert_data
+from cores.tool_cache import bump_collection_version
+from utils.ingestion import delete_removed, diff_documents, new_counts, prepare_collection, reuse_vectors
+from utils.parser import embed_texts
+
+_END = object()
+
+BuildFn = Callable[[pd.DataFrame], Tuple[List[Dict[str, Any]], List[str]]]
+EncodeFn = Callable[[List[str]], List[List[float]]]
+
+
+class StageStats:
+    """單一階段的處理量與忙碌時間"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.busy_seconds if self.busy_seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wait_seconds": round(self.wait_seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+class IngestionCheckpoint:
+    """以 JSON 檔記錄每個來源已完成的 chunk 數"""
+
+    def __init__(self, path: str):
+        self.path = pathlib.Path(path)
+        self._state = json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    @staticmethod
+    def source_key(collection_name: str, csv_path: str, chunk_size: int) -> str:
+        """來源檔案大小 / 修改時間或 chunk 大小改變時視為新的來源"""
+        stat = os.stat(csv_path)
+        return f"{collection_name}:{csv_path}:{stat.st_size}:{int(stat.st_mtime)}:{chunk_size}"
+
+    def chunks_done(self, key: str) -> int:
+        return self._state.get(key, {}).get("chunks_done", 0)
+
+    def rows_done(self, key: str) -> int:
+        return self._state.get(key, {}).get("rows_done", 0)
+
+    def mark_done(self, key: str, chunks_done: int, rows_done: int):
+        self._state[key] = {"chunks_done": chunks_done, "rows_done": rows_done}
+        self._save()
+
+    def reset(self, collection_name: str):
+        """清除集合的所有 checkpoint（重建集合時使用）"""
+        self._state = {key: value for key, value in self._state.items()
+                       if not key.startswith(f"{collection_name}:")}
+        self._save()
+
+    def _save(self):
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._state, ensure_ascii=False, indent=2))
+        os.replace(tmp_path, self.path)
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event, stats: StageStats):
+    """放入有界佇列；下游失敗時放棄等待"""
+    started_at = time.perf_counter()
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            break
+        except queue.Full:
+            continue
+    stats.wait_seconds += time.perf_counter() - started_at
+
+
+def _get(q: queue.Queue, stop: threading.Event, stats: StageStats) -> Any:
+    started_at = time.perf_counter()
+    while not stop.is_set():
+        try:
+            item = q.get(timeout=0.5)
+            stats.wait_seconds += time.perf_counter() - started_at
+            return item
+        except queue.Empty:
+            continue
+    return _END
+
+
+def read_chunks(csv_path: str, chunk_size: int) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """分塊讀取 CSV"""
+    yield from enumerate(pd.read_csv(csv_path, chunksize=chunk_size))
+
+
+def run_streaming_ingestion(collection_name: str, csv_path: str, build_fn: BuildFn,
+                            chunk_size: int = 1000, batch_size: int = None, queue_size: int = 2,
+                            checkpoint_path: str = ".ingestion_checkpoint.json",
+                            encode_fn: Optional[EncodeFn] = None, recreate: bool = False) -> Dict[str, Any]:
+    """以串流方式將 CSV 增量同步到集合，回傳各階段吞吐量與新增 / 變更 / 未變更 / 刪除筆數"""
+    checkpoint = IngestionCheckpoint(checkpoint_path)
+    if recreate:
+        checkpoint.reset(collection_name)
+    existing = prepare_collection(collection_name, recreate)
+    encode_fn = encode_fn or (lambda texts: embed_texts(texts, batch_size=batch_size, progress=False))
+
+    key = IngestionCheckpoint.source_key(collection_name, str(csv_path), chunk_size)
+    skip_chunks = checkpoint.chunks_done(key)
+    if skip_chunks:
+        logfire.info(f"{collection_name} 從 checkpoint 繼續，略過 {skip_chunks} 個 chunk")
+
+    stats = {name: StageStats(name) for name in ("read", "encode", "insert")}
+    counts = new_counts()
+    seen: set = set()
+    encode_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    insert_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    def reader():
+        try:
+            chunks = read_chunks(csv_path, chunk_size)
+            while True:
+                started_at = time.perf_counter()
+                item = next(chunks, None)
+                if item is None:
+                    break
+                index, chunk = item
+                documents, texts = build_fn(chunk)
+                if index < skip_chunks:
+                    # 已完成的 chunk 不再寫入，但仍需標記為已見，否則最後會被當成已移除的文件刪除
+                    seen.update(document["id"] for document in documents)
+                    for document in documents:
+                        existing.pop(document["id"], None)
+                    continue
+                to_embed, to_reuse = diff_documents(documents, texts, existing, seen, counts)
+                stats["read"].busy_seconds += time.perf_counter() - started_at
+                stats["read"].rows += len(documents)
+                _put(encode_queue, (index, to_embed, to_reuse), stop, stats["read"])
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(encode_queue, _END, stop, stats["read"])
+
+    def encoder():
+        try:
+            while (item := _get(encode_queue, stop, stats["encode"])) is not _END:
+                index, to_embed, to_reuse = item
+                started_at = time.perf_counter()
+                documents, missing = reuse_vectors(collection_name, to_reuse)
+                to_embed = to_embed + missing
+                if to_embed:
+                    for (document, _), vector in zip(to_embed, encode_fn([text for _, text in to_embed])):
+                        document["vector"] = vector
+                        documents.append(document)
+                    counts["embedded"] += len(to_embed)
+                stats["encode"].busy_seconds += time.perf_counter() - started_at
+                stats["encode"].rows += len(to_embed)
+                _put(insert_queue, (index, documents), stop, stats["encode"])
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(insert_queue, _END, stop, stats["encode"])
+
+    threads = [threading.Thread(target=reader, name=f"{collection_name}-reader", daemon=True),
+               threading.Thread(target=encoder, name=f"{collection_name}-encoder", daemon=True)]
+    for thread in threads:
+        thread.start()
+
+    rows_done = checkpoint.rows_done(key)
+    try:
+        while (item := _get(insert_queue, stop, stats["insert"])) is not _END:
+            index, documents = item
+            started_at = time.perf_counter()
+            if documents:
+                upsert_data(collection_name, documents)
+            stats["insert"].busy_seconds += time.perf_counter() - started_at
+            stats["insert"].rows += len(documents)
+            rows_done += len(documents)
+            checkpoint.mark_done(key, index + 1, rows_done)
+            logfire.info(f"{collection_name} chunk {index} 完成", rows_done=rows_done,
+                         **{f"{name}_rows_per_second": round(stage.rows_per_second, 1)
+                            for name, stage in stats.items()})
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+    # 整個來源都讀完才刪除，失敗中斷時不會誤刪尚未讀到的文件
+    if existing:
+        counts["deleted"] = delete_removed(collection_name, existing)
+        counts["delete_failed"] = len(existing)
+    if counts["added"] or counts["changed"] or counts["deleted"] or recreate:
+        bump_collection_version(collection_name)
+
+    report = {name: stage.as_dict() for name, stage in stats.items()}
+    report["rows_done"] = rows_done
+    report.update(counts)
+    logfire.info(f"{collection_name} 串流匯入完成", report=report)
+    return report
@@ -0,0 +1,114 @@
+"""
+商品規格索引
+匯入時將 specs 範圍字串（"2-9"、"10-85"、"75x75"）解析為數值 min / max 純量欄位；
+查詢時從用戶訊息取出尺寸、重量、桌板厚度與 VESA，組成 Milvus filter，向量搜尋只在相容的 SKU 中進行
+"""
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+VESA_FIELD = "vesa"
+VESA_MAX_CAPACITY = 8
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_RANGE = re.compile(rf"^\s*{_NUMBER}\s*(?:-|–|~|to)\s*{_NUMBER}\s*$")
+_SINGLE = re.compile(rf"^\s*{_NUMBER}\s*$")
+_VESA = re.compile(r"(\d{2,3})\s*[x×X*]\s*(\d{2,3})")
+
+_QUERY_INCH = re.compile(rf"{_NUMBER}\s*(?:吋|寸|英吋|inch(?:es)?|in\b|\")", re.IGNORECASE)
+_QUERY_KG = re.compile(rf"{_NUMBER}\s*(?:kg|公斤|千克)", re.IGNORECASE)
+_QUERY_MM = re.compile(rf"{_NUMBER}\s*(?:mm|毫米|公釐)", re.IGNORECASE)
+_QUERY_CM = re.compile(rf"{_NUMBER}\s*(?:cm|公分|釐米)", re.IGNORECASE)
+
+# 長度 / 重量單位很常見（螺絲長度、包裹重量），只有附近出現這些字詞時才視為桌板厚度 / 螢幕重量
+_DESK_CONTEXT = re.compile(r"桌板|桌面|厚度")
+_WEIGHT_CONTEXT = re.compile(r"螢幕|重量|承重")
+_CONTEXT_WINDOW = 8
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value)) or str(value).strip() == ""
+
+
+def parse_range(value: Any) -> Tuple[Optional[float], Optional[float]]:
+    """"2-9" → (2, 9)；單一數值 → (value, value)；無法解析 → (None, None)"""
+    if _is_missing(value):
+        return None, None
+    if isinstance(value, (int, float)):
+        return float(value), float(value)
+    text = str(value)
+    if match := _RANGE.match(text):
+        low, high = float(match.group(1)), float(match.group(2))
+        return min(low, high), max(low, high)
+    if match := _SINGLE.match(text):
+        return float(match.group(1)), float(match.group(1))
+    return None, None
+
+
+def normalize_vesa(value: Any) -> Optional[str]:
+    """"100 × 100" → "100x100" """
+    if _is_missing(value):
+        return None
+    match = _VESA.search(str(value))
+    return f"{int(match.group(1))}x{int(match.group(2))}" if match else None
+
+
+def parse_spec_fields(specs: Dict[str, Any]) -> Dict[str, Any]:
+    """將單一商品的 specs 轉為集合上的數值 / 陣列欄位；規格不適用時為 None，不會通過該維度的過濾"""
+    _, size_max = parse_range(specs.get("size_max_inch"))
+    weight_min, weight_max = parse_range(specs.get("weight_per_arm_kg"))
+    desk_min, desk_max = parse_range(specs.get("desk_thickness_mm"))
+    tray_min, tray_max = parse_range(specs.get("tray_size_inch"))
+    vesa = [normalize_vesa(value) for key, value in sorted(specs.items()) if key.startswith("vesa/")]
+    return {
+        "size_max_inch": size_max,
+        "weight_min_kg": weight_min,
+        "weight_max_kg": weight_max,
+        "desk_min_mm": desk_min,
+        "desk_max_mm": desk_max,
+        "tray_min_inch": tray_min,
+        "tray_max_inch": tray_max,
+        VESA_FIELD: [value for value in vesa if value][:VESA_MAX_CAPACITY],
+    }
+
+
+def _search_near(pattern: re.Pattern, context: re.Pattern, query: str) -> Optional[re.Match]:
+    """回傳第一個前後 _CONTEXT_WINDOW 字內出現 context 字詞的數值"""
+    for match in pattern.finditer(query):
+        window = query[max(0, match.start() - _CONTEXT_WINDOW):match.end() + _CONTEXT_WINDOW]
+        if context.search(window):
+            return match
+    return None
+
+
+def extract_constraints(query: str) -> Dict[str, Any]:
+    """從查詢取出規格需求：inch / kg / mm / vesa；kg 與 mm 需有螢幕重量 / 桌板厚度的上下文"""
+    constraints: Dict[str, Any] = {}
+    if match := _QUERY_INCH.search(query):
+        constraints["inch"] = float(match.group(1))
+    if match := _search_near(_QUERY_KG, _WEIGHT_CONTEXT, query):
+        constraints["kg"] = float(match.group(1))
+    if match := _search_near(_QUERY_MM, _DESK_CONTEXT, query):
+        constraints["mm"] = float(match.group(1))
+    elif match := _search_near(_QUERY_CM, _DESK_CONTEXT, query):
+        constraints["mm"] = float(match.group(1)) * 10
+    if match := _VESA.search(query):
+        constraints["vesa"] = f"{int(match.group(1))}x{int(match.group(2))}"
+    return constraints
+
+
+def build_spec_filter(constraints: Dict[str, Any]) -> str:
+    """將規格需求轉為 Milvus filter 表達式；沒有需求時回傳空字串"""
+    clauses: List[str] = []
+    if "inch" in constraints:
+        inch = constraints["inch"]
+        clauses.append(f"(size_max_inch >= {inch} or (tray_min_inch <= {inch} and tray_max_inch >= {inch}))")
+    if "kg" in constraints:
+        kg = constraints["kg"]
+        clauses.append(f"(weight_min_kg <= {kg} and weight_max_kg >= {kg})")
+    if "mm" in constraints:
+        mm = constraints["mm"]
+        clauses.append(f"(desk_min_mm <= {mm} and desk_max_mm >= {mm})")
+    if "vesa" in constraints:
+        clauses.append(f'ARRAY_CONTAINS({VESA_FIELD}, "{constraints["vesa"]}")')
+    return " and ".join(clauses)
@@ -0,0 +1,30 @@
+"""
+token 數估算
+安裝 tiktoken 時使用 o200k_base 編碼精確計算，否則以字元數近似（CJK 每字約 1 token，其餘約 4 字元 1 token）
+"""
+import re
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken 為選用套件
+    tiktoken = None
+
+_CJK = re.compile(r"[　-鿿가-힯＀-￯]")
+_encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文字的 token 數"""
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            # 編碼檔無法下載時改用近似值，不再重試
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4